@@ -1,25 +1,52 @@
-from typing import List, Union
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 from fastapi import APIRouter, Query, Depends, status, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.routing import APIRoute
 from app.schemas.blog import BlogPost, Comment, Reply, AllBlogsBlogPost, BlogPostWithUserData, CommentBase, ReplyBase, UpdateTextRequest, LikeRequest, LikeResponse, LikeStatusResponse, BlogPostCreate, BlogPostUpdate, CommentCreate, ReplyCreate, HealthCheckResponse
-from app.schemas.blog import KeycloakUser
+from app.schemas.blog import KeycloakUser, BlogStatsResponse
 from app.schemas.responses import (
     HEALTH_CHECK_RESPONSES, KEYCLOAK_USERS_LIST_RESPONSES, KEYCLOAK_USER_RESPONSES,
     BLOGS_LIST_RESPONSES, BLOGS_BY_TAGS_RESPONSES, BLOG_GET_RESPONSES, 
     BLOG_CREATE_RESPONSES, BLOG_UPDATE_RESPONSES, BLOG_DELETE_RESPONSES,
     COMMENTS_LIST_RESPONSES, COMMENT_CREATE_RESPONSES, REPLY_CREATE_RESPONSES,
-    COMMENT_UPDATE_RESPONSES, COMMENT_DELETE_RESPONSES, LIKE_RESPONSES, LIKE_STATUS_RESPONSES
+    COMMENT_UPDATE_RESPONSES, COMMENT_DELETE_RESPONSES, LIKE_RESPONSES, LIKE_STATUS_RESPONSES, BLOG_STATS_RESPONSES
 )
 from app.services.blog import create_blog, delete_blog_by_id, delete_comment_reply, fetch_comments_and_replies, get_all_blogs, get_blog_by_id, get_blogs_byTags, reply_comment, update_Comment_Reply, update_blog, write_comment, like_or_unlike, check_user_like_status
 from app.services.keycloak import get_all_users, get_all_users_safely, get_user_by_id, get_user_by_id_safely
-from app.services.status import get_comprehensive_health_check, get_request_headers_debug, get_auth_debug_info, get_system_info, is_debug_endpoint_enabled
-from app.core.security import get_current_user_id
+from app.services.status import get_comprehensive_health_check, get_request_headers_debug, get_auth_debug_info, get_system_info, get_mongo_command_stats, is_debug_endpoint_enabled
+from app.services.engagement import get_blog_stats
+from app.services.profiling import list_profile_reports, get_profile_report_path
+from app.services.readiness import readiness
+from app.core.security import get_current_user_id, get_viewer_id
+from app.core.config import settings
+from app.core.metrics import render_metrics
+from app.middleware.server_timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute if settings.SERVER_TIMING_ENABLED else APIRoute)
 
 @router.get("/ping", tags=["Health"], summary="Ping the service to check if it's alive")
 async def ping():
     return {"message": "Pong. Hey I am alive!"}
 
+@router.get("/live", tags=["Health"], summary="Liveness probe")
+async def live():
+    """Liveness probe. Touches no dependency; failing it means the worker itself is stuck."""
+    return {"status": "alive"}
+
+@router.get("/ready", tags=["Health"], summary="Readiness probe")
+async def ready():
+    """
+    Readiness probe. Reads the state kept by the background checker, so it is cheap to poll.
+
+    Returns 503 while the worker is warming up, draining, or cannot reach MongoDB.
+    Use `/health` for the full (expensive) diagnostic.
+    """
+    state = readiness.snapshot()
+    if state["status"] != "ready":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=state)
+    return state
+
 # Health check endpoint for blog service
 @router.get("/health", response_model=HealthCheckResponse, tags=["Health"], summary="Blog Service Health Check", responses=HEALTH_CHECK_RESPONSES)
 async def blog_service_health():
@@ -49,6 +76,19 @@ async def blog_service_health():
     
     return health_response
 
+@router.get("/metrics", tags=["Health"], summary="Prometheus metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Exposes per-route latency histograms, in-flight gauges, status-code counters,
+    MongoDB/Keycloak call latency histograms and cache hit ratios.
+    """
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # NOTE: DO NOT turn these `keycloak` endpoints on in production. These can leak user information !!
 # ============================================
 @router.get("/debug/keycloak-users", response_model=List[KeycloakUser], tags=["Debug"], summary="Get all Keycloak users", responses=KEYCLOAK_USERS_LIST_RESPONSES)
@@ -120,6 +160,55 @@ async def get_system_information():
     
     return await get_system_info()
 
+
+@router.get("/debug/mongo-stats", tags=["Debug"], summary="Get MongoDB command statistics")
+async def get_mongo_stats():
+    """
+    Debug endpoint to get aggregated MongoDB command statistics.
+    
+    Returns, per collection and command:
+    - Command, failure and slow-command counts
+    - Total, average and maximum latency in milliseconds
+    
+    NOTE: This endpoint should be disabled in production for security reasons.
+    """
+    if not is_debug_endpoint_enabled():
+        return {"error": "Debug endpoints are disabled in this environment"}
+    
+    return await get_mongo_command_stats()
+
+
+@router.get("/debug/profiles", tags=["Debug"], summary="List stored request profiles")
+async def get_profiles():
+    """
+    Debug endpoint to list the stored request profiles, newest first.
+    
+    A request is profiled when it carries the `X-Profile-Request` header (configurable)
+    or is picked by the sampling rate; its profile id is returned in `X-Profile-Id`.
+    
+    NOTE: This endpoint should be disabled in production for security reasons.
+    """
+    if not is_debug_endpoint_enabled():
+        return {"error": "Debug endpoints are disabled in this environment"}
+    
+    return {"profiles": list_profile_reports()}
+
+
+@router.get("/debug/profiles/{profile_id}", tags=["Debug"], summary="Download a stored request profile")
+async def download_profile(profile_id: str):
+    """
+    Debug endpoint to download a stored request profile (HTML call tree, speedscope JSON or text).
+    
+    NOTE: This endpoint should be disabled in production for security reasons.
+    """
+    if not is_debug_endpoint_enabled():
+        return {"error": "Debug endpoints are disabled in this environment"}
+    
+    report_path = get_profile_report_path(profile_id)
+    if report_path is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return FileResponse(report_path, filename=profile_id)
+
 # ============================================
 
 # NOTE: All endpoints with `Authenticated` tag require `X-User-ID` header to be set with the user's ID.
@@ -133,8 +222,8 @@ async def Blogs_By_tags(tags : List[str]=Query(..., description="List of tags"))
     return await get_blogs_byTags(tags)
 
 @router.get("/public/blog/{blog_id}", response_model=BlogPostWithUserData ,tags=["Blog", "Unauthenticated"], summary="Get Blog by ID", responses=BLOG_GET_RESPONSES)
-async def get_blog_by_blog_id(blog_id: str): #data type change from int to str
-    blog = await get_blog_by_id(blog_id) #{"p_id": blog_id} => blog_id -function parameter error,parameter was not in format used in get_blog_by_id()
+async def get_blog_by_blog_id(blog_id: str, viewer_id: str = Depends(get_viewer_id)): #data type change from int to str
+    blog = await get_blog_by_id(blog_id, viewer_id) #{"p_id": blog_id} => blog_id -function parameter error,parameter was not in format used in get_blog_by_id()
     return blog
 
 @router.post('/createblog', response_model=BlogPostWithUserData, tags=["Blog", "Authenticated"], summary="Create a new blog post", status_code=status.HTTP_201_CREATED, responses=BLOG_CREATE_RESPONSES)
@@ -190,3 +279,17 @@ async def getUserLikeStatus(blog_id: str, current_user_id: str = Depends(get_cur
     Returns like status, total likes count, and like details if applicable.
     """
     return await check_user_like_status(blog_id, current_user_id)
+
+@router.get('/blog/{blog_id}/stats', response_model=BlogStatsResponse, tags=["Blog", "Authenticated"], summary="Get engagement statistics of a blog post", responses=BLOG_STATS_RESPONSES)
+async def getBlogStats(
+    blog_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (UTC); defaults to 48 hours or 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC); defaults to now"),
+    granularity: Literal["hour", "day"] = Query("day", description="Bucket size of the time series"),
+    current_user_id: str = Depends(get_current_user_id),
+):
+    """
+    Views, likes, unlikes and comments of a blog post over a time range, one point per hour or day.
+    Counts are written in batches, so the last few seconds may not be included yet.
+    """
+    return await get_blog_stats(blog_id, start, end, granularity)
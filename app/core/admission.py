@@ -0,0 +1,119 @@
+"""
+Admission control primitives: a concurrency limiter with a bounded FIFO wait queue and a
+per-key token bucket.
+
+Both are meant for a single event loop (one per worker) and take no locks. Limits are
+therefore per worker process.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Optional, Tuple
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` holders at a time; up to `queue_size` callers wait in FIFO order for at
+    most `queue_timeout` seconds. A `limit` of 0 disables the limiter.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed. Returns False if the caller should be shed."""
+        if self.limit <= 0:
+            return True
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # asyncio.wait does not cancel the future on timeout, so a slot handed over at the
+            # last moment is still seen below
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if waiter.done() and not waiter.cancelled():
+            return True
+        self._abandon(waiter)
+        return False
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self.release()  # The slot was handed over; pass it on
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        if self.limit <= 0:
+            return
+        # Hand the slot straight to the next waiter, so queued callers are served before new arrivals
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key (e.g. user id): `rate` tokens per second, up to `burst` stored.
+    At most `max_keys` buckets are kept; the least recently used ones are dropped, which
+    only ever makes a key less restricted.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key: Hashable) -> Optional[float]:
+        """
+        Take one token for `key`.
+
+        Returns:
+            None if allowed, otherwise the number of seconds until a token is available
+        """
+        if self.rate <= 0:
+            return None
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return None
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        return (1 - tokens) / self.rate
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(seconds)))
+
@@ -0,0 +1,54 @@
+"""
+Per-request latency budget for optional work.
+
+The latency budget middleware places a `RequestBudget` with a deadline of
+ENRICHMENT_BUDGET_MS after the request started in a contextvar. Optional work (author
+enrichment from Keycloak) checks it and is skipped or cut short once the deadline has
+passed. The response is then flagged as partially enriched. Core work such as MongoDB
+reads never looks at the budget.
+
+When no budget is set (scripts, warm-up, background jobs) the contextvar is None and the
+optional work runs without a limit.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
+
+
+class RequestBudget:
+    __slots__ = ("deadline", "skipped")
+
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+        self.skipped = 0  # Optional steps skipped or cut short
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def exhausted(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def skip(self) -> None:
+        self.skipped += 1
+
+    @property
+    def partial(self) -> bool:
+        return self.skipped > 0
+
+
+_request_budget: ContextVar[Optional[RequestBudget]] = ContextVar("request_budget", default=None)
+
+
+def start_request_budget(seconds: float) -> Tuple[RequestBudget, Token]:
+    """Give the current request a budget of `seconds`. Pass the returned token to `stop_request_budget`."""
+    budget = RequestBudget(seconds)
+    return budget, _request_budget.set(budget)
+
+
+def stop_request_budget(token: Token) -> None:
+    _request_budget.reset(token)
+
+
+def get_request_budget() -> Optional[RequestBudget]:
+    return _request_budget.get()
@@ -0,0 +1,80 @@
+"""
+Small in-process caches.
+
+`TTLCache` is a bounded LRU map whose entries expire after a fixed time. It is meant for
+per-worker caching of slow lookups (Keycloak profiles, tokens); every worker process has
+its own copy, so entries must be safe to serve slightly stale for up to `ttl_seconds`.
+Hits and misses are exported through `app.core.metrics`.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+from app.core.metrics import register_cache
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    LRU cache with per-entry expiry.
+
+    Args:
+        name: Cache name used in the hit/miss metrics
+        maxsize: Maximum number of entries; the least recently used one is evicted beyond this
+        ttl_seconds: Default lifetime of an entry
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.stats = register_cache(name)
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.stats.miss()
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Kept (until evicted) so `get_stale` can still serve it as a fallback
+            self.stats.miss()
+            return default
+        self._entries.move_to_end(key)
+        self.stats.hit()
+        return value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Return the entry even if it has expired (as long as it was not evicted), for use as a fallback."""
+        entry = self._entries.get(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def delete_matching(self, predicate: Callable[[V], bool]) -> int:
+        """Delete every entry whose value satisfies `predicate`; returns the number deleted."""
+        keys = [key for key, (_, value) in self._entries.items() if predicate(value)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
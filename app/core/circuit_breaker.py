@@ -0,0 +1,157 @@
+"""
+Circuit breaker for calls to a remote dependency.
+
+States:
+- closed: calls go through; outcomes are recorded in a sliding window of the last
+  `window_size` calls. Once the window holds `min_calls` outcomes and either the failure
+  rate or the slow-call rate reaches its threshold, the breaker opens.
+- open: calls are rejected immediately with `CircuitOpenError` for `open_seconds`.
+- half_open: up to `half_open_probes` trial calls go through at a time. A success closes
+  the breaker with an empty window; a failure (or slow call) opens it again.
+
+The breaker is meant for a single event loop and takes no locks.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open."""
+
+    def __init__(self, name: str, retry_in_seconds: float):
+        super().__init__(f"Circuit breaker {name!r} is open; retry in {retry_in_seconds:.1f}s")
+        self.name = name
+        self.retry_in_seconds = retry_in_seconds
+
+
+class CircuitBreaker:
+    """
+    Args:
+        name: Name used in errors and metrics
+        failure_rate_threshold: Open when this fraction of the window failed (0-1)
+        slow_call_rate_threshold: Open when this fraction of the window was slower than `slow_call_seconds` (0-1)
+        slow_call_seconds: Calls taking at least this long count as slow
+        window_size: Number of most recent calls considered
+        min_calls: Minimum outcomes in the window before the rates are evaluated
+        open_seconds: How long to reject calls before probing again
+        half_open_probes: Concurrent trial calls allowed while half-open
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 2.0,
+        window_size: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.rejected_calls = 0
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+    def _retry_in(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def _open(self) -> None:
+        print(f"\nCircuit breaker {self.name} opened; failing fast for {self.open_seconds}s\n")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._window:
+            return 0.0, 0.0
+        failed = sum(1 for failure, _ in self._window if failure)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failed / len(self._window), slow / len(self._window)
+
+    def allow(self) -> None:
+        """Raise `CircuitOpenError` if a call may not be made now; otherwise reserve it."""
+        if self.state == OPEN:
+            if self._retry_in() > 0:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, self._retry_in())
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes_in_flight += 1
+
+    def record(self, failed: bool, duration_seconds: float) -> None:
+        """Record the outcome of a call that `allow()` let through."""
+        slow = duration_seconds >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed or slow:
+                self._open()
+            else:
+                self.state = CLOSED
+                self._window.clear()
+            return
+        if self.state == OPEN:
+            return  # A call that started before the breaker opened
+        self._window.append((failed, slow))
+        if len(self._window) >= self.min_calls:
+            failure_rate, slow_call_rate = self._rates()
+            if failure_rate >= self.failure_rate_threshold or slow_call_rate >= self.slow_call_rate_threshold:
+                self._open()
+
+    def release(self) -> None:
+        """Give back a reservation from `allow()` without a verdict (e.g. the caller was cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    @contextmanager
+    def call(self) -> Iterator[Dict[str, bool]]:
+        """
+        Guard one call. Exceptions raised inside count as failures; set `outcome["failed"] = True`
+        to count a call that returned normally (e.g. an HTTP 5xx) as failed.
+        """
+        self.allow()
+        outcome = {"failed": False}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self.record(True, time.monotonic() - start)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record(outcome["failed"], time.monotonic() - start)
+
+    def snapshot(self) -> Dict:
+        if self.state == OPEN and self._retry_in() == 0:
+            state = HALF_OPEN  # The next call will probe
+        else:
+            state = self.state
+        failure_rate, slow_call_rate = self._rates()
+        return {
+            "state": state,
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_call_rate, 3),
+            "calls_in_window": len(self._window),
+            "rejected_calls": self.rejected_calls,
+            "retry_in_seconds": round(self._retry_in(), 2) if self.state == OPEN else None,
+        }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -18,12 +18,113 @@ class Settings(BaseSettings):
     # MongoDB settings
     MONGODB_URL: str = os.getenv("BLOG_MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DB_NAME: str = os.getenv("BLOG_MONGODB_DB_NAME", "")
+    MONGODB_MAX_POOL_SIZE: int = 100  # Max connections per server; size it to peak request concurrency
+    MONGODB_MIN_POOL_SIZE: int = 0  # Connections kept open even when idle
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None  # Close pooled connections idle for longer than this
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None  # Fail a pool checkout after waiting this long (None waits indefinitely)
+    MONGODB_COMPRESSORS: str = ""  # Wire compressors in preference order, e.g. "zstd,snappy,zlib"
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 20000
+    # Read preference for the unauthenticated /public/* reads: primary, primaryPreferred, secondary, secondaryPreferred or nearest.
+    # Every other read (including read-after-write paths) stays on the primary.
+    MONGODB_PUBLIC_READ_PREFERENCE: str = "primary"
+    MONGODB_PUBLIC_MAX_STALENESS_SECONDS: Optional[int] = None  # Skip secondaries lagging more than this (min 90; not allowed with primary)
+    # Write concern "w" per operation class: "majority", a member count such as "1", or None for the connection-string default
+    MONGODB_CONTENT_WRITE_CONCERN: Optional[str] = None  # Blogs, comments, replies and their counters
+    MONGODB_ENGAGEMENT_WRITE_CONCERN: Optional[str] = None  # Likes and view counters
+    MONGODB_WRITE_CONCERN_TIMEOUT_MS: Optional[int] = None  # wtimeout for both classes
 
     # Keycloak settings
     KEYCLOAK_URL: str = "http://localhost:8080"
     REALM: str = "master"
     CLIENT_ID: str = "blogs-service"  # Custom client used for blog service (separation of concerns)
     CLIENT_SECRET: str = os.getenv("BLOG_CLIENT_SECRET", "")
+    KEYCLOAK_MAX_CONNECTIONS: int = 100  # Pooled HTTP connections to Keycloak per worker
+    KEYCLOAK_TOKEN_REFRESH_MARGIN_SECONDS: int = 30  # Refresh the service token this long before it expires
+    KEYCLOAK_USER_CACHE_TTL_SECONDS: float = 300  # How long a cached user profile is served
+    KEYCLOAK_USER_CACHE_SIZE: int = 5000  # Max cached user profiles per worker (0 disables the cache)
+    KEYCLOAK_TIMEOUT_SECONDS: float = 10
+    # Deadline (from request start) for optional author enrichment; later lookups use cached or default profiles (0 disables)
+    ENRICHMENT_BUDGET_MS: float = 500
+    REQUEST_COALESCING_ENABLED: bool = True  # Identical concurrent public reads share one Mongo/Keycloak round
+    # Keycloak circuit breaker: opens when the failure or slow-call rate of the last calls reaches the threshold
+    KEYCLOAK_BREAKER_FAILURE_RATE: float = 0.5
+    KEYCLOAK_BREAKER_SLOW_CALL_RATE: float = 0.5
+    KEYCLOAK_BREAKER_SLOW_CALL_MS: float = 2000  # Calls at least this slow count as slow
+    KEYCLOAK_BREAKER_WINDOW: int = 20  # Number of recent calls considered
+    KEYCLOAK_BREAKER_MIN_CALLS: int = 10  # Calls needed in the window before it can open
+    KEYCLOAK_BREAKER_OPEN_SECONDS: float = 30  # Fail fast for this long, then let probe calls through
+    KEYCLOAK_BREAKER_HALF_OPEN_PROBES: int = 1
+    # Local mirror of the Keycloak user directory (User collection), read by the author enrichment
+    USER_DIRECTORY_SYNC_SECONDS: float = 0  # In-app sync interval, run by every worker (0: off; schedule `python -m app.services.user_directory` instead)
+    USER_DIRECTORY_PAGE_SIZE: int = 100  # Users per Keycloak admin API call during a sync
+
+    # Production server settings (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8010
+    SERVER_WORKERS: Optional[int] = None  # None: WEB_CONCURRENCY or 1; 0: one per available CPU core (metrics are then per worker)
+    # Start-up warm-up, run by each worker before it accepts requests
+    WARMUP_ENABLED: bool = True  # Ensure indexes, open the Mongo pool, fetch the Keycloak token and preload author profiles
+    WARMUP_RECENT_AUTHORS: int = 100  # Preload profiles of the authors of this many most recent blogs
+    # Admission control (per worker): concurrent requests and wait-queue size per route class (0 concurrency disables the limit)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_READ_CONCURRENCY: int = 200
+    ADMISSION_READ_QUEUE: int = 400
+    ADMISSION_WRITE_CONCURRENCY: int = 50
+    ADMISSION_WRITE_QUEUE: int = 100
+    ADMISSION_DEBUG_CONCURRENCY: int = 4
+    ADMISSION_DEBUG_QUEUE: int = 8
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2  # Shed a queued request after waiting this long
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1  # Retry-After sent with 503 responses
+    ADMISSION_WRITE_RATE_PER_USER: float = 2  # Sustained writes per second per X-User-ID (0 disables)
+    ADMISSION_WRITE_BURST_PER_USER: int = 10
+    # Response compression (gzip, plus Brotli when the brotli package is installed), negotiated through Accept-Encoding
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5  # 0-11; higher is smaller but slower
+    # Per-worker cache of rendered public lists and comment trees, stored with their compressed variants
+    PUBLIC_CACHE_ENABLED: bool = True
+    PUBLIC_CACHE_TTL_SECONDS: float = 30  # Bounds staleness of view/like counts and of writes made through other workers
+    PUBLIC_CACHE_MAX_ENTRIES: int = 500
+    # Invalidate the public cache from MongoDB change streams, so writes through other nodes are seen at once.
+    # Needs a replica set; without one, entries only expire after PUBLIC_CACHE_TTL_SECONDS.
+    CHANGE_STREAM_INVALIDATION_ENABLED: bool = True
+    CHANGE_STREAM_RETRY_SECONDS: float = 5  # Wait before reopening a failed change stream
+    # Read the blog of an edited or deleted comment or reply from its pre-image (MongoDB 6.0+), so only that
+    # blog's comment tree is dropped; set to false on older servers, where every comment tree is dropped instead
+    CHANGE_STREAM_PRE_IMAGES: bool = True
+    # Approximate unique viewers per blog (HyperLogLog): 2**precision bytes per blog; standard error 1.04/sqrt(2**precision)
+    UNIQUE_VIEWERS_PRECISION: int = 12  # 4 KB per blog, ~1.6% standard error
+    UNIQUE_VIEWERS_FLUSH_SECONDS: float = 30  # How often pending sketches are merged into MongoDB
+    UNIQUE_VIEWERS_MAX_PENDING: int = 1000  # Flush early once this many blogs have pending sketches
+    # Engagement analytics: counts are buffered per blog and hour, then upserted into daily bucket documents
+    ENGAGEMENT_STATS_FLUSH_SECONDS: float = 10
+    ENGAGEMENT_STATS_MAX_PENDING: int = 5000  # Flush early once this many (blog, hour) buckets are buffered
+    ENGAGEMENT_STATS_MAX_DAYS: int = 366  # Longest range served by /blog/{id}/stats
+    # Background task queues for deferred side effects (per worker; a full queue runs tasks inline)
+    TASK_QUEUE_CAPACITY: int = 10000  # Queued tasks per queue
+    TASK_QUEUE_CONCURRENCY: int = 4  # Worker tasks per queue
+    TASK_QUEUE_MAX_RETRIES: int = 3  # For queues of idempotent tasks; view counting never retries
+    TASK_QUEUE_RETRY_BACKOFF_SECONDS: float = 0.5  # Doubled for each further retry
+    TASK_QUEUE_DRAIN_SECONDS: float = 10  # At shutdown, wait this long for queued tasks
+    # Readiness probe (/ready)
+    READINESS_CHECK_INTERVAL_SECONDS: float = 5  # Background MongoDB ping interval
+    READINESS_CHECK_TIMEOUT_SECONDS: float = 2
+    READINESS_DRAIN_SECONDS: float = 0  # After SIGTERM, report not ready for this long before shutting down (0 disables)
+
+    # Observability settings
+    METRICS_ENABLED: bool = True  # Record request/Mongo/Keycloak metrics and serve them at /metrics
+    MONGO_SLOW_QUERY_MS: float = 100  # Log MongoDB commands at least this slow (negative disables the log)
+    SERVER_TIMING_ENABLED: bool = False  # Emit a Server-Timing header (db/keycloak/serialize) and an access-log line per request
+
+    # Request profiling settings (only active while debug endpoints are enabled)
+    PROFILING_HEADER: str = "X-Profile-Request"  # Requests carrying this header are profiled
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of all requests to profile (0 disables sampling)
+    PROFILING_INTERVAL_SECONDS: float = 0.001  # Sampling interval of the profiler
+    PROFILING_FORMAT: str = "html"  # "html" (call tree), "speedscope" (flame graph JSON) or "text"
+    PROFILING_DIR: str = "/tmp/blog-profiles"  # Ring buffer directory for reports
+    PROFILING_MAX_REPORTS: int = 50  # Oldest reports are deleted beyond this count
 
     class Config:
         case_sensitive = True
@@ -241,6 +241,13 @@ class InvalidLikeValueException(BlogAPIException):
             detail=detail
         )
 
+class InvalidStatsRangeException(BlogAPIException):
+    def __init__(self, detail: str = "Invalid time range"):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+
 # ============================================================================
 # External Service Exceptions
 # ============================================================================
@@ -252,6 +259,13 @@ class KeycloakServiceException(BlogAPIException):
             detail=f"Internal Server Error. Keycloak returned a {status_code} - {detail} error"
         )
 
+class KeycloakUnavailableException(BlogAPIException):
+    def __init__(self, detail: str = "Keycloak is unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service Unavailable. {detail}"
+        )
+
 class KeycloakUserNotFoundException(BlogAPIException):
     def __init__(self, user_id: Optional[str] = None):
         detail = f"User not found in Keycloak with ID: {user_id}" if user_id else "User not found in Keycloak"
@@ -0,0 +1,73 @@
+"""
+HyperLogLog cardinality sketch.
+
+A sketch with precision `p` keeps m = 2**p one-byte registers (4 KB for the default p = 12)
+however many distinct values are added. Its standard error is 1.04 / sqrt(m): about 1.6%
+for p = 12, so roughly 95% of estimates are within +-3.3% of the true count. Small
+counts (below 2.5 * m) use linear counting and are close to exact.
+
+Sketches are merged by taking the register-wise maximum, which is commutative and
+idempotent: merging the same sketch twice, or in any order, gives the same result.
+"""
+
+import hashlib
+import math
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+
+def _alpha(m: int) -> float:
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+class HyperLogLog:
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 12, registers: bytes = None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"HyperLogLog precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        m = 1 << precision
+        if registers is not None and len(registers) != m:
+            raise ValueError(f"Expected {m} registers, got {len(registers)}")
+        self.registers = bytearray(registers) if registers is not None else bytearray(m)
+
+    def add(self, value: str) -> bool:
+        """Add a value; returns True if a register changed (i.e. the estimate may have grown)."""
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1  # Position of the leftmost 1-bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = _alpha(m) * m * m / sum(2.0 ** -register for register in self.registers)
+        if estimate <= 2.5 * m:
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, registers: bytes) -> "HyperLogLog":
+        return cls(int(math.log2(len(registers))), registers)
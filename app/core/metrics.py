@@ -0,0 +1,208 @@
+"""
+Prometheus metrics for the blog service.
+
+All metrics live in the default `prometheus_client` registry and are rendered by the
+`/metrics` endpoint. Recording is kept cheap: a histogram observation or counter increment
+per event, no allocation beyond the label lookup.
+
+Everything here is per process: with several uvicorn workers (see `app.server`), a scrape
+only sees the worker that answered it.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Latency buckets (seconds) tuned for an API whose typical responses are 5ms - 2s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "blog_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "blog_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ["method"],
+)
+HTTP_RESPONSES = Counter(
+    "blog_http_responses_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "blog_mongo_command_duration_seconds",
+    "MongoDB command latency by command and collection",
+    ["command", "collection"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "blog_mongo_command_failures_total",
+    "Failed MongoDB commands by command and collection",
+    ["command", "collection"],
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "blog_mongo_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the MongoDB pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "blog_mongo_pool_checkout_failures_total",
+    "Failed MongoDB pool checkouts by reason (e.g. timeout)",
+    ["reason"],
+)
+MONGO_POOL_CONNECTIONS_IN_USE = Gauge(
+    "blog_mongo_pool_connections_in_use",
+    "MongoDB connections currently checked out of the pool",
+)
+KEYCLOAK_REQUEST_DURATION = Histogram(
+    "blog_keycloak_request_duration_seconds",
+    "Keycloak HTTP call latency by operation",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_QUEUED = Gauge(
+    "blog_admission_queued_requests",
+    "Requests waiting for admission by route class",
+    ["route_class"],
+)
+ADMISSION_REJECTED = Counter(
+    "blog_admission_rejected_total",
+    "Requests shed by admission control by route class and reason (overloaded, rate_limited)",
+    ["route_class", "reason"],
+)
+COALESCED_CALLS = Counter(
+    "blog_coalesced_calls_total",
+    "Single-flight calls by group and role (leader ran the call, follower shared its result)",
+    ["group", "role"],
+)
+ENRICHMENT_SKIPPED = Counter(
+    "blog_enrichment_skipped_total",
+    "Author lookups skipped or cut short by the request latency budget, by fallback used",
+    ["fallback"],
+)
+TASK_QUEUE_DEPTH = Gauge(
+    "blog_task_queue_depth",
+    "Tasks waiting in a background task queue",
+    ["queue"],
+)
+TASK_QUEUE_TASKS = Counter(
+    "blog_task_queue_tasks_total",
+    "Background tasks by queue and outcome (succeeded, retried, failed, inline, dropped)",
+    ["queue", "outcome"],
+)
+CHANGE_STREAM_EVENTS = Counter(
+    "blog_change_stream_events_total",
+    "MongoDB change events received by the cache invalidation watcher, by collection",
+    ["collection"],
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str) -> Iterator[None]:
+    """Observe the wall-clock duration of the wrapped block on `histogram`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+# ============================================================================
+# Cache statistics
+# ============================================================================
+
+class CacheStats:
+    """
+    Hit/miss counters for an in-process cache.
+
+    Plain integer increments keep the hot path free of locks; the values are read
+    by the collector below only when `/metrics` is scraped.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self) -> None:
+        self.hits += 1
+
+    def miss(self) -> None:
+        self.misses += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_caches: Dict[str, CacheStats] = {}
+
+
+def register_cache(name: str) -> CacheStats:
+    """Get (or create) the statistics object for the cache called `name`."""
+    if name not in _caches:
+        _caches[name] = CacheStats(name)
+    return _caches[name]
+
+
+def get_cache_stats() -> Dict[str, Tuple[int, int, float]]:
+    """Snapshot of (hits, misses, hit_ratio) for every registered cache."""
+    return {name: (stats.hits, stats.misses, stats.hit_ratio) for name, stats in _caches.items()}
+
+
+class _CacheCollector:
+    def collect(self):
+        hits = CounterMetricFamily("blog_cache_hits", "Cache hits by cache name", labels=["cache"])
+        misses = CounterMetricFamily("blog_cache_misses", "Cache misses by cache name", labels=["cache"])
+        ratio = GaugeMetricFamily("blog_cache_hit_ratio", "Cache hit ratio since start by cache name", labels=["cache"])
+        for name, stats in _caches.items():
+            hits.add_metric([name], stats.hits)
+            misses.add_metric([name], stats.misses)
+            ratio.add_metric([name], stats.hit_ratio)
+        yield hits
+        yield misses
+        yield ratio
+
+
+REGISTRY.register(_CacheCollector())
+
+
+# ============================================================================
+# Circuit breakers
+# ============================================================================
+
+_circuit_breakers: Dict[str, object] = {}
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def register_circuit_breaker(breaker):
+    """Export the state of `breaker` (an `app.core.circuit_breaker.CircuitBreaker`); replaces one with the same name."""
+    _circuit_breakers[breaker.name] = breaker
+    return breaker
+
+
+class _CircuitBreakerCollector:
+    def collect(self):
+        state = GaugeMetricFamily("blog_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", labels=["name"])
+        rejected = CounterMetricFamily("blog_circuit_breaker_rejected_calls", "Calls rejected by an open circuit breaker", labels=["name"])
+        for name, breaker in _circuit_breakers.items():
+            snapshot = breaker.snapshot()
+            state.add_metric([name], _CIRCUIT_STATES[snapshot["state"]])
+            rejected.add_metric([name], snapshot["rejected_calls"])
+        yield state
+        yield rejected
+
+
+REGISTRY.register(_CircuitBreakerCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text exposition format."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,69 @@
+"""
+Base class for in-memory write buffers that a background task persists periodically.
+
+Request handlers only update the buffer; `flush()` writes it out every
+`flush_interval_seconds`, or sooner after `request_flush()`. `stop()` lets a flush in progress
+finish instead of cancelling it, then flushes whatever is left, so a clean shutdown
+loses nothing.
+
+A failing flush is logged and does not stop the loop; the next interval tries again (whether
+the failed items are kept for that is up to `flush()`). Failures during `stop()` are logged
+too, so they cannot abort the rest of the application shutdown.
+"""
+
+import abc
+import asyncio
+from typing import Optional
+
+
+class PeriodicFlusher(abc.ABC):
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @property
+    @abc.abstractmethod
+    def flush_interval_seconds(self) -> float:
+        ...
+
+    @abc.abstractmethod
+    async def flush(self) -> int:
+        """Persist the buffered data; returns the number of items written."""
+
+    def request_flush(self) -> None:
+        """Flush now instead of at the next interval (e.g. when the buffer is getting large)."""
+        if self._flush_requested is not None:
+            self._flush_requested.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self._flush_safely()
+
+    async def _flush_safely(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"\nError flushing {type(self).__name__}:\n{e!r}\n")
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._flush_requested = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._flush_requested.set()
+            try:
+                await self._task
+            except Exception as e:
+                print(f"\nError stopping {type(self).__name__}:\n{e!r}\n")
+            self._task = None
+        self._flush_requested = None
+        await self._flush_safely()
@@ -0,0 +1,66 @@
+"""
+Per-worker cache of rendered public responses.
+
+Entries hold the identity body plus lazily built gzip/Brotli variants, so a popular list
+or comment tree is serialised and compressed once per TTL rather than on every hit. Each
+entry carries tags ("blogs", "comments", "blog:<id>"); write paths in the blog service call
+`invalidate_public_responses` with the tags they affect. Other workers only see a write
+once their copy expires (PUBLIC_CACHE_TTL_SECONDS).
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.compression import compress
+from app.core.config import settings
+
+Header = Tuple[bytes, bytes]
+
+
+class CachedResponse:
+    def __init__(self, status: int, headers: List[Header], body: bytes, tags: Iterable[str]):
+        self.status = status
+        # Length and coding are set per rendered variant
+        self.headers = [(name, value) for name, value in headers if name not in (b"content-length", b"content-encoding")]
+        self.body = body
+        self.tags = frozenset(tags)
+        self._variants: Dict[str, bytes] = {}
+
+    def body_for(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Body in the given content coding (compressed on first use), and the coding actually applied."""
+        if encoding is None or len(self.body) < settings.COMPRESSION_MIN_SIZE:
+            return self.body, None
+        if encoding not in self._variants:
+            self._variants[encoding] = compress(self.body, encoding)
+        return self._variants[encoding], encoding
+
+
+class PublicResponseCache:
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._entries: TTLCache[CachedResponse] = TTLCache("public_responses", maxsize, ttl_seconds)
+        # Bumped on every invalidation; a response rendered across an invalidation is not stored
+        self.generation = 0
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[CachedResponse]:
+        return self._entries.get(key)
+
+    def set(self, key: Tuple[str, bytes], response: CachedResponse, generation: int) -> None:
+        if generation == self.generation:
+            self._entries.set(key, response)
+
+    def invalidate(self, *tags: str) -> None:
+        self.generation += 1
+        tags = set(tags)
+        self._entries.delete_matching(lambda response: not response.tags.isdisjoint(tags))
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+public_responses = PublicResponseCache(settings.PUBLIC_CACHE_MAX_ENTRIES, settings.PUBLIC_CACHE_TTL_SECONDS)
+
+
+def invalidate_public_responses(*tags: str) -> None:
+    """Drop cached public responses carrying any of the tags (call after a write)."""
+    public_responses.invalidate(*tags)
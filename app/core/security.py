@@ -1,4 +1,5 @@
-from fastapi import HTTPException, Header
+import hashlib
+from fastapi import HTTPException, Header, Request
 from typing import Optional
 
 
@@ -18,3 +19,19 @@ async def get_current_user_id(x_user_id: Optional[str] = Header(None)) -> str:
             detail="User authentication required. X-User-ID header missing."
         )
     return x_user_id
+
+
+async def get_viewer_id(request: Request, x_user_id: Optional[str] = Header(None)) -> str:
+    """
+    Identify the reader of a public page for unique-viewer counting.
+
+    Authenticated readers are identified by X-User-ID. Anonymous readers get a fingerprint:
+    a hash of the client address (first X-Forwarded-For hop when behind the gateway),
+    User-Agent and Accept-Language. Only the hash is used, and it is not stored as such.
+    """
+    if x_user_id:
+        return f"user:{x_user_id}"
+    forwarded_for = request.headers.get("x-forwarded-for", "")
+    client = forwarded_for.split(",")[0].strip() or (request.client.host if request.client else "")
+    fingerprint = "|".join((client, request.headers.get("user-agent", ""), request.headers.get("accept-language", "")))
+    return "anon:" + hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,56 @@
+"""
+Request coalescing ("single flight") for identical concurrent reads.
+
+`SingleFlight.do(key, fn)` runs `fn()` once per key at a time: callers that arrive while
+a call for the same key is in flight await that call's result instead of starting their
+own. Nothing is cached; once the call finishes, the next caller starts a new one.
+
+The shared call runs in its own task, so a caller that is cancelled (client went away)
+does not cancel it for the others. It inherits the first caller's context, with a fresh
+latency budget sharing that caller's deadline. Enrichment it skips is added to every
+waiting caller's budget, so each response is flagged as partial on its own.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.core.budget import get_request_budget, start_request_budget
+from app.core.config import settings
+from app.core.metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Task[Tuple[Any, int]]"] = {}
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, int]:
+        leader_budget = get_request_budget()
+        budget = start_request_budget(leader_budget.remaining())[0] if leader_budget is not None else None
+        try:
+            result = await fn()
+            return result, budget.skipped if budget is not None else 0
+        finally:
+            self._calls.pop(key, None)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not settings.REQUEST_COALESCING_ENABLED:
+            return await fn()
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._calls[key] = task
+            COALESCED_CALLS.labels(self.name, "leader").inc()
+        else:
+            COALESCED_CALLS.labels(self.name, "follower").inc()
+
+        result, skipped = await asyncio.shield(task)
+        budget = get_request_budget()
+        if skipped and budget is not None:
+            budget.skipped += skipped
+        return result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,164 @@
+"""
+In-process background task queues for side effects that do not need to finish before the
+response is sent (view counting, cascading deletes).
+
+Each named queue has a bounded capacity and a fixed number of worker tasks. A task that
+raises is retried up to `max_retries` times with exponential backoff (the retrying worker
+sleeps, so retries slow that queue down rather than piling up). A failed attempt may still
+have been applied (e.g. a write whose acknowledgement timed out), so only queues of
+idempotent tasks retry; create the others with `max_retries=0`. On shutdown, queues stop
+taking work and are drained for up to TASK_QUEUE_DRAIN_SECONDS; tasks still queued after
+that are dropped and counted.
+
+Queues are per worker process and in memory: a crash loses the queued tasks. Only submit
+work that is safe to lose or that a maintenance job repairs (e.g. counters).
+
+`submit()` never blocks. When a queue is full or not running (scripts, benchmarks without the
+lifespan, shutdown), `submit()` runs the task inline instead, so the caller is slowed
+down rather than the work being lost.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import TASK_QUEUE_DEPTH, TASK_QUEUE_TASKS
+
+Task = Tuple[Callable[..., Awaitable[Any]], tuple, dict]
+
+
+class TaskQueue:
+    """
+    Bounded FIFO of coroutine functions run by `concurrency` workers.
+
+    Args:
+        name: Queue name used in the metrics
+        capacity: Maximum number of queued tasks
+        concurrency: Number of worker tasks
+        max_retries: Retries after a failed attempt (0 runs each task once)
+        retry_backoff_seconds: Delay before the first retry, doubled for each further one
+    """
+
+    def __init__(self, name: str, capacity: int, concurrency: int, max_retries: int, retry_backoff_seconds: float):
+        self.name = name
+        self.capacity = capacity
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.running = False
+        self._queue: Optional["asyncio.Queue[Task]"] = None
+        self._workers: List[asyncio.Task] = []
+        self._depth = TASK_QUEUE_DEPTH.labels(name)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> bool:
+        """
+        Queue `fn(*args, **kwargs)`, or run it now if the queue is full or not running.
+
+        Returns:
+            bool: True if queued, False if it ran inline
+        """
+        if self.running:
+            try:
+                self._queue.put_nowait((fn, args, kwargs))
+                self._depth.inc()
+                return True
+            except asyncio.QueueFull:
+                pass
+        TASK_QUEUE_TASKS.labels(self.name, "inline").inc()
+        await fn(*args, **kwargs)
+        return False
+
+    async def _execute(self, fn: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await fn(*args, **kwargs)
+                TASK_QUEUE_TASKS.labels(self.name, "succeeded").inc()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries:
+                    TASK_QUEUE_TASKS.labels(self.name, "failed").inc()
+                    print(f"\nError in background task {self.name}/{getattr(fn, '__name__', fn)} after {attempt + 1} attempts:\n{e}\n")
+                    return
+                TASK_QUEUE_TASKS.labels(self.name, "retried").inc()
+                await asyncio.sleep(self.retry_backoff_seconds * 2 ** attempt)
+
+    async def _work(self) -> None:
+        while True:
+            fn, args, kwargs = await self._queue.get()
+            self._depth.dec()
+            try:
+                await self._execute(fn, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.capacity)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self.running = True
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Stop taking tasks, wait up to `timeout` seconds for the queued ones, then stop the workers.
+
+        Returns:
+            int: Number of queued tasks dropped
+        """
+        if not self.running:
+            return 0
+        self.running = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        dropped = self._queue.qsize()
+        if dropped:
+            TASK_QUEUE_TASKS.labels(self.name, "dropped").inc(dropped)
+            print(f"Task queue {self.name}: dropped {dropped} tasks at shutdown")
+        self._depth.set(0)
+        self._workers = []
+        self._queue = None
+        return dropped
+
+
+_queues: Dict[str, TaskQueue] = {}
+
+
+def task_queue(name: str, concurrency: Optional[int] = None, max_retries: Optional[int] = None) -> TaskQueue:
+    """
+    Get (or create) the queue called `name`, sized from the TASK_QUEUE_* settings.
+
+    Args:
+        max_retries: Overrides TASK_QUEUE_MAX_RETRIES; pass 0 for tasks that are not idempotent
+    """
+    if name not in _queues:
+        _queues[name] = TaskQueue(
+            name,
+            capacity=settings.TASK_QUEUE_CAPACITY,
+            concurrency=concurrency or settings.TASK_QUEUE_CONCURRENCY,
+            max_retries=settings.TASK_QUEUE_MAX_RETRIES if max_retries is None else max_retries,
+            retry_backoff_seconds=settings.TASK_QUEUE_RETRY_BACKOFF_SECONDS,
+        )
+    return _queues[name]
+
+
+def start_task_queues() -> None:
+    for queue in _queues.values():
+        queue.start()
+
+
+async def drain_task_queues() -> Dict[str, int]:
+    """Drain every queue concurrently within TASK_QUEUE_DRAIN_SECONDS; returns the dropped tasks per queue."""
+    queues = list(_queues.values())
+    dropped = await asyncio.gather(*(queue.drain(settings.TASK_QUEUE_DRAIN_SECONDS) for queue in queues))
+    return {queue.name: count for queue, count in zip(queues, dropped)}
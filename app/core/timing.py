@@ -0,0 +1,79 @@
+"""
+Per-request timing breakdown.
+
+A `RequestTimings` accumulator is placed in a contextvar by the Server-Timing middleware.
+MongoDB (command listener), Keycloak (HTTP calls) and response serialisation add their
+time to it. Motor runs commands on its executor with a copy of the caller's context, so
+the listener sees the same accumulator as the request that issued the command. Commands of
+one request can finish on several executor threads at once, so the MongoDB fields are only
+updated under the accumulator's lock.
+
+When no request is being timed the contextvar is None and every helper is a no-op.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional, Tuple
+
+
+class RequestTimings:
+    __slots__ = ("start", "db_seconds", "db_calls", "keycloak_seconds", "keycloak_calls", "endpoint_done", "_db_lock")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._db_lock = threading.Lock()
+        self.db_seconds = 0.0
+        self.db_calls = 0
+        self.keycloak_seconds = 0.0
+        self.keycloak_calls = 0
+        # perf_counter() value when the endpoint function returned; the time between this and
+        # the response start is response validation and encoding
+        self.endpoint_done: Optional[float] = None
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Tuple[RequestTimings, Token]:
+    """Start timing the current request. Pass the returned token to `stop_request_timings`."""
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def stop_request_timings(token: Token) -> None:
+    _request_timings.reset(token)
+
+
+def get_request_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def record_db_time(seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        with timings._db_lock:
+            timings.db_seconds += seconds
+            timings.db_calls += 1
+
+
+@contextmanager
+def track_keycloak() -> Iterator[None]:
+    """Add the duration of the wrapped Keycloak call to the current request's timings."""
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.keycloak_seconds += time.perf_counter() - start
+        timings.keycloak_calls += 1
+
+
+def mark_endpoint_done() -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
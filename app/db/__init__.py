@@ -5,8 +5,7 @@ from app.db.database import (
     get_database,
     collection_blog,
     collection_user,
-    collection_comment,
-    collection_reply,
+    collection_discussion,
     collection_like,
 )
 
@@ -14,7 +13,6 @@ __all__ = [
     "get_database",
     "collection_blog",
     "collection_user",
-    "collection_comment",
-    "collection_reply",
+    "collection_discussion",
     "collection_like",
 ] 
\ No newline at end of file
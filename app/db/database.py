@@ -1,29 +1,202 @@
 """
 MongoDB database connection and configuration.
+
+The Motor client is created once by `connect_to_mongo()` when the application starts
+(see the lifespan in `app.main`) and closed by `close_mongo_connection()` on shutdown.
+Scripts that use the collections outside the app must call `connect_to_mongo()` first.
+
+The module-level `database` and `collection_*` objects are lightweight proxies that resolve
+against the current client on use, so they can be imported anywhere at import time.
+
+Collections come in three flavours:
+- `collection_*`: primary reads, content write concern. Use for writes and read-after-write.
+- `collection_*_public`: configurable read preference, for the unauthenticated /public/* reads
+  that can tolerate replication lag.
+- `collection_like` / `collection_blog_counters`: engagement write concern, for likes and
+  view/like counters where losing an acknowledged write on failover is acceptable.
 """
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable, Dict, Optional, Union
 import motor.motor_asyncio
+from pymongo import WriteConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from app.core.config import settings
+from app.db.monitoring import CommandMetricsListener, CommandStatsListener, PoolStatsListener, RequestTimingListener
+
+# Per-collection/per-command aggregates and slow-query log, readable via /debug/mongo-stats
+command_stats = CommandStatsListener(settings.MONGO_SLOW_QUERY_MS)
+# Connection pool checkout waits, exported as metrics and via /debug/mongo-stats
+pool_stats = PoolStatsListener()
+
+client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
+
+
+def _client_options() -> dict:
+    """Pool, compression and timeout options for the Motor client, from settings."""
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+    }
+    if settings.MONGODB_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+    if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGODB_COMPRESSORS:
+        # e.g. "zstd,snappy,zlib": the server picks the first one it supports.
+        # zstd needs the `zstandard` package and snappy `python-snappy`; pymongo skips unavailable ones with a warning.
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+
+    event_listeners = [CommandMetricsListener(), command_stats, pool_stats]
+    if settings.SERVER_TIMING_ENABLED:
+        event_listeners.append(RequestTimingListener())
+    options["event_listeners"] = event_listeners
+    return options
+
+
+# Smallest maxStalenessSeconds the server accepts (heartbeat interval plus idle write period)
+MIN_MAX_STALENESS_SECONDS = 90
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primarypreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondarypreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def public_read_preference():
+    """Read preference for the public read paths, from settings."""
+    mode = settings.MONGODB_PUBLIC_READ_PREFERENCE.lower()
+    if mode not in _READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGODB_PUBLIC_READ_PREFERENCE {settings.MONGODB_PUBLIC_READ_PREFERENCE!r}")
+    max_staleness = settings.MONGODB_PUBLIC_MAX_STALENESS_SECONDS
+    if max_staleness is None:
+        return _READ_PREFERENCES[mode]()
+    # MongoDB only rejects these at server selection, i.e. on the first public read
+    if mode == "primary":
+        raise ValueError("MONGODB_PUBLIC_MAX_STALENESS_SECONDS cannot be used with the primary read preference")
+    if max_staleness < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"MONGODB_PUBLIC_MAX_STALENESS_SECONDS must be at least {MIN_MAX_STALENESS_SECONDS}, got {max_staleness}")
+    return _READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+def _write_concern(w: Optional[str]) -> Optional[WriteConcern]:
+    """Build a write concern from a "w" setting; None keeps the client default."""
+    if w is None:
+        return None
+    value: Union[int, str] = int(w) if w.isdigit() else w
+    return WriteConcern(w=value, wtimeout=settings.MONGODB_WRITE_CONCERN_TIMEOUT_MS)
+
+
+def _content_options() -> Dict:
+    write_concern = _write_concern(settings.MONGODB_CONTENT_WRITE_CONCERN)
+    return {"write_concern": write_concern} if write_concern else {}
+
+
+def _engagement_options() -> Dict:
+    write_concern = _write_concern(settings.MONGODB_ENGAGEMENT_WRITE_CONCERN)
+    return {"write_concern": write_concern} if write_concern else {}
+
+
+def _public_read_options() -> Dict:
+    return {"read_preference": public_read_preference()}
+
+
+def connect_to_mongo(mongo_client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None) -> motor.motor_asyncio.AsyncIOMotorClient:
+    """
+    Create the MongoDB client (no-op if one already exists).
+
+    Args:
+        mongo_client: Use this client instead of creating one from settings (e.g. a benchmark stand-in).
+    """
+    global client
+    if client is None:
+        public_read_preference()  # Fail at start-up rather than on the first public read
+        client = mongo_client or motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL, **_client_options())
+    return client
+
+
+def close_mongo_connection() -> None:
+    """Close the MongoDB client and its connection pool."""
+    global client
+    if client is not None:
+        client.close()
+        client = None
+
+
+def get_client() -> motor.motor_asyncio.AsyncIOMotorClient:
+    if client is None:
+        raise RuntimeError("MongoDB client is not connected. Call connect_to_mongo() first (the app lifespan does this).")
+    return client
+
+
+class _DatabaseProxy:
+    """Resolves to the configured database of the current client on each use."""
+
+    def __getattr__(self, attribute):
+        return getattr(get_client()[settings.MONGODB_DB_NAME], attribute)
+
+    def __getitem__(self, name: str):
+        return get_client()[settings.MONGODB_DB_NAME][name]
+
+
+class _CollectionProxy:
+    """
+    Resolves to a collection of the current client, re-resolving only when the client changes.
+
+    Args:
+        name: Collection name
+        options: Returns the `with_options()` arguments (read preference, write concern) to apply
+    """
+
+    __slots__ = ("name", "_options", "_client", "_collection")
+
+    def __init__(self, name: str, options: Optional[Callable[[], Dict]] = None):
+        self.name = name
+        self._options = options
+        self._client = None
+        self._collection = None
+
+    def _resolve(self):
+        current_client = get_client()
+        if self._client is not current_client:
+            collection = current_client[settings.MONGODB_DB_NAME][self.name]
+            options = self._options() if self._options else {}
+            self._collection = collection.with_options(**options) if options else collection
+            self._client = current_client
+        return self._collection
+
+    def __getattr__(self, attribute):
+        return getattr(self._resolve(), attribute)
+
 
-# Create MongoDB client
-client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URL)
-database = client[settings.MONGODB_DB_NAME]
+database = _DatabaseProxy()
 
-# Collections
-collection_user = database["User"]
-collection_blog = database["Blogs"]
-collection_comment = database["Comments"]
-collection_reply = database["Replies"]
-collection_like = database["Likes"]
+# Collections (primary; writes and read-after-write)
+collection_user = _CollectionProxy("User")
+collection_blog = _CollectionProxy("Blogs", _content_options)
+collection_discussion = _CollectionProxy("Discussions", _content_options)  # Comments and replies, told apart by `kind`
+# Engagement writes
+collection_like = _CollectionProxy("Likes", _engagement_options)
+collection_blog_counters = _CollectionProxy("Blogs", _engagement_options)
+# Public reads
+collection_blog_public = _CollectionProxy("Blogs", _public_read_options)
+collection_discussion_public = _CollectionProxy("Discussions", _public_read_options)
+collection_user_public = _CollectionProxy("User", _public_read_options)  # Author profiles mirrored from Keycloak
+collection_blog_viewers = _CollectionProxy("BlogViewerSketches", _engagement_options)  # HyperLogLog sketches of unique viewers
+collection_blog_stats = _CollectionProxy("BlogStats", _engagement_options)  # Daily engagement buckets with hourly counters
+# Legacy comment and reply collections, only read by the Discussions migration (app.services.discussions)
+collection_comment = _CollectionProxy("Comments")
+collection_reply = _CollectionProxy("Replies")
 
 # Database dependency
 async def get_database() -> AsyncGenerator[motor.motor_asyncio.AsyncIOMotorDatabase, None]:
     """
     Get database dependency.
+    The client is owned by the application lifespan, so it is not closed here.
     Yields:
         AsyncIOMotorDatabase: MongoDB database instance
     """
-    try:
-        yield database
-    finally:
-        client.close() 
\ No newline at end of file
+    yield get_client()[settings.MONGODB_DB_NAME]
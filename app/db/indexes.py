@@ -0,0 +1,48 @@
+"""
+Secondary indexes used by the service queries.
+
+`ensure_indexes()` runs on every worker start-up (see `app.services.warmup`). Creating an
+index that already exists with the same definition is a no-op on the server, so this is
+safe to call repeatedly.
+"""
+
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.db.database import collection_blog, collection_blog_stats, collection_discussion, collection_like, collection_user
+
+INDEXES = {
+    collection_blog: [
+        IndexModel([("postedAt", DESCENDING)], name="postedAt_desc"),  # Recent blogs (list, warm-up)
+        IndexModel([("tags", ASCENDING)], name="tags"),  # /public/blogsByTags
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    collection_discussion: [
+        # Comment tree of a blog, and subtrees by path prefix (reply trees, cascading deletes)
+        IndexModel([("blogPost_id", ASCENDING), ("path", ASCENDING)], name="blogPost_id_path"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),  # Author snapshot refresh
+    ],
+    collection_blog_stats: [
+        IndexModel([("blog_id", ASCENDING), ("day", ASCENDING)], name="blog_id_day"),  # /blog/{id}/stats ranges
+    ],
+    collection_user: [
+        IndexModel([("synced_at", ASCENDING)], name="synced_at"),  # Users not seen by the last directory sync
+    ],
+    collection_like: [
+        IndexModel([("blog_id", ASCENDING), ("user_id", ASCENDING)], name="blog_id_user_id"),  # Like status lookups
+    ],
+}
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """
+    Create the service indexes if they do not exist.
+
+    Returns:
+        dict: Index names per collection
+    """
+    created = {}
+    for collection, indexes in INDEXES.items():
+        created[collection.name] = await collection.create_indexes(indexes)
+    return created
@@ -0,0 +1,238 @@
+"""
+pymongo command monitoring.
+
+Listeners registered on the Motor client in `app.db.database`. pymongo invokes them
+synchronously on the thread running the command, so they must stay cheap.
+"""
+
+import abc
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+from pymongo import monitoring
+from app.core.metrics import (
+    MONGO_COMMAND_DURATION, MONGO_COMMAND_FAILURES,
+    MONGO_POOL_CHECKOUT_WAIT, MONGO_POOL_CHECKOUT_FAILURES, MONGO_POOL_CONNECTIONS_IN_USE,
+)
+from app.core.timing import record_db_time
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# Part of each command document that describes *what* was queried, used for the slow-query log
+_COMMAND_SHAPE_KEYS = {
+    "find": ("filter", "sort", "projection"),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "aggregate": ("pipeline",),
+    "update": ("updates",),
+    "delete": ("deletes",),
+    "findAndModify": ("query", "sort"),
+}
+
+
+def command_collection(command_name: str, command) -> str:
+    """Best-effort collection name for a command document (empty for database-level commands)."""
+    if command_name == "getMore":
+        target = command.get("collection")
+    else:
+        target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+def redact(value: Any) -> Any:
+    """Replace every literal value with "?" while keeping field names and operators,
+    so slow commands can be logged without leaking user content."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command) -> Dict[str, Any]:
+    """Redacted filter/pipeline of a command document."""
+    shape = {}
+    for key in _COMMAND_SHAPE_KEYS.get(command_name, ()):
+        if key not in command:
+            continue
+        if key in ("updates", "deletes"):
+            # Only the per-statement filter matters, not the update document itself
+            shape[key] = [redact(statement.get("q", {})) for statement in command[key]]
+        elif key in ("sort", "projection", "key"):
+            shape[key] = command[key]
+        else:
+            shape[key] = redact(command[key])
+    return shape
+
+
+class _TrackedCommandListener(monitoring.CommandListener, abc.ABC):
+    """Pairs started/completed events and hands the completed command to `_completed`."""
+
+    def __init__(self):
+        # (connection_id, request_id) -> (command_name, collection, command), popped on completion
+        self._in_flight: Dict[Tuple, Tuple[str, str, Any]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        key = (event.connection_id, event.request_id)
+        self._in_flight[key] = (event.command_name, command_collection(event.command_name, event.command), event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        info = self._in_flight.pop((event.connection_id, event.request_id), (event.command_name, "", None))
+        self._completed(*info, event.duration_micros / 1_000_000, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        info = self._in_flight.pop((event.connection_id, event.request_id), (event.command_name, "", None))
+        self._completed(*info, event.duration_micros / 1_000_000, failed=True)
+
+    @abc.abstractmethod
+    def _completed(self, command_name: str, collection: str, command: Optional[Any], duration: float, failed: bool) -> None:
+        """Handle one finished command (`command` is None if its start was not seen)."""
+
+
+class CommandMetricsListener(_TrackedCommandListener):
+    """Records the duration of every MongoDB command on the Prometheus histogram."""
+
+    def _completed(self, command_name, collection, command, duration, failed):
+        MONGO_COMMAND_DURATION.labels(command_name, collection).observe(duration)
+        if failed:
+            MONGO_COMMAND_FAILURES.labels(command_name, collection).inc()
+
+
+class CommandStatsListener(_TrackedCommandListener):
+    """
+    Keeps per-collection/per-command aggregates and logs commands slower than a threshold.
+
+    Args:
+        slow_threshold_ms: Commands taking at least this long are logged with a redacted filter.
+            A negative value disables the slow-query log.
+    """
+
+    def __init__(self, slow_threshold_ms: float):
+        super().__init__()
+        self.slow_threshold_s = slow_threshold_ms / 1000 if slow_threshold_ms >= 0 else None
+        self._lock = threading.Lock()
+        # (collection, command_name) -> aggregate counters
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def _completed(self, command_name, collection, command, duration, failed):
+        is_slow = self.slow_threshold_s is not None and duration >= self.slow_threshold_s
+        with self._lock:
+            stats = self._stats.get((collection, command_name))
+            if stats is None:
+                stats = self._stats[(collection, command_name)] = {
+                    "count": 0, "failures": 0, "slow": 0, "total_ms": 0.0, "max_ms": 0.0,
+                }
+            duration_ms = duration * 1000
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            if duration_ms > stats["max_ms"]:
+                stats["max_ms"] = duration_ms
+            if failed:
+                stats["failures"] += 1
+            if is_slow:
+                stats["slow"] += 1
+
+        if is_slow:
+            slow_query_logger.warning(
+                "Slow MongoDB command: %s on %s took %.1fms%s shape=%s",
+                command_name,
+                collection or "<db>",
+                duration * 1000,
+                " (failed)" if failed else "",
+                command_shape(command_name, command) if command is not None else {},
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Aggregates grouped as {collection: {command: stats}}, with the mean latency filled in."""
+        with self._lock:
+            items = [(key, dict(stats)) for key, stats in self._stats.items()]
+
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (collection, command_name), stats in sorted(items):
+            stats["avg_ms"] = round(stats["total_ms"] / stats["count"], 3) if stats["count"] else 0.0
+            stats["total_ms"] = round(stats["total_ms"], 3)
+            stats["max_ms"] = round(stats["max_ms"], 3)
+            result.setdefault(collection or "<db>", {})[command_name] = stats
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class RequestTimingListener(monitoring.CommandListener):
+    """Adds each command's duration to the timings of the request that issued it (Server-Timing)."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        record_db_time(event.duration_micros / 1_000_000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        record_db_time(event.duration_micros / 1_000_000)
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Records how long commands wait for a pooled connection. Sustained non-zero waits mean
+    `MONGODB_MAX_POOL_SIZE` is too small for the request concurrency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"checkouts": 0, "failures": 0, "in_use": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        MONGO_POOL_CHECKOUT_WAIT.observe(event.duration)
+        MONGO_POOL_CONNECTIONS_IN_USE.inc()
+        wait_ms = event.duration * 1000
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["total_wait_ms"] += wait_ms
+            if wait_ms > self._stats["max_wait_ms"]:
+                self._stats["max_wait_ms"] = wait_ms
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        MONGO_POOL_CONNECTIONS_IN_USE.dec()
+        with self._lock:
+            self._stats["in_use"] -= 1
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+        with self._lock:
+            self._stats["failures"] += 1
+
+    # The remaining pool events are not needed (pymongo requires every handler to be defined)
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_wait_ms"] = round(stats["total_wait_ms"] / stats["checkouts"], 3) if stats["checkouts"] else 0.0
+        stats["total_wait_ms"] = round(stats["total_wait_ms"], 3)
+        stats["max_wait_ms"] = round(stats["max_wait_ms"], 3)
+        return stats
@@ -1,17 +1,67 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.service_tracker import initialize_service_start_time
+from app.core.tasks import drain_task_queues, start_task_queues
+from app.db.database import connect_to_mongo, close_mongo_connection
+from app.services.invalidation import cache_invalidator
+from app.services.keycloak import close_http_client
+from app.services.engagement import engagement
+from app.services.readiness import readiness
+from app.services.user_directory import user_directory_sync
+from app.services.viewers import unique_viewers
+from app.services.warmup import warm_up
+from app.middleware import AdmissionControlMiddleware, CompressionMiddleware, LatencyBudgetMiddleware, MetricsMiddleware, ProfilingMiddleware, PublicResponseCacheMiddleware, ServerTimingMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The MongoDB client (and its connection pool) lives exactly as long as the application
+    connect_to_mongo()
+    try:
+        # Startup completes (and the worker accepts requests) only after the warm-up
+        if settings.WARMUP_ENABLED:
+            report = await warm_up()
+            print(f"Warm-up finished: {report}")
+        start_task_queues()
+        await unique_viewers.start()
+        await engagement.start()
+        await user_directory_sync.start()
+        await readiness.start()
+        if settings.PUBLIC_CACHE_ENABLED and settings.CHANGE_STREAM_INVALIDATION_ENABLED:
+            await cache_invalidator.start()
+        yield
+    finally:
+        await readiness.stop()
+        # Requests have finished by now; let their deferred side effects complete while MongoDB is still connected
+        await drain_task_queues()
+        await unique_viewers.stop()
+        await engagement.stop()
+        await user_directory_sync.stop()
+        await cache_invalidator.stop()
+        await close_http_client()
+        close_mongo_connection()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}{settings.SERVICE_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}{settings.SERVICE_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Initialize service start time tracking
 initialize_service_start_time()
 
+# Shed load (503 + Retry-After) once a route class's concurrency limit and queue are full.
+# Added before CORS so that rejections still carry the CORS headers.
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Serve public lists and comment trees from a per-worker cache of rendered (and precompressed) responses.
+# Added after admission control so that cache hits are never shed.
+if settings.PUBLIC_CACHE_ENABLED:
+    app.add_middleware(PublicResponseCacheMiddleware, compression=settings.COMPRESSION_ENABLED)
+
 # Set up CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -19,7 +69,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Enrichment", "Retry-After"],
 )
 
+# Record per-route latency, in-flight requests and status codes
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Per-request MongoDB/Keycloak/serialisation breakdown as a Server-Timing header and access-log line
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Deadline for optional author enrichment; responses that hit it carry X-Enrichment: partial
+if settings.ENRICHMENT_BUDGET_MS > 0:
+    app.add_middleware(LatencyBudgetMiddleware, budget_ms=settings.ENRICHMENT_BUDGET_MS)
+
+# Profile individual requests on demand (header or sampling), only while debug endpoints are enabled
+app.add_middleware(ProfilingMiddleware)
+
+# gzip/Brotli compression of JSON responses, outermost so that every other middleware sees the identity body
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR) 
\ No newline at end of file
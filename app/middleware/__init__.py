@@ -0,0 +1,13 @@
+"""
+ASGI middleware for the blog service.
+"""
+
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.latency_budget import LatencyBudgetMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.response_cache import PublicResponseCacheMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware, TimedRoute
+
+__all__ = ["AdmissionControlMiddleware", "CompressionMiddleware", "LatencyBudgetMiddleware", "MetricsMiddleware", "ProfilingMiddleware", "PublicResponseCacheMiddleware", "ServerTimingMiddleware", "TimedRoute"]
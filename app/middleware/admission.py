@@ -0,0 +1,104 @@
+"""
+Admission control and load shedding.
+
+Requests are split into route classes, each with its own concurrency limit and bounded
+wait queue (ADMISSION_* settings):
+
+- read: GET/HEAD requests (public reads, like status)
+- write: POST/PUT/PATCH/DELETE requests
+- debug: /debug/* and /health, which are expensive and only for humans
+
+When a class is at its limit, new requests wait in FIFO order. When the queue is full, or a
+request has waited ADMISSION_QUEUE_TIMEOUT_SECONDS, the request is shed with 503 and a
+`Retry-After` header rather than piling more work onto MongoDB. Writes are also limited
+per `X-User-ID` by a token bucket (429 with `Retry-After`).
+
+The probes (/live, /ready, /ping) and /metrics are never limited.
+"""
+
+import json
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.admission import ConcurrencyLimiter, TokenBucketLimiter, retry_after_header
+from app.core.config import settings
+from app.core.metrics import ADMISSION_QUEUED, ADMISSION_REJECTED
+
+UNLIMITED_PATHS = {"/live", "/ready", "/ping", "/metrics"}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Route class of a request path below the service prefix, or None when it is never limited."""
+    if path in UNLIMITED_PATHS or method == "OPTIONS":
+        return None
+    if path.startswith("/debug/") or path == "/health":
+        return "debug"
+    if method in WRITE_METHODS:
+        return "write"
+    return "read"
+
+
+async def _reject(send: Send, status_code: int, detail: str, retry_after: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry_after.encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.prefix = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+        timeout = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        self.limiters: Dict[str, ConcurrencyLimiter] = {
+            "read": ConcurrencyLimiter("read", settings.ADMISSION_READ_CONCURRENCY, settings.ADMISSION_READ_QUEUE, timeout),
+            "write": ConcurrencyLimiter("write", settings.ADMISSION_WRITE_CONCURRENCY, settings.ADMISSION_WRITE_QUEUE, timeout),
+            "debug": ConcurrencyLimiter("debug", settings.ADMISSION_DEBUG_CONCURRENCY, settings.ADMISSION_DEBUG_QUEUE, timeout),
+        }
+        self.write_buckets = TokenBucketLimiter(settings.ADMISSION_WRITE_RATE_PER_USER, settings.ADMISSION_WRITE_BURST_PER_USER)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope["path"]
+        if scope["type"] != "http" or not path.startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        request_class = route_class(scope["method"], path[len(self.prefix):])
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if request_class == "write":
+            user_id = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"x-user-id"), None)
+            if user_id:
+                wait_seconds = self.write_buckets.take(user_id)
+                if wait_seconds is not None:
+                    ADMISSION_REJECTED.labels(request_class, "rate_limited").inc()
+                    await _reject(send, 429, "Too many write requests for this user, retry later", retry_after_header(wait_seconds))
+                    return
+
+        limiter = self.limiters[request_class]
+        queued = ADMISSION_QUEUED.labels(request_class)
+        queued.inc()
+        try:
+            admitted = await limiter.acquire()
+        finally:
+            queued.dec()
+        if not admitted:
+            ADMISSION_REJECTED.labels(request_class, "overloaded").inc()
+            await _reject(send, 503, "Service overloaded, retry later", retry_after_header(settings.ADMISSION_RETRY_AFTER_SECONDS))
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,78 @@
+"""
+Response compression middleware.
+
+Compresses JSON and text responses with Brotli or gzip, as negotiated through
+`Accept-Encoding`, once they are at least COMPRESSION_MIN_SIZE bytes. Responses that
+already carry a `Content-Encoding` (e.g. precompressed entries from the public response
+cache) are passed through untouched. Streamed responses are compressed incrementally.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import StreamCompressor, compress, is_compressible, negotiate_encoding
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Message = {}
+        compressor = None
+        mode = None  # "passthrough" or "stream" once the first body chunk has been seen
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, mode
+            if message["type"] == "http.response.start":
+                start_message = message  # Held back until we know whether the body gets compressed
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if mode == "passthrough":
+                await send(message)
+                return
+            if mode == "stream":
+                chunk = compressor.compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            compressible = is_compressible(headers.get("content-type", "")) and "content-encoding" not in headers
+            if compressible and "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or encoding is None or (not more_body and len(body) < self.minimum_size):
+                mode = "passthrough"
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["content-encoding"] = encoding
+            if not more_body:
+                mode = "passthrough"
+                compressed = compress(body, encoding)
+                headers["content-length"] = str(len(compressed))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            mode = "stream"
+            compressor = StreamCompressor(encoding)
+            if "content-length" in headers:
+                del headers["content-length"]
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
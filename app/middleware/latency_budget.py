@@ -0,0 +1,37 @@
+"""
+Latency budget middleware.
+
+Starts a `RequestBudget` (see `app.core.budget`) for every HTTP request. If optional
+enrichment was skipped or cut short because the budget ran out, the response carries
+`X-Enrichment: partial; skipped=<n>` so clients and logs can tell placeholder author data
+from real data.
+"""
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.budget import start_request_budget, stop_request_budget
+
+
+class LatencyBudgetMiddleware:
+    def __init__(self, app: ASGIApp, budget_ms: float):
+        self.app = app
+        self.budget_seconds = budget_ms / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget, token = start_request_budget(self.budget_seconds)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and budget.partial:
+                headers = MutableHeaders(scope=message)
+                headers.append("x-enrichment", f"partial; skipped={budget.skipped}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_request_budget(token)
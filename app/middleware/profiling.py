@@ -0,0 +1,68 @@
+"""
+On-demand request profiling.
+
+When debug endpoints are enabled, a request carrying the `PROFILING_HEADER` header
+(or picked by `PROFILING_SAMPLE_RATE`) runs under pyinstrument's sampling profiler.
+The report is stored in the ring buffer of `app.services.profiling` and its id is returned
+in the `X-Profile-Id` response header.
+
+pyinstrument is optional: without it the middleware passes every request through.
+"""
+
+import asyncio
+import random
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.services.profiling import new_profile_id, save_profile_report
+from app.services.status import is_debug_endpoint_enabled
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+
+
+def _render_report(profiler) -> str:
+    if settings.PROFILING_FORMAT == "speedscope":
+        return profiler.output(renderer=SpeedscopeRenderer())
+    if settings.PROFILING_FORMAT == "text":
+        return profiler.output_text(unicode=True, show_all=False)
+    return profiler.output_html()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode("latin-1")
+
+    def _should_profile(self, scope: Scope) -> bool:
+        requested = any(name == self.header for name, _ in scope["headers"])
+        sampled = settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+        return (requested or sampled) and is_debug_endpoint_enabled()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or Profiler is None or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id(scope["method"], scope["path"])
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            try:
+                # Rendering and writing can take tens of milliseconds; keep it off the event loop
+                await asyncio.to_thread(lambda: save_profile_report(profile_id, _render_report(profiler)))
+            except Exception as e:
+                print(f"\nError saving profile report {profile_id}:\n{e}\n")
@@ -0,0 +1,127 @@
+"""
+Public response cache middleware.
+
+Serves GET /public/blogs, /public/blogsByTags and /public/blog/{id}/comments from
+`app.core.response_cache`, in the content coding negotiated through `Accept-Encoding`.
+Misses are rendered by the application, stored when they are complete 200 responses with a
+known length, and answered from the new entry; any other response is passed through as soon
+as its start shows it will not be cached. Blog detail is not cached because every read
+counts a view. Responses carry `X-Cache: hit` or `X-Cache: miss`.
+
+Hits never reach the router, so the matched route is put in the scope here, for the
+per-route metrics and access log.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.budget import get_request_budget
+from app.core.compression import negotiate_encoding
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, public_responses
+
+COMMENTS_PATH = re.compile(r"^/public/blog/([^/]+)/comments$")
+COMMENTS_ROUTE = "/public/blog/{id}/comments"
+
+
+def cached_route(path: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Route template and invalidation tags of a path below the service prefix, or None when it is not cached."""
+    if path in ("/public/blogs", "/public/blogsByTags"):
+        return path, ("blogs",)
+    match = COMMENTS_PATH.match(path)
+    if match:
+        return COMMENTS_ROUTE, ("comments", f"blog:{match.group(1)}")
+    return None
+
+
+def _cacheable_start(message: Message) -> bool:
+    """Whether a response, judged by its start message, may be stored."""
+    if message["status"] != 200:
+        return False
+    budget = get_request_budget()
+    if budget is not None and budget.partial:
+        return False  # Placeholder author data
+    return any(name.lower() == b"content-length" for name, _ in message.get("headers", []))
+
+
+class PublicResponseCacheMiddleware:
+    def __init__(self, app: ASGIApp, compression: bool = True):
+        self.app = app
+        self.compression = compression
+        self.prefix = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+        self._routes: Dict[str, Any] = {}  # Full route template -> application route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope["path"]
+        if scope["type"] != "http" or scope["method"] != "GET" or not path.startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        matched = cached_route(path[len(self.prefix):])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        template, tags = matched
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", "")) if self.compression else None
+        key = (path, scope["query_string"])
+        cached = public_responses.get(key)
+        if cached is not None:
+            route = self._route(scope, template)
+            if route is not None:
+                scope["route"] = route
+            await self._send_cached(send, cached, encoding, b"hit")
+            return
+
+        generation = public_responses.generation
+        messages: List[Message] = []
+        passthrough = False
+
+        async def buffer(message: Message) -> None:
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                # Errors and responses that cannot be stored go out as rendered, without buffering
+                passthrough = not _cacheable_start(message)
+            if passthrough:
+                await send(message)
+            else:
+                messages.append(message)
+
+        await self.app(scope, receive, buffer)
+        if passthrough:
+            return
+
+        start = next((message for message in messages if message["type"] == "http.response.start"), None)
+        bodies = [message for message in messages if message["type"] == "http.response.body"]
+        budget = get_request_budget()
+        complete = bodies and not bodies[-1].get("more_body", False)
+        if start is None or not complete or (budget is not None and budget.partial):
+            for message in messages:
+                await send(message)
+            return
+
+        response = CachedResponse(200, list(start.get("headers", [])), b"".join(message.get("body", b"") for message in bodies), tags)
+        public_responses.set(key, response, generation)
+        await self._send_cached(send, response, encoding, b"miss")
+
+    def _route(self, scope: Scope, template: str):
+        """The application route serving `template` (looked up once), for a hit that skips routing."""
+        full_template = self.prefix + template
+        if full_template not in self._routes:
+            routes = getattr(scope.get("app"), "routes", [])
+            self._routes[full_template] = next((route for route in routes if getattr(route, "path", None) == full_template), None)
+        return self._routes[full_template]
+
+    async def _send_cached(self, send: Send, response: CachedResponse, encoding: Optional[str], cache_status: bytes) -> None:
+        body, applied = response.body_for(encoding)
+        headers = list(response.headers)
+        headers.append((b"content-length", str(len(body)).encode()))
+        if applied is not None:
+            headers.append((b"content-encoding", applied.encode()))
+        if self.compression:
+            headers.append((b"vary", b"Accept-Encoding"))
+        headers.append((b"x-cache", cache_status))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
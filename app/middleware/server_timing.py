@@ -0,0 +1,98 @@
+"""
+Server-Timing middleware.
+
+Adds a `Server-Timing` header splitting each request into MongoDB, Keycloak and
+serialisation time, and writes the same breakdown as a JSON access-log line.
+Enabled with `SERVER_TIMING_ENABLED`.
+"""
+
+import functools
+import json
+import logging
+import sys
+import time
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.timing import RequestTimings, mark_endpoint_done, start_request_timings, stop_request_timings
+from app.middleware.metrics import route_template
+
+access_logger = logging.getLogger("app.access")
+if not access_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    access_logger.addHandler(_handler)
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records when the endpoint function returns.
+
+    Everything between that moment and the start of the response (response_model
+    validation, `jsonable_encoder`, JSON rendering) is reported as serialisation time.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **endpoint_kwargs):
+            try:
+                return await endpoint(*args, **endpoint_kwargs)
+            finally:
+                mark_endpoint_done()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+
+def _server_timing_header(timings: RequestTimings, serialize_seconds: float, total_seconds: float) -> str:
+    return ", ".join([
+        f'db;dur={timings.db_seconds * 1000:.2f};desc="MongoDB ({timings.db_calls} calls)"',
+        f'keycloak;dur={timings.keycloak_seconds * 1000:.2f};desc="Keycloak ({timings.keycloak_calls} calls)"',
+        f"serialize;dur={serialize_seconds * 1000:.2f}",
+        f"total;dur={total_seconds * 1000:.2f}",
+    ])
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_request_timings()
+        status_code = 500
+        serialize_seconds = 0.0
+        total_seconds = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, serialize_seconds, total_seconds
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status_code = message["status"]
+                total_seconds = now - timings.start
+                if timings.endpoint_done is not None:
+                    serialize_seconds = now - timings.endpoint_done
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing_header(timings, serialize_seconds, total_seconds).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_request_timings(token)
+            access_logger.info(json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_template(scope),
+                "status": status_code,
+                "total_ms": round(total_seconds * 1000, 2),
+                "db_ms": round(timings.db_seconds * 1000, 2),
+                "db_calls": timings.db_calls,
+                "keycloak_ms": round(timings.keycloak_seconds * 1000, 2),
+                "keycloak_calls": timings.keycloak_calls,
+                "serialize_ms": round(serialize_seconds * 1000, 2),
+            }))
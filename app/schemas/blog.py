@@ -10,11 +10,13 @@ class BlogPostBase(BaseModel):
     tags: List[str]
     number_of_views: int
     likes_count: int = 0
+    comments_count: int = 0
     title: str
     content: str
     postedAt: datetime
     post_image: Optional[str] = None
     user_id: Optional[str] = None
+    unique_viewers: int = 0  # Approximate (HyperLogLog, ~1.6% standard error), updated periodically
 
 class CommentBase(BaseModel):
     comment_id: str = Field(alias="_id", serialization_alias="comment_id")  # No default_factory, expects existing ID
@@ -26,6 +28,7 @@ class CommentBase(BaseModel):
     blogPost_id: str
     text: str
     commentedAt: datetime
+    replies_count: int = 0
     replies: List['ReplyBase'] = []
 
 class ReplyBase(BaseModel):
@@ -38,8 +41,17 @@ class ReplyBase(BaseModel):
     user_last_name: Optional[str] = None
     text: str
     repliedAt: datetime
+    replies_count: int = 0
     replies: List['ReplyBase'] = []
 
+# Author profile stored on blogs, comments and replies at write time (see app.services.user_directory)
+class AuthorSnapshot(BaseModel):
+    username: str = ""
+    firstName: str = ""
+    lastName: str = ""
+    profilePicUrl: str = ""
+    version: str  # Hash of the profile fields; the refresher rewrites snapshots whose version differs
+
 # Request schemas with auto-generated IDs (for creating new records)
 class BlogPost(BaseModel): 
     blogPost_id: str = Field(default_factory=lambda: str(uuid4()), alias="_id")
@@ -47,11 +59,14 @@ class BlogPost(BaseModel):
     tags: List[str]
     number_of_views: int
     likes_count: int = 0
+    comments_count: int = 0
     title: str
     content: str
+    content_preview: Optional[str] = None  # Stored for the list views, which do not load `content`
     postedAt: datetime = Field(default_factory=datetime.utcnow)
     post_image: Optional[str] = None
     user_id: Optional[str] = None
+    author: Optional[AuthorSnapshot] = None
 
 # Input model for creating blogs (without ID - backend generates it)
 class BlogPostCreate(BaseModel):
@@ -69,20 +84,30 @@ class BlogPostUpdate(BaseModel):
     content: str
     post_image: Optional[str] = None
 
+# Comments and replies are stored together in the Discussions collection (see app.services.blog)
 class Comment(BaseModel):
     comment_id: str = Field(default_factory=lambda: str(uuid4()), alias="_id")
+    kind: str = "comment"
+    path: str = ""  # Ancestor ids, each followed by "/"; empty for comments
     user_id: Optional[str] = None
+    author: Optional[AuthorSnapshot] = None
     blogPost_id: str
     text: str
     commentedAt: datetime = Field(default_factory=datetime.utcnow)
+    replies_count: int = 0
     replies: List['Reply'] = []
 
 class Reply(BaseModel):
     reply_id: str = Field(default_factory=lambda: str(uuid4()), alias="_id")
     parentContent_id: str #UUID to str ,either a comment_id or reply_id (when someone reply to an existing reply)
+    kind: str = "reply"
+    blogPost_id: Optional[str] = None  # Blog at the root of the discussion
+    path: str = ""  # Ancestor ids from the comment down to the parent, each followed by "/"
     user_id: Optional[str] = None
+    author: Optional[AuthorSnapshot] = None
     text: str
     repliedAt: datetime = Field(default_factory=datetime.utcnow)
+    replies_count: int = 0
     replies: List['Reply'] = []
 
 # Input model for creating comments (without ID - backend generates it)
@@ -124,6 +149,7 @@ class AllBlogsBlogPost(BaseModel):
     tags: List[str]
     number_of_views: int
     likes_count: int = 0
+    comments_count: int = 0
     title: str
     content_preview: str
     postedAt: datetime
@@ -147,6 +173,24 @@ class LikeStatusResponse(BaseModel):
     like_id: Optional[str] = None
     liked_at: Optional[datetime] = None
 
+# Engagement analytics (GET /blog/{blog_id}/stats)
+class EngagementCounts(BaseModel):
+    views: int = 0
+    likes: int = 0
+    unlikes: int = 0
+    comments: int = 0  # Comments and replies
+
+class EngagementBucket(EngagementCounts):
+    start: datetime  # Start of the hour or day (UTC)
+
+class BlogStatsResponse(BaseModel):
+    blog_id: str
+    granularity: str  # "hour" or "day"
+    start: datetime
+    end: datetime  # Start of the last bucket
+    totals: EngagementCounts
+    series: List[EngagementBucket]
+
 # NOTE: alias is input for serialization, serialization_alias is output for serialization.
 
 class KeycloakUser(BaseModel):
@@ -188,8 +232,17 @@ class DatabaseMetrics(BaseModel):
 class DatabaseHealth(ServiceHealth):
     metrics: Optional[DatabaseMetrics] = None
 
+class CircuitBreakerStatus(BaseModel):
+    state: str  # "closed", "open" or "half_open"
+    failure_rate: float
+    slow_call_rate: float
+    calls_in_window: int
+    rejected_calls: int
+    retry_in_seconds: Optional[float] = None
+
 class KeycloakHealth(ServiceHealth):
     authenticated: bool
+    circuit_breaker: Optional[CircuitBreakerStatus] = None
 
 class HealthCheckResponse(BaseModel):
     service: str = "blog-service"
@@ -30,7 +30,15 @@ HEALTH_CHECK_RESPONSES: Dict[int | str, Dict[str, Any]] = {
                                 "status": "healthy",
                                 "response_time_ms": 150.25,
                                 "service": "keycloak",
-                                "authenticated": True
+                                "authenticated": True,
+                                "circuit_breaker": {
+                                    "state": "closed",
+                                    "failure_rate": 0.0,
+                                    "slow_call_rate": 0.0,
+                                    "calls_in_window": 20,
+                                    "rejected_calls": 0,
+                                    "retry_in_seconds": None
+                                }
                             },
                             "database": {
                                 "status": "healthy", 
@@ -215,6 +223,13 @@ LIKE_RESPONSES: Dict[int | str, Dict[str, Any]] = {
     500: {"description": "Internal server error"}
 }
 
+BLOG_STATS_RESPONSES: Dict[int | str, Dict[str, Any]] = {
+    200: {"description": "Successfully retrieved engagement statistics"},
+    400: {"description": "Invalid time range"},
+    404: {"description": "Blog not found"},
+    500: {"description": "Internal server error"}
+}
+
 LIKE_STATUS_RESPONSES: Dict[int | str, Dict[str, Any]] = {
     200: {"description": "Successfully retrieved like status"},
     404: {"description": "Blog not found"},
@@ -0,0 +1,77 @@
+"""
+Production server entrypoint.
+
+    python -m app.server
+
+Runs uvicorn with SERVER_WORKERS (or WEB_CONCURRENCY) worker processes, one by default
+and one per available CPU core with 0, using uvloop and httptools when they are installed.
+Each worker runs the application lifespan, including the warm-up, before it accepts
+requests.
+
+One worker is the default because metrics and diagnostics are per process: `/metrics`
+(the prometheus_client registry, cache and circuit-breaker collectors) and
+`/debug/mongo-stats` report only the worker that answered, so with several workers
+counters jump between scrapes. Scale out with more containers instead, or accept that
+limitation when setting more workers.
+"""
+
+import importlib.util
+import os
+from typing import Optional
+
+import uvicorn
+
+from app.core.config import settings
+
+
+def _cgroup_cpu_limit() -> Optional[int]:
+    """CPU limit of the container (cgroup v2 `cpu.max`), if one is set."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as cpu_max:
+            quota, period = cpu_max.read().split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, int(int(quota) // int(period)))
+
+
+def available_cpus() -> int:
+    """Cores this process may actually use: affinity mask, capped by the container CPU limit."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count() -> int:
+    workers = settings.SERVER_WORKERS
+    if workers is None:
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # The service is I/O bound on a single event loop per process, so at most one worker per core
+    return workers if workers > 0 else available_cpus()
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main() -> None:
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    workers = worker_count()
+    print(f"Starting {workers} worker(s) on {settings.SERVER_HOST}:{settings.SERVER_PORT} (loop={loop}, http={http})")
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
 import json
+import re
 from fastapi import HTTPException
 from bson import json_util
-from app.db.database import collection_blog, collection_comment, collection_reply, collection_like, database
-from app.schemas.blog import BlogPost, Comment, Reply, BlogPostWithUserData, AllBlogsBlogPost, CommentBase, ReplyBase, Like, BlogPostCreate, BlogPostUpdate, CommentCreate, ReplyCreate
-from app.services.keycloak import get_user_by_id_safely
+from pymongo import ReturnDocument
+from app.db.database import collection_blog, collection_discussion, collection_like, database
+from app.db.database import collection_blog_counters, collection_blog_public, collection_discussion_public
+from app.schemas.blog import BlogPost, Comment, Reply, BlogPostWithUserData, AllBlogsBlogPost, CommentBase, ReplyBase, Like, BlogPostCreate, BlogPostUpdate, CommentCreate, ReplyCreate, KeycloakUser
+from app.services.user_directory import author_profiles, author_snapshot, get_author_profile, get_user_profile, get_user_profiles, snapshot_profile
+from app.services.engagement import engagement
+from app.services.viewers import unique_viewers
+from app.core.singleflight import SingleFlight
+from app.core.tasks import task_queue
+from app.core.response_cache import invalidate_public_responses
 from app.core.exceptions import *
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 CONTENT_PREVIEW_LENGTH = 150  # Length of content preview for AllBlogsBlogPost
+LIST_PROJECTION = {"content": 0}  # List views only need the stored content_preview
+
+# Coalesces identical concurrent public reads (see app.core.singleflight)
+_public_reads = SingleFlight("public_reads")
+
+# Side effects run after the response by the background task queues (see app.core.tasks)
+_view_counts = task_queue("views", max_retries=0)  # $inc is not idempotent; a lost view is acceptable, a double count is not
+_cascade_deletes = task_queue("cascade_deletes")
+
+
+def build_content_preview(content: str) -> str:
+    return content[:CONTENT_PREVIEW_LENGTH] + "..." if len(content) > CONTENT_PREVIEW_LENGTH else content
+
 
 def convert_mongo_doc_to_dict(doc):
     """Convert MongoDB document to dict compatible with Pydantic models"""
@@ -29,29 +50,56 @@ def convert_mongo_doc_to_dict(doc):
     
     return doc_dict
 
-async def get_blog_by_id(entity_id: str) -> BlogPostWithUserData: #data type changed from int to str
-    try:
-        entity = await collection_blog.find_one({"_id": entity_id}) #blogPost_id to _id , becaue in models.py ,"blogPost_id" changed to "_id" by  " alias="_id" "
+async def adjust_counter(collection, doc_id: str, field: str, delta: int):
+    """Atomically add `delta` to a denormalised counter, never letting it drop below 0.
+    Documents created before the counter existed start from 0 (the reconcile job fixes any drift)."""
+    return await collection.update_one(
+        {"_id": doc_id},
+        [
+            {
+                "$set": {
+                    field: {"$max": [{"$add": [{"$ifNull": [f"${field}", 0]}, delta]}, 0]}
+                }
+            }
+        ]
+    )
+
+async def _load_blog_with_user_data(entity_id: str) -> BlogPostWithUserData:
+    entity = await collection_blog_public.find_one({"_id": entity_id}) #blogPost_id to _id , becaue in models.py ,"blogPost_id" changed to "_id" by  " alias="_id" "
+
+    # Convert MongoDB document to BlogPostWithUserData
+    blog_data = convert_mongo_doc_to_dict(entity)
+    if not blog_data:
+        raise BlogNotFoundException(entity_id)
+
+    # Inject the author's profile (see app.services.user_directory)
+    user_data = await get_author_profile(blog_data)
+    blog_data["user_username"] = user_data.username
+    blog_data["user_image_url"] = user_data.profilePicUrl
+    blog_data["user_first_name"] = user_data.firstName
+    blog_data["user_last_name"] = user_data.lastName
+    return BlogPostWithUserData(**blog_data)
 
-        # Convert MongoDB document to BlogPostWithUserData
-        blog_data = convert_mongo_doc_to_dict(entity)
-        if not blog_data:
-            raise BlogNotFoundException(entity_id)
+
+async def _count_view(entity_id: str) -> None:
+    await collection_blog_counters.update_one(
+        {"_id": entity_id},
+        {"$inc": {"number_of_views": 1}}
+    )
+
+
+async def get_blog_by_id(entity_id: str, viewer_id: Optional[str] = None) -> BlogPostWithUserData: #data type changed from int to str
+    try:
+        # Concurrent reads of the same blog share one load, but every caller still counts as a view
+        blog = await _public_reads.do(("blog", entity_id), lambda: _load_blog_with_user_data(entity_id))
 
         # INFO: Design decision: current view is not considered for the view count. Idea is user want to know how many previous views
         # Increment the number_of_views by 1
-        await collection_blog.update_one(
-            {"_id": entity_id},
-            {"$inc": {"number_of_views": 1}}
-        )
-        
-        # Inject data from keycloak
-        user_data = await get_user_by_id_safely(blog_data["user_id"])
-        blog_data["user_username"] = user_data.username
-        blog_data["user_image_url"] = user_data.profilePicUrl
-        blog_data["user_first_name"] = user_data.firstName
-        blog_data["user_last_name"] = user_data.lastName
-        return BlogPostWithUserData(**blog_data)
+        await _view_counts.submit(_count_view, entity_id)
+        engagement.record(entity_id, "views")
+        if viewer_id:
+            unique_viewers.add(entity_id, viewer_id)
+        return blog.model_copy()
     
     except BlogAPIException:
         # Re-raise the custom exceptions (like BlogNotFoundException)
@@ -63,14 +111,19 @@ async def get_blog_by_id(entity_id: str) -> BlogPostWithUserData: #data type cha
 
 
 async def create_blog(blog_input: BlogPostCreate, user_id: str) -> BlogPostWithUserData:
+    # Inject the author's profile (see app.services.user_directory), stored with the blog as a snapshot
+    user_data = await get_user_profile(user_id)
+
     # Create a full BlogPost with auto-generated ID and default values
     blog = BlogPost(
         comment_constraint=blog_input.comment_constraint,
         tags=blog_input.tags,
         title=blog_input.title,
         content=blog_input.content,
+        content_preview=build_content_preview(blog_input.content),
         post_image=blog_input.post_image,
         user_id=user_id,
+        author=author_snapshot(user_data),
         number_of_views=0,  # Initialize to 0 for new blogs
         likes_count=0       # Initialize to 0 for new blogs
     )
@@ -78,11 +131,9 @@ async def create_blog(blog_input: BlogPostCreate, user_id: str) -> BlogPostWithU
     blog_dict = blog.dict(by_alias=True) # Backend controls the ID generation
     result = await collection_blog.insert_one(blog_dict)
     if result.inserted_id:
+        invalidate_public_responses("blogs")
         # Convert BlogPost to BlogPostWithUserData for response
         blog_data = blog.dict(by_alias=True)  # Use by_alias=True to get _id instead of blogPost_id
-
-        # Inject data from keycloak
-        user_data = await get_user_by_id_safely(blog_data["user_id"])
         blog_data["user_username"] = user_data.username
         blog_data["user_image_url"] = user_data.profilePicUrl
         blog_data["user_first_name"] = user_data.firstName
@@ -92,43 +143,41 @@ async def create_blog(blog_input: BlogPostCreate, user_id: str) -> BlogPostWithU
 
 
 async def update_blog(blog_id: str, blog_update: BlogPostUpdate, user_id: str) -> BlogPostWithUserData:
-    # First check if blog exists and user owns it
-    old_blog = await collection_blog.find_one({"_id": blog_id})
-    if not old_blog:
-        raise BlogNotFoundException(blog_id)
-
-    if old_blog["user_id"] != user_id:
-        raise BlogOwnershipException
-
     # Only update the fields that users are allowed to modify
     update_data = {
         "title": blog_update.title,
         "content": blog_update.content,
+        "content_preview": build_content_preview(blog_update.content),
         "tags": blog_update.tags,
         "comment_constraint": blog_update.comment_constraint,
         "post_image": blog_update.post_image
     }
     
-    result = await collection_blog.update_one(
-        {"_id": blog_id}, 
-        {"$set": update_data}
+    # Ownership is part of the filter, so the update and the read-back are one round trip
+    updated_blog = await collection_blog.find_one_and_update(
+        {"_id": blog_id, "user_id": user_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
+    if updated_blog is None:
+        # Only on failure: tell a missing blog from someone else's
+        if await collection_blog.find_one({"_id": blog_id}, {"_id": 1}) is None:
+            raise BlogNotFoundException(blog_id)
+        raise BlogOwnershipException
 
-    if result.modified_count == 1:
-        updated_blog = await collection_blog.find_one({"_id": blog_id})
-        # Convert to BlogPostWithUserData
-        blog_data = convert_mongo_doc_to_dict(updated_blog)
-        if blog_data is None:
-            raise BlogUpdateException
-        
-        # Inject data from keycloak
-        user_data = await get_user_by_id_safely(blog_data["user_id"])
-        blog_data["user_username"] = user_data.username
-        blog_data["user_image_url"] = user_data.profilePicUrl
-        blog_data["user_first_name"] = user_data.firstName
-        blog_data["user_last_name"] = user_data.lastName
-        return BlogPostWithUserData(**blog_data)
-    raise BlogUpdateException
+    invalidate_public_responses("blogs", f"blog:{blog_id}")
+    # Convert to BlogPostWithUserData
+    blog_data = convert_mongo_doc_to_dict(updated_blog)
+    if blog_data is None:
+        raise BlogUpdateException
+
+    # Inject the author's profile (see app.services.user_directory)
+    user_data = await get_author_profile(blog_data)
+    blog_data["user_username"] = user_data.username
+    blog_data["user_image_url"] = user_data.profilePicUrl
+    blog_data["user_first_name"] = user_data.firstName
+    blog_data["user_last_name"] = user_data.lastName
+    return BlogPostWithUserData(**blog_data)
 
 async def write_comment(comment_input: CommentCreate, user_id: str) -> CommentBase:
     # Create a full Comment with auto-generated ID and timestamp
@@ -141,18 +190,22 @@ async def write_comment(comment_input: CommentCreate, user_id: str) -> CommentBa
     comment_dict = comment.dict(by_alias=True) # Backend controls the ID generation
     
     # Check if the blog post exists before allowing comment
-    blog_exists = await collection_blog.find_one({"_id": comment_dict["blogPost_id"]})
+    blog_exists = await collection_blog.find_one({"_id": comment_dict["blogPost_id"]}, {"_id": 1})
     if not blog_exists:
         raise BlogNotFoundException(comment_dict["blogPost_id"])
+    comment_dict["author"] = author_snapshot(await get_user_profile(user_id))
 
-    result = await collection_comment.insert_one(comment_dict)
+    result = await collection_discussion.insert_one(comment_dict)
     if result.inserted_id:
-        # Return the comment from database as CommentBase to match response model
-        created_comment = await collection_comment.find_one({"_id": comment_dict["_id"]})
-        comment_data = convert_mongo_doc_to_dict(created_comment)
+        await adjust_counter(collection_blog, comment_dict["blogPost_id"], "comments_count", 1)
+        invalidate_public_responses("blogs", f"blog:{comment_dict['blogPost_id']}")
+        engagement.record(comment_dict["blogPost_id"], "comments")
+
+        # Return the inserted document as CommentBase to match response model (no read-back needed)
+        comment_data = convert_mongo_doc_to_dict(comment_dict)
         if comment_data:
-            # Inject data from keycloak
-            user_data = await get_user_by_id_safely(comment_data["user_id"])
+            # Inject the author's profile (see app.services.user_directory)
+            user_data = await get_author_profile(comment_data)
             comment_data["user_username"] = user_data.username
             comment_data["user_image_url"] = user_data.profilePicUrl
             comment_data["user_first_name"] = user_data.firstName
@@ -162,31 +215,34 @@ async def write_comment(comment_input: CommentCreate, user_id: str) -> CommentBa
 
 
 async def reply_comment(reply_input: ReplyCreate, user_id: str):
+    # Check if the parent comment or reply exists before allowing reply; the reply inherits its blog and path
+    parent = await collection_discussion.find_one({"_id": reply_input.parentContent_id}, {"blogPost_id": 1, "path": 1})
+    if not parent:
+        raise ParentContentNotFoundException(reply_input.parentContent_id)
+
     # Create a full Reply with auto-generated ID and timestamp
     reply = Reply(
         parentContent_id=reply_input.parentContent_id,
+        blogPost_id=parent["blogPost_id"],
+        path=_child_path(parent),
         text=reply_input.text,
         user_id=user_id
     )
     
     reply_dict = reply.dict(by_alias=True) # Backend controls the ID generation
-    
-    # Check if the parent comment or reply exists before allowing reply
-    parent_exists = await collection_comment.find_one({"_id": reply_dict["parentContent_id"]})
-    if not parent_exists:
-        # If not found in comments, check in replies (for nested replies)
-        parent_exists = await collection_reply.find_one({"_id": reply_dict["parentContent_id"]})
-        if not parent_exists:
-            raise ParentContentNotFoundException(reply_dict["parentContent_id"])
-
-    result = await collection_reply.insert_one(reply_dict)
+    reply_dict["author"] = author_snapshot(await get_user_profile(user_id))
+
+    result = await collection_discussion.insert_one(reply_dict)
     if result.inserted_id:
-        # Return the reply from database to match response model expectations
-        created_reply = await collection_reply.find_one({"_id": reply_dict["_id"]})
-        reply_data = convert_mongo_doc_to_dict(created_reply)
+        await adjust_counter(collection_discussion, reply_dict["parentContent_id"], "replies_count", 1)
+        invalidate_public_responses(f"blog:{reply_dict['blogPost_id']}")
+        engagement.record(reply_dict["blogPost_id"], "comments")
+
+        # Return the inserted document to match response model expectations (no read-back needed)
+        reply_data = convert_mongo_doc_to_dict(reply_dict)
         if reply_data:
-            # Inject data from keycloak
-            user_data = await get_user_by_id_safely(reply_data["user_id"])
+            # Inject the author's profile (see app.services.user_directory)
+            user_data = await get_author_profile(reply_data)
             reply_data["user_username"] = user_data.username
             reply_data["user_image_url"] = user_data.profilePicUrl
             reply_data["user_first_name"] = user_data.firstName
@@ -195,59 +251,68 @@ async def reply_comment(reply_input: ReplyCreate, user_id: str):
     raise ReplyInsertionException
 
 
+def to_all_blogs_blog_post(blog: dict, user_data: KeycloakUser) -> AllBlogsBlogPost:
+    """Convert a raw Blogs document and its author's profile to the list-view model (runs once per listed blog)."""
+    blog_data = {
+        "_id": str(blog["_id"]),  # Use _id as the key since AllBlogsBlogPost uses alias="_id"
+        "comment_constraint": blog["comment_constraint"],
+        "tags": blog["tags"],
+        "number_of_views": blog["number_of_views"],
+        "likes_count": blog.get("likes_count", 0),  # Default to 0 for backward compatibility
+        "comments_count": blog.get("comments_count", 0),
+        "title": blog["title"],
+        "content_preview": blog["content_preview"] if blog.get("content_preview") is not None else build_content_preview(blog["content"]),
+        "postedAt": blog["postedAt"],
+        "post_image": blog.get("post_image"),
+        "user_id": blog.get("user_id"),
+        "user_username": user_data.username,
+        "user_image_url": user_data.profilePicUrl,
+        "user_first_name": user_data.firstName,
+        "user_last_name": user_data.lastName
+    }
+    return AllBlogsBlogPost(**blog_data)
+
+
+async def _fill_missing_previews(blogs: List[dict]) -> None:
+    """Load `content` for list documents stored before content_preview existed (until the backfill has run)."""
+    missing = {blog["_id"]: blog for blog in blogs if blog.get("content_preview") is None}
+    if missing:
+        async for doc in collection_blog_public.find({"_id": {"$in": list(missing)}}, {"content": 1}):
+            missing[doc["_id"]]["content"] = doc["content"]
+
+
 async def get_all_blogs() -> List[AllBlogsBlogPost]:
-    import asyncio
-    # function need to be async to use 'async for' loop
-    blogs = []
-    user_data_cache = {}  # Cache user data to avoid duplicate requests
-    
-    cursor = collection_blog.find({})
-    blog_list = []
-    async for blog in cursor:
-        blog_list.append(blog)
-    
-    # Extract unique user IDs
-    unique_user_ids = list(set(blog.get("user_id") for blog in blog_list if blog.get("user_id")))
-    
-    # Fetch user data in parallel
-    if unique_user_ids:
-        user_data_tasks = [get_user_by_id_safely(user_id) for user_id in unique_user_ids]
-        user_data_results = await asyncio.gather(*user_data_tasks)
-        
-        # Create cache mapping user_id to user_data
-        for user_id, user_data in zip(unique_user_ids, user_data_results):
-            user_data_cache[user_id] = user_data
-    
-    # Process blogs with cached user data
-    for blog in blog_list:
-        user_data = user_data_cache.get(blog.get("user_id"))
-        if not user_data:
-            # Fallback for missing user data
-            user_data = await get_user_by_id_safely(blog.get("user_id", ""))
-        
-        # Convert BlogPost to AllBlogsBlogPost
-        blog_data = {
-            "_id": str(blog["_id"]),  # Use _id as the key since AllBlogsBlogPost uses alias="_id"
-            "comment_constraint": blog["comment_constraint"],
-            "tags": blog["tags"],
-            "number_of_views": blog["number_of_views"],
-            "likes_count": blog.get("likes_count", 0),  # Default to 0 for backward compatibility
-            "title": blog["title"],
-            "content_preview": blog["content"][:CONTENT_PREVIEW_LENGTH] + "..." if len(blog["content"]) > CONTENT_PREVIEW_LENGTH else blog["content"],  # Create preview from content
-            "postedAt": blog["postedAt"],
-            "post_image": blog.get("post_image"),
-            "user_id": blog.get("user_id"),
-            "user_username": user_data.username,
-            "user_image_url": user_data.profilePicUrl,
-            "user_first_name": user_data.firstName,
-            "user_last_name": user_data.lastName
-        }
-        blogs.append(AllBlogsBlogPost(**blog_data))
+    return list(await _public_reads.do(("all_blogs",), _load_all_blogs))
+
+
+async def _load_all_blogs() -> List[AllBlogsBlogPost]:
+    blog_list = [blog async for blog in collection_blog_public.find({}, LIST_PROJECTION)]
+    await _fill_missing_previews(blog_list)
+    profiles = await author_profiles(blog_list)
+    blogs = [to_all_blogs_blog_post(blog, user_data) for blog, user_data in zip(blog_list, profiles)]
     if len(blogs) == 0:
         raise NoBlogsFoundException()
     return blogs
     
 
+def _child_path(doc: dict) -> str:
+    """Materialised path of the replies directly below a comment or reply."""
+    return doc.get("path", "") + doc["_id"] + "/"
+
+
+def _subtree_query(doc: dict) -> dict:
+    """Every reply below a comment or reply, at any depth: an indexed prefix match on the path."""
+    return {"blogPost_id": doc["blogPost_id"], "path": {"$regex": "^" + re.escape(_child_path(doc))}}
+
+
+async def _delete_subtree(doc: dict) -> None:
+    await collection_discussion.delete_many(_subtree_query(doc))
+
+
+async def _delete_blog_discussion(blog_id: str) -> None:
+    await collection_discussion.delete_many({"blogPost_id": blog_id})
+
+
 async def delete_blog_by_id(id: str, user_id: str) -> BlogPostWithUserData:
     # First check if blog exists and user owns it
     blog = await collection_blog.find_one({"_id": id})
@@ -262,8 +327,8 @@ async def delete_blog_by_id(id: str, user_id: str) -> BlogPostWithUserData:
     if blog_data is None:
         raise BlogDeletionException()
 
-    # Inject data from keycloak
-    user_data = await get_user_by_id_safely(blog_data["user_id"])
+    # Inject the author's profile (see app.services.user_directory)
+    user_data = await get_author_profile(blog_data)
     blog_data["user_username"] = user_data.username
     blog_data["user_image_url"] = user_data.profilePicUrl
     blog_data["user_first_name"] = user_data.firstName
@@ -275,177 +340,178 @@ async def delete_blog_by_id(id: str, user_id: str) -> BlogPostWithUserData:
     if result.deleted_count == 0:
         raise BlogDeletionException()
     
+    invalidate_public_responses("blogs", f"blog:{id}")
     # Also delete all comments and replies associated with this blog
-    await collection_comment.delete_many({"blogPost_id": id})
-    # Get all comment IDs for this blog to delete their replies
-    comment_ids = [comment["_id"] async for comment in collection_comment.find({"blogPost_id": id})]
-    if comment_ids:
-        await collection_reply.delete_many({"parentContent_id": {"$in": comment_ids}})
+    await _cascade_deletes.submit(_delete_blog_discussion, id)
+    await _cascade_deletes.submit(unique_viewers.forget, id)
+    await _cascade_deletes.submit(engagement.forget, id)
     
     return deleted_blog
 
 
 async def get_blogs_byTags(tags : List[str]) -> List[AllBlogsBlogPost]:
+    return list(await _public_reads.do(("blogs_by_tags", tuple(sorted(set(tags)))), lambda: _load_blogs_by_tags(tags)))
+
+
+async def _load_blogs_by_tags(tags : List[str]) -> List[AllBlogsBlogPost]:
     blogs=[]
-    if await collection_blog.count_documents({"tags": {"$in": tags}}) == 0: # await added because httpException didnt work due to have no enough time to count.
+    if await collection_blog_public.count_documents({"tags": {"$in": tags}}) == 0: # await added because httpException didnt work due to have no enough time to count.
         raise BlogsByTagsNotFoundException(tags)
-    cursor=collection_blog.find({"tags": {"$in": tags}}) 
-    async for document in cursor: # added async
-        # Inject data from keycloak
-        user_data = await get_user_by_id_safely(document["user_id"])
-        # Convert BlogPost to AllBlogsBlogPost
-        blog_data = {
-            "_id": str(document["_id"]),  # Use _id as the key since AllBlogsBlogPost uses alias="_id"
-            "comment_constraint": document["comment_constraint"],
-            "tags": document["tags"],
-            "number_of_views": document["number_of_views"],
-            "likes_count": document.get("likes_count", 0),  # Default to 0 for backward compatibility
-            "title": document["title"],
-            "content_preview": document["content"][:CONTENT_PREVIEW_LENGTH] + "..." if len(document["content"]) > 200 else document["content"],  # Create preview from content
-            "postedAt": document["postedAt"],
-            "post_image": document.get("post_image"),
-            "user_id": document.get("user_id"),
-            "user_username": user_data.username,
-            "user_image_url": user_data.profilePicUrl,
-            "user_first_name": user_data.firstName,
-            "user_last_name": user_data.lastName
-        }
-        blogs.append(AllBlogsBlogPost(**blog_data))
+    cursor=collection_blog_public.find({"tags": {"$in": tags}}, LIST_PROJECTION)
+    documents = [document async for document in cursor]
+    await _fill_missing_previews(documents)
+    profiles = await author_profiles(documents)
+    for document, user_data in zip(documents, profiles):
+        blogs.append(to_all_blogs_blog_post(document, user_data))
     return blogs
 
 
+def _discussion_nodes(nodes: list):
+    """Every comment/reply in the given trees."""
+    for node in nodes:
+        yield node
+        yield from _discussion_nodes(node.replies)
+
+
+def _user_data_fields(user_data: KeycloakUser) -> Dict[str, str]:
+    return {
+        "user_username": user_data.username,
+        "user_image_url": user_data.profilePicUrl,
+        "user_first_name": user_data.firstName,
+        "user_last_name": user_data.lastName,
+    }
+
+
+def _inject_snapshot_user_data(data: dict) -> None:
+    """Fill in the author profile from the document's snapshot, if it has one."""
+    user_data = snapshot_profile(data)
+    if user_data is not None:
+        data.update(_user_data_fields(user_data))
+
+
+async def _inject_tree_user_data(nodes: list) -> None:
+    """Fill in the author profiles missing from a whole comment/reply tree with one profile lookup."""
+    missing = [node for node in _discussion_nodes(nodes) if node.user_username is None]
+    if not missing:
+        return
+    profiles = await get_user_profiles(node.user_id for node in missing)
+    for node in missing:
+        for field, value in _user_data_fields(profiles[node.user_id]).items():
+            setattr(node, field, value)
+
+
+def _written_at(doc: dict):
+    return doc.get("commentedAt") or doc.get("repliedAt")
+
+
+def _build_tree(docs: List[dict], root_path: str) -> list:
+    """
+    Assemble comment/reply models from the flat documents of a discussion or subtree.
+
+    Nodes whose path is `root_path` are the roots; siblings keep the order they were written in.
+    Replies whose parent is missing (left over from an interrupted delete) are dropped.
+    """
+    docs = sorted(docs, key=_written_at)
+    nodes = {}
+    for doc in docs:
+        data = convert_mongo_doc_to_dict(doc)
+        _inject_snapshot_user_data(data)
+        nodes[doc["_id"]] = CommentBase(**data) if doc.get("kind") == "comment" else ReplyBase(**data)
+    roots = []
+    for doc in docs:
+        node = nodes[doc["_id"]]
+        if doc.get("path", "") == root_path:
+            roots.append(node)
+        elif doc.get("parentContent_id") in nodes:
+            nodes[doc["parentContent_id"]].replies.append(node)
+    return roots
+
+
+async def _load_reply_tree(parent_content_id: str) -> List[ReplyBase]:
+    parent = await collection_discussion_public.find_one({"_id": parent_content_id}, {"blogPost_id": 1, "path": 1})
+    if parent is None:
+        return []
+    docs = [doc async for doc in collection_discussion_public.find(_subtree_query(parent))]
+    return _build_tree(docs, _child_path(parent))
+
+
 async def fetch_replies(parent_content_id: str): #uuid to str ,models.py -> blogPost_id changed from uuid to str
-    replies_cursor = collection_reply.find({"parentContent_id": parent_content_id}) #await removed, TypeError: object AsyncIOMotorCursor can't be used in 'await' expression 
-    replies = []
-    async for reply in replies_cursor:
-        reply_data = convert_mongo_doc_to_dict(reply)
-        if reply_data:
-            # Inject data from keycloak
-            user_data = await get_user_by_id_safely(reply_data["user_id"])
-            reply_data["user_username"] = user_data.username
-            reply_data["user_image_url"] = user_data.profilePicUrl
-            reply_data["user_first_name"] = user_data.firstName
-            reply_data["user_last_name"] = user_data.lastName
-            reply_obj = ReplyBase(**reply_data)
-            # Recursively fetch replies for each reply 
-            # TODO: Any way to limit recursion depth or avoid recursion all together?
-            reply_obj.replies = await fetch_replies(reply_obj.reply_id)
-            replies.append(reply_obj)
-    
+    replies = await _load_reply_tree(parent_content_id)
+    # Inject the authors' profiles (see app.services.user_directory)
+    await _inject_tree_user_data(replies)
     return replies
 
 
 async def fetch_comments_and_replies(id: str):
+    return list(await _public_reads.do(("comments", id), lambda: _load_comments_and_replies(id)))
+
+
+async def _load_comments_and_replies(id: str):
     # try:
     #     objId = ObjectId(id)
     # except:
     #     raise HTTPException(400, "Invalid Id format")
      # id type changed to str, so just store as str 
-    comments_cursor = collection_comment.find({"blogPost_id": id}) #objid to id , await removed - TypeError: object AsyncIOMotorCursor can't be used in 'await' expression 
-    comments = []
-    async for comment in comments_cursor:
-        comment_data = convert_mongo_doc_to_dict(comment)
-        if comment_data:
-            # Inject data from keycloak
-            user_data = await get_user_by_id_safely(comment_data["user_id"])
-            comment_data["user_username"] = user_data.username
-            comment_data["user_image_url"] = user_data.profilePicUrl
-            comment_data["user_first_name"] = user_data.firstName
-            comment_data["user_last_name"] = user_data.lastName
-            comment_obj = CommentBase(**comment_data)
-            # Fetch replies for each comment
-            comment_obj.replies = await fetch_replies(comment_obj.comment_id)
-            comments.append(comment_obj)
+    # The whole discussion (comments and replies at any depth) in one query, assembled in memory
+    docs = [doc async for doc in collection_discussion_public.find({"blogPost_id": id})]
+    comments = _build_tree(docs, "")
     
     if len(comments)==0 :
         raise NoCommentsFoundException()
 
+    # Inject the authors' profiles (see app.services.user_directory)
+    await _inject_tree_user_data(comments)
     return comments
 
 async def update_Comment_Reply(id: str, text: str, user_id: str):
-    # First search in comments collection
-    comment = await collection_comment.find_one({"_id": id})
-    if comment:
-        # Check if user owns this comment
-        if comment["user_id"] != user_id:
-            raise ReplyOwnershipException()
-        
-        result = await collection_comment.update_one(
-            {"_id": id},
-            {"$set": {"text": text}}
-        )
-        if result.modified_count == 1:
-            updated_comment = await collection_comment.find_one({"_id": id})
-            comment_data = convert_mongo_doc_to_dict(updated_comment)
-            if comment_data:
-                # Inject data from keycloak
-                user_data = await get_user_by_id_safely(comment_data["user_id"])
-                comment_data["user_username"] = user_data.username
-                comment_data["user_image_url"] = user_data.profilePicUrl
-                comment_data["user_first_name"] = user_data.firstName
-                comment_data["user_last_name"] = user_data.lastName
-                return CommentBase(**comment_data)
-        raise CommentUpdateException()
-
-    # If it is not in comment collection, then search in reply collection
-    reply = await collection_reply.find_one({"_id": id})
-    if reply:
-        # Check if user owns this reply
-        if reply["user_id"] != user_id:
+    # Ownership is part of the filter, so the update and the read-back are one round trip
+    updated = await collection_discussion.find_one_and_update(
+        {"_id": id, "user_id": user_id},
+        {"$set": {"text": text}},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        # Only on failure: tell someone else's comment or reply from a missing one
+        if await collection_discussion.find_one({"_id": id}, {"_id": 1}):
             raise ReplyOwnershipException()
-
-        result = await collection_reply.update_one(
-            {"_id": id},
-            {"$set": {"text": text}}
-        )
-        if result.modified_count == 1:
-            updated_reply = await collection_reply.find_one({"_id": id})
-            reply_data = convert_mongo_doc_to_dict(updated_reply)
-            if reply_data:
-                # Inject data from keycloak
-                user_data = await get_user_by_id_safely(reply_data["user_id"])
-                reply_data["user_username"] = user_data.username
-                reply_data["user_image_url"] = user_data.profilePicUrl
-                reply_data["user_first_name"] = user_data.firstName
-                reply_data["user_last_name"] = user_data.lastName
-                return ReplyBase(**reply_data)
-        raise ReplyUpdateException()
-
-    raise CommentOrReplyNotFoundException()
+        raise CommentOrReplyNotFoundException()
+
+    invalidate_public_responses(f"blog:{updated['blogPost_id']}")
+    is_comment = updated["kind"] == "comment"
+    data = convert_mongo_doc_to_dict(updated)
+    if data:
+        # Inject the author's profile (see app.services.user_directory)
+        user_data = await get_author_profile(data)
+        data["user_username"] = user_data.username
+        data["user_image_url"] = user_data.profilePicUrl
+        data["user_first_name"] = user_data.firstName
+        data["user_last_name"] = user_data.lastName
+        return CommentBase(**data) if is_comment else ReplyBase(**data)
+    raise CommentUpdateException() if is_comment else ReplyUpdateException()
 
 
 async def delete_comment_reply(id: str, user_id: str):
-    # First search in comments collection
-    comment = await collection_comment.find_one({"_id": id})
-    if comment:
-        # Check if user owns this comment
-        if comment["user_id"] != user_id:
+    # Ownership is part of the filter, so the check and the delete are one round trip
+    deleted = await collection_discussion.find_one_and_delete(
+        {"_id": id, "user_id": user_id},
+        projection={"kind": 1, "blogPost_id": 1, "path": 1, "parentContent_id": 1}
+    )
+    if deleted is None:
+        if await collection_discussion.find_one({"_id": id}, {"_id": 1}):
             raise PermissionDeniedException()
-        
-        result = await collection_comment.delete_one({'_id': id})
-        # Delete all replies associated with the comment
-        await collection_reply.delete_many({'parentContent_id': id})
-        
-        if result.deleted_count == 0:
-            raise CommentDeletionException()
+        raise CommentOrReplyNotFoundException()
+
+    # Delete everything below it (nested replies at any depth) with one delete_many on the path prefix
+    await _cascade_deletes.submit(_delete_subtree, deleted)
+    blog_id = deleted["blogPost_id"]
+    if deleted["kind"] == "comment":
+        await adjust_counter(collection_blog, blog_id, "comments_count", -1)
+        invalidate_public_responses("blogs", f"blog:{blog_id}")
         return {"message": "Comment and associated replies deleted successfully"}
-    
-    # If it is not in comment collection, then search in reply collection
-    reply = await collection_reply.find_one({"_id": id})
-    if reply:
-        # Check if user owns this reply
-        if reply["user_id"] != user_id:
-            raise PermissionDeniedException
-
-        result = await collection_reply.delete_one({'_id': id})
-        # Delete all replies associated with the reply (nested replies)
-        await collection_reply.delete_many({'parentContent_id': id})
-        
-        if result.deleted_count == 0:
-            raise ReplyDeletionException()
-        return {"message": "Reply and nested replies deleted successfully"}
 
-    raise CommentOrReplyNotFoundException()
+    await adjust_counter(collection_discussion, deleted["parentContent_id"], "replies_count", -1)
+    invalidate_public_responses(f"blog:{blog_id}")
+    return {"message": "Reply and nested replies deleted successfully"}
 
 
 async def like_or_unlike(blog_id: str, user_id: str, like_value: int):
@@ -472,7 +538,7 @@ async def like_or_unlike(blog_id: str, user_id: str, like_value: int):
             result = await collection_like.insert_one(like_dict)
             if result.inserted_id:
                 # Increment likes_count in blog post, handling case where field might not exist
-                await collection_blog.update_one(
+                await collection_blog_counters.update_one(
                     {"_id": blog_id},
                     [
                         {
@@ -482,6 +548,7 @@ async def like_or_unlike(blog_id: str, user_id: str, like_value: int):
                         }
                     ]
                 )
+                engagement.record(blog_id, "likes")
                 return {"message": "Blog liked successfully", "liked": True}
             else:
                 raise BlogLikeException()
@@ -491,7 +558,7 @@ async def like_or_unlike(blog_id: str, user_id: str, like_value: int):
             result = await collection_like.delete_one({"blog_id": blog_id, "user_id": user_id})
             if result.deleted_count > 0:
                 # Decrement likes_count in blog post, but ensure it doesn't go below 0
-                await collection_blog.update_one(
+                await collection_blog_counters.update_one(
                     {"_id": blog_id},
                     [
                         {
@@ -503,6 +570,7 @@ async def like_or_unlike(blog_id: str, user_id: str, like_value: int):
                         }
                     ]
                 )
+                engagement.record(blog_id, "unlikes")
                 return {"message": "Blog unliked successfully", "liked": False}
             else:
                 raise BlogUnlikeException()
@@ -550,8 +618,8 @@ async def check_database_health() -> Dict:
         
         # Get collection statistics
         blogs_count = await collection_blog.count_documents({})
-        comments_count = await collection_comment.count_documents({})
-        replies_count = await collection_reply.count_documents({})
+        comments_count = await collection_discussion.count_documents({"kind": "comment"})
+        replies_count = await collection_discussion.count_documents({"kind": "reply"})
         likes_count = await collection_like.count_documents({})
         
         # Calculate response time
@@ -0,0 +1,80 @@
+"""
+Reconcile job for the denormalised discussion counters.
+
+`comments_count` on Blogs and `replies_count` on comments and replies (Discussions) are maintained
+incrementally by the write paths in `app.services.blog`. Crashes between the insert/delete
+and the counter update, or documents written before the counters existed, can leave them
+out of sync. This job recomputes the real counts and fixes any drift.
+
+Run it periodically (e.g. from cron):
+    python -m app.services.counters
+"""
+
+from typing import Callable, Dict
+from app.db.database import collection_blog, collection_discussion, connect_to_mongo, close_mongo_connection
+
+
+async def _count_by(collection, group_field: str, query: Dict) -> Dict[str, int]:
+    """Count the documents of `collection` matching `query`, grouped by `group_field`."""
+    pipeline = [{"$match": query}, {"$group": {"_id": f"${group_field}", "count": {"$sum": 1}}}]
+    return {doc["_id"]: doc["count"] async for doc in collection.aggregate(pipeline)}
+
+
+async def _fix_counter(collection, field: str, expected_counts: Dict[str, int], count_query: Callable[[str], Dict]) -> int:
+    """Set `field` on every document of `collection` whose value differs from its real count.
+
+    `expected_counts` (from one aggregation) only selects the candidates: it can be older than
+    the counters read afterwards, so each mismatch is re-counted from Discussions right before
+    its update. The update is conditional on the counter value seen before the re-count, so a
+    counter changed by a concurrent write meanwhile is left alone and picked up by the next run.
+    A write caught between its insert/delete and its own counter update can still leave the
+    counter off by one until the next run.
+
+    Args:
+        count_query: Discussions query matching the documents counted for a given document id
+
+    Returns:
+        int: Number of documents corrected
+    """
+    corrected = 0
+    async for doc in collection.find({}, {field: 1}):
+        if doc.get(field) == expected_counts.get(doc["_id"], 0):
+            continue
+        current = await collection.find_one({"_id": doc["_id"]}, {field: 1})
+        if current is None:
+            continue
+        observed = current.get(field)
+        expected = await collection_discussion.count_documents(count_query(doc["_id"]))
+        if observed != expected:
+            result = await collection.update_one({"_id": doc["_id"], field: observed}, {"$set": {field: expected}})
+            corrected += result.modified_count
+    return corrected
+
+
+async def reconcile_counters() -> Dict[str, int]:
+    """
+    Recompute `comments_count` and `replies_count` from the Discussions collection.
+
+    Returns:
+        dict: Number of corrected documents per collection
+    """
+    comment_counts = await _count_by(collection_discussion, "blogPost_id", {"kind": "comment"})
+    reply_counts = await _count_by(collection_discussion, "parentContent_id", {"kind": "reply"})
+
+    return {
+        "blogs": await _fix_counter(collection_blog, "comments_count", comment_counts, lambda blog_id: {"kind": "comment", "blogPost_id": blog_id}),
+        "discussions": await _fix_counter(collection_discussion, "replies_count", reply_counts, lambda parent_id: {"kind": "reply", "parentContent_id": parent_id}),
+    }
+
+
+if __name__ == "__main__":
+    import asyncio
+    from pprint import pprint
+
+    async def main():
+        connect_to_mongo()
+        try:
+            pprint(await reconcile_counters())
+        finally:
+            close_mongo_connection()
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""
+Online migration of comments and replies into the Discussions collection.
+
+Comments and replies used to live in separate Comments and Replies collections, so a lookup
+by id probed both and a subtree could only be deleted level by level. They are now stored
+together in Discussions, with:
+- `kind`: "comment" or "reply"
+- `blogPost_id`: the blog at the root of the discussion (replies included)
+- `path`: the ids of the ancestors from the comment down, each followed by "/" ("" for comments)
+
+Any id lookup is then one query on `_id`, and a whole comment tree or subtree is one indexed
+query on (blogPost_id, path prefix).
+
+The job copies the legacy collections while the previous version keeps serving traffic:
+1. Before deploying, run a full pass (repeat it as often as you like). It upserts every
+   comment and, level by level, every reply below one, stamping `migrated_at`. Copies whose
+   legacy document was deleted since an earlier pass are removed at the end of the pass.
+   Replies whose parent no longer exists are not copied; they were never shown.
+2. Deploy. From then on the service only reads and writes Discussions.
+3. Run it with `--since` set to the start time of the last full pass (the job prints it) to
+   copy the comments and replies that old workers wrote during the rollout. This catch-up
+   only inserts documents that are missing, so it never overwrites writes made through the
+   new version.
+
+Edits and deletes made through old workers after the last full pass are not carried over.
+Run `python -m app.services.counters` afterwards. The legacy collections are left as they
+are; drop them once the migration has been verified.
+
+Run it with:
+    python -m app.services.discussions [--since 2026-01-31T12:00:00]
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.db.database import collection_comment, collection_discussion, collection_reply, connect_to_mongo, close_mongo_connection
+
+BATCH_SIZE = 500
+
+
+def discussion_document(doc: Dict, kind: str, blog_id: str, path: str) -> Dict:
+    """A legacy comment or reply as stored in Discussions."""
+    return {**doc, "kind": kind, "blogPost_id": blog_id, "path": path}
+
+
+async def _write(docs: List[Dict], migrated_at: datetime, insert_only: bool = False) -> int:
+    """Upsert `docs` into Discussions; with `insert_only`, existing documents are left untouched."""
+    if not docs:
+        return 0
+    operator = "$setOnInsert" if insert_only else "$set"
+    updates = [
+        UpdateOne({"_id": doc["_id"]}, {operator: {**{k: v for k, v in doc.items() if k != "_id"}, "migrated_at": migrated_at}}, upsert=True)
+        for doc in docs
+    ]
+    await collection_discussion.bulk_write(updates, ordered=False)
+    return len(docs)
+
+
+async def _copy_replies_below(parents: Dict[str, Tuple[str, str]], migrated_at: datetime) -> Dict[str, Tuple[str, str]]:
+    """
+    Copy the legacy replies directly below `parents`.
+
+    Args:
+        parents: Blog id and child path per parent id
+
+    Returns:
+        dict: The same for the copied replies, i.e. the parents of the next level
+    """
+    children: Dict[str, Tuple[str, str]] = {}
+    parent_ids = list(parents)
+    for start in range(0, len(parent_ids), BATCH_SIZE):
+        docs = []
+        async for reply in collection_reply.find({"parentContent_id": {"$in": parent_ids[start:start + BATCH_SIZE]}}):
+            blog_id, path = parents[reply["parentContent_id"]]
+            docs.append(discussion_document(reply, "reply", blog_id, path))
+            children[reply["_id"]] = (blog_id, path + reply["_id"] + "/")
+        await _write(docs, migrated_at)
+    return children
+
+
+async def _copy_comments(comments: List[Dict], migrated_at: datetime) -> int:
+    """Copy a batch of legacy comments and every reply below them; returns the number of replies."""
+    await _write([discussion_document(comment, "comment", comment["blogPost_id"], "") for comment in comments], migrated_at)
+    level = {comment["_id"]: (comment["blogPost_id"], comment["_id"] + "/") for comment in comments}
+    replies = 0
+    while level:
+        level = await _copy_replies_below(level, migrated_at)
+        replies += len(level)
+    return replies
+
+
+async def migrate_discussions(migrated_at: datetime) -> Dict[str, int]:
+    """
+    Full pass: copy every legacy comment and reachable reply, then remove the copies whose
+    legacy document is gone. Run it only while the previous version is serving.
+
+    Returns:
+        dict: Number of comments and replies copied, and of stale copies removed
+    """
+    report = {"comments": 0, "replies": 0, "removed": 0}
+    batch = []
+    async for comment in collection_comment.find({}):
+        batch.append(comment)
+        if len(batch) >= BATCH_SIZE:
+            report["replies"] += await _copy_comments(batch, migrated_at)
+            report["comments"] += len(batch)
+            batch = []
+    if batch:
+        report["replies"] += await _copy_comments(batch, migrated_at)
+        report["comments"] += len(batch)
+    # Documents written by the new version have no `migrated_at` and are never matched
+    report["removed"] = (await collection_discussion.delete_many({"migrated_at": {"$lt": migrated_at}})).deleted_count
+    return report
+
+
+async def catch_up_discussions(since: datetime, migrated_at: datetime) -> Dict[str, int]:
+    """
+    Insert the legacy comments and replies written since `since` that are not in Discussions yet.
+
+    Returns:
+        dict: Number of comments and replies inserted (or already there), and of replies
+        skipped because their parent is missing
+    """
+    comments = [discussion_document(comment, "comment", comment["blogPost_id"], "") async for comment in collection_comment.find({"commentedAt": {"$gte": since}})]
+    for start in range(0, len(comments), BATCH_SIZE):
+        await _write(comments[start:start + BATCH_SIZE], migrated_at, insert_only=True)
+
+    replies = sorted([reply async for reply in collection_reply.find({"repliedAt": {"$gte": since}})], key=lambda reply: reply["repliedAt"])
+    parent_ids = list({reply["parentContent_id"] for reply in replies})
+    parents: Dict[str, Optional[Dict]] = {}
+    for start in range(0, len(parent_ids), BATCH_SIZE):
+        async for parent in collection_discussion.find({"_id": {"$in": parent_ids[start:start + BATCH_SIZE]}}, {"blogPost_id": 1, "path": 1}):
+            parents[parent["_id"]] = parent
+    docs, skipped = [], 0
+    for reply in replies:
+        parent = parents.get(reply["parentContent_id"])
+        if parent is None:
+            skipped += 1
+            continue
+        doc = discussion_document(reply, "reply", parent["blogPost_id"], parent["path"] + parent["_id"] + "/")
+        docs.append(doc)
+        parents[reply["_id"]] = doc  # Parent of later replies in the same catch-up
+    for start in range(0, len(docs), BATCH_SIZE):
+        await _write(docs[start:start + BATCH_SIZE], migrated_at, insert_only=True)
+    return {"comments": len(comments), "replies": len(docs), "skipped": skipped}
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Copy the legacy Comments and Replies collections into Discussions.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Catch-up after deploying: insert only what was written since this UTC time")
+    args = parser.parse_args()
+
+    async def main():
+        connect_to_mongo()
+        try:
+            started_at = datetime.utcnow()
+            if args.since is None:
+                print(f"Full pass started at {started_at.isoformat()}: {await migrate_discussions(started_at)}")
+            else:
+                print(f"Caught up since {args.since.isoformat()}: {await catch_up_discussions(args.since, started_at)}")
+        finally:
+            close_mongo_connection()
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Time-bucketed engagement analytics per blog (bucket pattern).
+
+Views, likes, unlikes and comments are counted in memory per blog and hour, and written
+every ENGAGEMENT_STATS_FLUSH_SECONDS as one upserted `$inc` per (blog, hour) into a daily
+bucket document of the BlogStats collection:
+
+    {"_id": "<blog_id>:2025-01-31", "blog_id": ..., "day": 2025-01-31T00:00,
+     "views": 120, "likes": 4, ..., "hours": {"09": {"views": 30, ...}, ...}}
+
+A stats query over N days therefore reads at most N small documents through the
+(blog_id, day) index. `comments` counts comments and replies at any depth. Counts buffered
+in a worker show up after its next flush.
+If a flush fails, its counts are kept for the next one. When MongoDB fails without
+saying which writes were applied, a few counts may be written twice.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import DefaultDict, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import settings
+from app.core.exceptions import BlogNotFoundException, InvalidStatsRangeException
+from app.core.periodic import PeriodicFlusher
+from app.db.database import collection_blog_public, collection_blog_stats
+from app.schemas.blog import BlogStatsResponse, EngagementBucket, EngagementCounts
+
+METRICS = ("views", "likes", "unlikes", "comments")
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_RANGES = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+
+
+def bucket_id(blog_id: str, day: datetime) -> str:
+    return f"{blog_id}:{day:%Y-%m-%d}"
+
+
+def _truncate(moment: datetime, granularity: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Naive UTC, as stored by the service."""
+    if moment.tzinfo is not None:
+        moment = (moment - moment.utcoffset()).replace(tzinfo=None)
+    return moment
+
+
+class EngagementRecorder(PeriodicFlusher):
+    def __init__(self):
+        super().__init__()
+        self._pending: DefaultDict[Tuple[str, datetime], Counter] = defaultdict(Counter)
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return settings.ENGAGEMENT_STATS_FLUSH_SECONDS
+
+    def record(self, blog_id: str, metric: str, count: int = 1, at: Optional[datetime] = None) -> None:
+        key = (blog_id, _truncate(at or datetime.utcnow(), "hour"))
+        if key not in self._pending and len(self._pending) + 1 >= settings.ENGAGEMENT_STATS_MAX_PENDING:
+            self.request_flush()
+        self._pending[key][metric] += count
+
+    async def flush(self) -> int:
+        """
+        Write the buffered counts.
+
+        Returns:
+            int: Number of (blog, hour) buckets written
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, defaultdict(Counter)
+        keys = list(pending)
+        updates = []
+        for blog_id, hour in keys:
+            day = hour.replace(hour=0)
+            increments = {}
+            for metric, count in pending[(blog_id, hour)].items():
+                increments[metric] = count
+                increments[f"hours.{hour.hour:02d}.{metric}"] = count
+            updates.append(UpdateOne(
+                {"_id": bucket_id(blog_id, day)},
+                {"$setOnInsert": {"blog_id": blog_id, "day": day}, "$inc": increments},
+                upsert=True,
+            ))
+        try:
+            await collection_blog_stats.bulk_write(updates, ordered=False)
+            return len(updates)
+        except BulkWriteError as e:
+            # Concurrent first upserts of a bucket by two workers fail with a duplicate key; retry those
+            failed = [keys[error["index"]] for error in e.details.get("writeErrors", [])]
+        except PyMongoError as e:
+            print(f"\nError writing engagement stats:\n{e}\n")
+            failed = keys
+        for key in failed:
+            self._pending[key].update(pending[key])
+        return len(keys) - len(failed)
+
+    async def forget(self, blog_id: str) -> None:
+        """Drop the buckets of a deleted blog."""
+        for key in [key for key in self._pending if key[0] == blog_id]:
+            del self._pending[key]
+        await collection_blog_stats.delete_many({"blog_id": blog_id})
+
+
+engagement = EngagementRecorder()
+
+
+async def get_blog_stats(blog_id: str, start: Optional[datetime], end: Optional[datetime], granularity: str) -> BlogStatsResponse:
+    """
+    Engagement time series of a blog over [start, end], one point per hour or day (zero-filled).
+
+    Defaults to the last 48 hours (hourly) or 30 days (daily).
+    """
+    end = _as_utc(end) if end is not None else datetime.utcnow()
+    start = _as_utc(start) if start is not None else end - DEFAULT_RANGES[granularity]
+    if start > end:
+        raise InvalidStatsRangeException("start must not be after end")
+    if end - start > timedelta(days=settings.ENGAGEMENT_STATS_MAX_DAYS):
+        raise InvalidStatsRangeException(f"The range may span at most {settings.ENGAGEMENT_STATS_MAX_DAYS} days")
+
+    if await collection_blog_public.find_one({"_id": blog_id}, {"_id": 1}) is None:
+        raise BlogNotFoundException(blog_id)
+
+    first, last = _truncate(start, granularity), _truncate(end, granularity)
+    counts: Dict[datetime, Dict[str, int]] = {}
+    cursor = collection_blog_stats.find({"blog_id": blog_id, "day": {"$gte": _truncate(start, "day"), "$lte": last}})
+    async for bucket in cursor:
+        if granularity == "day":
+            counts[bucket["day"]] = bucket
+            continue
+        for hour, hour_counts in bucket.get("hours", {}).items():
+            counts[bucket["day"] + timedelta(hours=int(hour))] = hour_counts
+
+    step = GRANULARITIES[granularity]
+    series: List[EngagementBucket] = []
+    totals = dict.fromkeys(METRICS, 0)
+    moment = first
+    while moment <= last:
+        point = counts.get(moment, {})
+        values = {metric: point.get(metric, 0) for metric in METRICS}
+        for metric, value in values.items():
+            totals[metric] += value
+        series.append(EngagementBucket(start=moment, **values))
+        moment += step
+
+    return BlogStatsResponse(blog_id=blog_id, granularity=granularity, start=first, end=last, totals=EngagementCounts(**totals), series=series)
@@ -0,0 +1,182 @@
+"""
+Cross-node cache invalidation from MongoDB change streams.
+
+The write paths in `app.services.blog` only invalidate the cache of the worker that served
+the write. With several workers or replicas, this watcher follows a change stream over
+Blogs, Discussions and Likes and drops the affected public response cache entries in
+every worker, whichever node made the change:
+
+- Blogs: the lists and that blog's comment tree (view-count-only updates are ignored; those
+  counters are allowed to lag by the cache TTL)
+- Discussions: the comment tree of the comment's or reply's blog. Inserts carry the blog id in
+  the full document; update and delete events only carry the document id, so the blog id is
+  read from the pre-image (`fullDocumentBeforeChange`), which the watcher enables on
+  Discussions (MongoDB 6.0+, CHANGE_STREAM_PRE_IMAGES). Without a pre-image (older server,
+  missing collMod privilege, or a change made before it was enabled) every comment tree is
+  dropped. Updates that only move a parent's `replies_count` are ignored; the insert or
+  delete of the reply that caused them already invalidates.
+- Likes: the lists
+
+Ignored updates are filtered out on the server, so the per-view counter updates of Blogs never
+reach the workers. The stream does not ask for the full document of updates ("updateLookup"),
+which would re-read the whole blog, content included, for every event; inserts carry it anyway.
+Pre-images cost the server a stored copy of each changed comment or reply, and only their
+`blogPost_id` is sent to the workers.
+
+Each worker process keeps the resume token of its own stream in memory, so a stream reopened
+after an error continues after the last event seen rather than skipping the writes made
+while it was down. The token is not persisted: the cache it protects lives in the process
+and starts empty after a restart. When the token has fallen off the oplog, the local cache
+is cleared and the stream restarts from now.
+
+Change streams need a replica set (a single-node one is enough). On a standalone mongod
+the watcher stops and the cache falls back to TTL-only expiry (PUBLIC_CACHE_TTL_SECONDS).
+"""
+
+import asyncio
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import settings
+from app.core.metrics import CHANGE_STREAM_EVENTS
+from app.core.response_cache import invalidate_public_responses, public_responses
+from app.db.database import database
+
+WATCHED_COLLECTIONS = ("Blogs", "Discussions", "Likes")
+VIEW_COUNTER_FIELDS = {"number_of_views", "unique_viewers"}
+REPLY_COUNTER_FIELDS = {"replies_count"}
+# Update events that need no invalidation, per collection
+IGNORED_UPDATE_FIELDS = {"Blogs": VIEW_COUNTER_FIELDS, "Discussions": REPLY_COUNTER_FIELDS}
+
+# Server error codes: change streams not supported (standalone), and resume point lost
+CHANGE_STREAMS_UNSUPPORTED = 40573
+RESUME_POINT_LOST = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+
+
+def _updates_only(collection: str, fields) -> Dict[str, Any]:
+    """Change-stream filter for update events on `collection` that set nothing but `fields`."""
+    updated_fields = {"$map": {"input": {"$objectToArray": "$updateDescription.updatedFields"}, "in": "$$this.k"}}
+    return {
+        "ns.coll": collection,
+        "operationType": "update",
+        "updateDescription.removedFields": {"$size": 0},
+        "$expr": {"$setIsSubset": [updated_fields, sorted(fields)]},
+    }
+
+
+PIPELINE = [
+    {"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}, "operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+    {"$match": {"$nor": [_updates_only(collection, fields) for collection, fields in IGNORED_UPDATE_FIELDS.items()]}},
+    # Only what `invalidation_tags` reads; `_id` (the resume token) must be kept as is
+    {"$project": {
+        "operationType": 1, "ns": 1, "documentKey": 1, "fullDocument.blogPost_id": 1, "fullDocumentBeforeChange.blogPost_id": 1,
+        "updateDescription.updatedFields": 1, "updateDescription.removedFields": 1,
+    }},
+]
+
+
+def invalidation_tags(change: Mapping[str, Any]) -> Tuple[str, ...]:
+    """Public response cache tags affected by one change event."""
+    collection = change["ns"]["coll"]
+    update = change.get("updateDescription") or {}
+    updated_fields = update.get("updatedFields")
+    if (
+        change["operationType"] == "update"
+        and updated_fields is not None
+        and not update.get("removedFields")
+        and set(updated_fields) <= IGNORED_UPDATE_FIELDS.get(collection, set())
+    ):
+        return ()  # Also filtered out by PIPELINE on the server
+    if collection == "Blogs":
+        return ("blogs", f"blog:{change['documentKey']['_id']}")
+    if collection == "Discussions":
+        document = change.get("fullDocument") or change.get("fullDocumentBeforeChange") or {}
+        blog_id = document.get("blogPost_id")
+        return (f"blog:{blog_id}",) if blog_id else ("comments",)
+    if collection == "Likes":
+        return ("blogs",)
+    return ()
+
+
+class ChangeStreamInvalidator:
+    def __init__(self):
+        self.state = "stopped"  # stopped, watching, retrying or unavailable
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token: Optional[Dict[str, Any]] = None
+
+    def apply(self, change: Mapping[str, Any]) -> None:
+        CHANGE_STREAM_EVENTS.labels(change["ns"]["coll"]).inc()
+        tags = invalidation_tags(change)
+        if tags:
+            invalidate_public_responses(*tags)
+
+    async def _enable_pre_images(self) -> None:
+        """Store pre-images of Discussions changes, so their events tell which blog they belong to."""
+        try:
+            await database.command("collMod", "Discussions", changeStreamPreAndPostImages={"enabled": True})
+        except PyMongoError as e:
+            print(f"\nCould not enable change stream pre-images on Discussions; their edits and deletes invalidate every comment tree:\n{e}\n")
+
+    async def _watch(self) -> None:
+        """Follow the change stream until it fails."""
+        options = {"full_document_before_change": "whenAvailable"} if settings.CHANGE_STREAM_PRE_IMAGES else {}
+        async with database.watch(PIPELINE, resume_after=self._resume_token, **options) as stream:
+            if self.state != "watching":
+                print(f"Cache invalidation watching change streams on {', '.join(WATCHED_COLLECTIONS)}")
+            self.state = "watching"
+            self.last_error = None
+            while True:
+                change = await stream.try_next()
+                if change is not None:
+                    self.apply(change)
+                self._resume_token = stream.resume_token
+
+    async def _run(self) -> None:
+        if settings.CHANGE_STREAM_PRE_IMAGES:
+            await self._enable_pre_images()
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    self.state = "unavailable"
+                    self.last_error = str(e)
+                    print("Change streams are not available (MongoDB is not a replica set); public cache entries expire by TTL only")
+                    return
+                if e.code in RESUME_POINT_LOST:
+                    # Events since the token are gone; anything cached may be stale
+                    print(f"\nChange stream resume point lost, clearing the public response cache:\n{e}\n")
+                    self._resume_token = None
+                    public_responses.clear()
+                    continue
+                self._failed(e)
+            except PyMongoError as e:
+                self._failed(e)
+            await asyncio.sleep(settings.CHANGE_STREAM_RETRY_SECONDS)
+
+    def _failed(self, e: Exception) -> None:
+        self.state = "retrying"
+        self.last_error = str(e) or type(e).__name__
+        print(f"\nError in change stream cache invalidation, retrying in {settings.CHANGE_STREAM_RETRY_SECONDS}s:\n{e}\n")
+
+    async def start(self) -> None:
+        if not callable(getattr(database, "watch", None)):
+            # e.g. the in-memory stand-in used by the benchmarks
+            self.state = "unavailable"
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.state = "stopped"
+
+
+cache_invalidator = ChangeStreamInvalidator()
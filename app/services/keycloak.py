@@ -1,61 +1,226 @@
 from fastapi import HTTPException
+import asyncio
 import httpx
 from typing import List, Dict, Optional
 from pprint import pprint
 
+from app.core.budget import get_request_budget
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
+from app.core.metrics import ENRICHMENT_SKIPPED, KEYCLOAK_REQUEST_DURATION, register_circuit_breaker, timed
+from app.core.timing import track_keycloak
 from app.schemas.blog import KeycloakUser
 from app.core.exceptions import *
 
-async def get_keycloak_token() -> Optional[str]:
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{settings.KEYCLOAK_URL}/realms/{settings.REALM}/protocol/openid-connect/token",
-            data={
-                "client_id": settings.CLIENT_ID,
-                "client_secret": settings.CLIENT_SECRET,
-                "grant_type": "client_credentials",
-            },
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            return resp.json().get("access_token")
-        if resp.status_code == 401:
-            raise KeycloakAuthenticationException()
-        return None
+# Transport for the Keycloak HTTP client. None uses httpx's default network transport;
+# benchmarks swap in an httpx.MockTransport through `set_http_transport`.
+_http_transport: Optional[httpx.AsyncBaseTransport] = None
+# One client per worker so connections (and TLS sessions) to Keycloak are reused
+_client: Optional[httpx.AsyncClient] = None
+
+# Service-account token, kept until shortly before it expires
+_token_cache: TTLCache[str] = TTLCache("keycloak_token", maxsize=1, ttl_seconds=60)
+# User profiles by id; profile changes show up after at most KEYCLOAK_USER_CACHE_TTL_SECONDS
+_user_cache: TTLCache[KeycloakUser] = TTLCache("keycloak_users", settings.KEYCLOAK_USER_CACHE_SIZE, settings.KEYCLOAK_USER_CACHE_TTL_SECONDS)
+# Budgeted profile lookups in flight, by user id; they outlive the requests that gave up on them
+_user_fetches: Dict[str, "asyncio.Task[KeycloakUser]"] = {}
+
+
+def _new_circuit_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        "keycloak",
+        failure_rate_threshold=settings.KEYCLOAK_BREAKER_FAILURE_RATE,
+        slow_call_rate_threshold=settings.KEYCLOAK_BREAKER_SLOW_CALL_RATE,
+        slow_call_seconds=settings.KEYCLOAK_BREAKER_SLOW_CALL_MS / 1000,
+        window_size=settings.KEYCLOAK_BREAKER_WINDOW,
+        min_calls=settings.KEYCLOAK_BREAKER_MIN_CALLS,
+        open_seconds=settings.KEYCLOAK_BREAKER_OPEN_SECONDS,
+        half_open_probes=settings.KEYCLOAK_BREAKER_HALF_OPEN_PROBES,
+    )
+
+
+# While open, lookups fail fast and the *_safely helpers serve cached or default profiles
+_breaker = register_circuit_breaker(_new_circuit_breaker())
+
+
+def set_http_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    global _http_transport, _client, _breaker
+    _http_transport = transport
+    _client = None
+    _breaker = register_circuit_breaker(_new_circuit_breaker())
+    clear_keycloak_caches()
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(transport=_http_transport, limits=httpx.Limits(max_connections=settings.KEYCLOAK_MAX_CONNECTIONS))
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared Keycloak client (on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def clear_keycloak_caches() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
+
+def get_circuit_breaker_state() -> Dict:
+    return _breaker.snapshot()
+
+
+async def _keycloak_request(operation: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send one request to Keycloak through the circuit breaker.
+
+    Transport errors, timeouts and 5xx responses count as failures, calls slower than
+    KEYCLOAK_BREAKER_SLOW_CALL_MS as slow.
+
+    Raises:
+        KeycloakUnavailableException: The breaker is open or the request failed at the transport level
+    """
+    try:
+        with _breaker.call() as outcome, timed(KEYCLOAK_REQUEST_DURATION, operation), track_keycloak():
+            resp = await _http_client().request(method, url, timeout=settings.KEYCLOAK_TIMEOUT_SECONDS, **kwargs)
+            outcome["failed"] = resp.status_code >= 500
+    except CircuitOpenError as e:
+        raise KeycloakUnavailableException(str(e))
+    except httpx.HTTPError as e:
+        raise KeycloakUnavailableException(f"{type(e).__name__}: {e}")
+    return resp
+
+
+async def get_keycloak_token(use_cache: bool = True) -> Optional[str]:
+    """
+    Get a service-account access token.
+
+    Args:
+        use_cache: Return the cached token while it is valid. Pass False to always ask Keycloak (health checks).
+    """
+    if use_cache:
+        token = _token_cache.get("service")
+        if token:
+            return token
+    resp = await _keycloak_request(
+        "token",
+        "POST",
+        f"{settings.KEYCLOAK_URL}/realms/{settings.REALM}/protocol/openid-connect/token",
+        data={
+            "client_id": settings.CLIENT_ID,
+            "client_secret": settings.CLIENT_SECRET,
+            "grant_type": "client_credentials",
+        },
+    )
+    if resp.status_code == 200:
+        payload = resp.json()
+        token = payload.get("access_token")
+        if token:
+            ttl = payload.get("expires_in", 60) - settings.KEYCLOAK_TOKEN_REFRESH_MARGIN_SECONDS
+            if ttl > 0:
+                _token_cache.set("service", token, ttl_seconds=ttl)
+        return token
+    if resp.status_code == 401:
+        raise KeycloakAuthenticationException()
+    return None
 
 
 async def get_all_users() -> List[KeycloakUser]:
     token = await get_keycloak_token()
     if not token:
         raise KeycloakTokenException()
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{settings.KEYCLOAK_URL}/admin/realms/{settings.REALM}/users",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            return [KeycloakUser(**user) for user in resp.json()]
-        raise KeycloakServiceException(resp.status_code, resp.text)
+    resp = await _keycloak_request(
+        "list_users",
+        "GET",
+        f"{settings.KEYCLOAK_URL}/admin/realms/{settings.REALM}/users",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    if resp.status_code == 200:
+        return [KeycloakUser(**user) for user in resp.json()]
+    if resp.status_code == 401:
+        _token_cache.clear()  # Revoked or expired early; the next call fetches a new token
+    raise KeycloakServiceException(resp.status_code, resp.text)
+
+
+async def get_users_page(first: int, max_results: int) -> List[Dict]:
+    """One page of the admin users list, as raw Keycloak representations (with `id` and `attributes`)."""
+    token = await get_keycloak_token()
+    if not token:
+        raise KeycloakTokenException()
+    resp = await _keycloak_request(
+        "list_users",
+        "GET",
+        f"{settings.KEYCLOAK_URL}/admin/realms/{settings.REALM}/users",
+        headers={"Authorization": f"Bearer {token}"},
+        params={"first": first, "max": max_results, "briefRepresentation": "false"},
+    )
+    if resp.status_code == 200:
+        return resp.json()
+    if resp.status_code == 401:
+        _token_cache.clear()
+    raise KeycloakServiceException(resp.status_code, resp.text)
 
 
 async def get_user_by_id(user_id: str) -> KeycloakUser:
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    return await _fetch_user_by_id(user_id)
+
+
+async def _fetch_user_by_id(user_id: str) -> KeycloakUser:
     token = await get_keycloak_token()
     if not token:
         raise KeycloakTokenException()
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{settings.KEYCLOAK_URL}/admin/realms/{settings.REALM}/users/{user_id}",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=10,
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return KeycloakUser(**data)
-        if resp.status_code == 404:
-            raise KeycloakUserNotFoundException(user_id)
-        raise InternalServerException
+    resp = await _keycloak_request(
+        "get_user",
+        "GET",
+        f"{settings.KEYCLOAK_URL}/admin/realms/{settings.REALM}/users/{user_id}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    if resp.status_code == 200:
+        user = KeycloakUser(**resp.json())
+        _user_cache.set(user_id, user)
+        return user
+    if resp.status_code == 404:
+        raise KeycloakUserNotFoundException(user_id)
+    if resp.status_code == 401:
+        _token_cache.clear()
+    raise InternalServerException
+
+
+def _forget_user_fetch(user_id: str, task: "asyncio.Task[KeycloakUser]") -> None:
+    _user_fetches.pop(user_id, None)
+    if not task.cancelled():
+        task.exception()  # Retrieved here, since the requests that timed out never await it
+
+
+def _background_user_fetch(user_id: str) -> "asyncio.Task[KeycloakUser]":
+    """
+    Fetch a profile in a task of its own (shared by concurrent lookups of the same user).
+
+    A request whose budget runs out stops waiting, but the call itself finishes: the circuit
+    breaker records its real duration (so a hanging Keycloak counts as slow and can open it)
+    and the profile is cached for the next request.
+    """
+    task = _user_fetches.get(user_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_user_by_id(user_id))
+        _user_fetches[user_id] = task
+        task.add_done_callback(lambda done: _forget_user_fetch(user_id, done))
+    return task
+
+
+async def preload_users(user_ids: List[str]) -> int:
+    """Fetch the given users into the profile cache. Returns how many were loaded."""
+    results = await asyncio.gather(*(get_user_by_id(user_id) for user_id in user_ids), return_exceptions=True)
+    return sum(1 for result in results if isinstance(result, KeycloakUser))
 
 async def get_all_users_safely() -> List[KeycloakUser]:
     """Fetch all users from Keycloak safely. No HTTPException is raised.
@@ -69,30 +234,64 @@ async def get_all_users_safely() -> List[KeycloakUser]:
         print(f"\nError fetching users from keycloak:\n{e}\n")
         return []
 
-async def get_user_by_id_safely(user_id: str, *, default_username: str = "", default_profile_pic_url: str = "", default_first_name: str = "", default_last_name: str = "") -> KeycloakUser:
+async def get_user_by_id_safely(user_id: str, *, default_username: str = "", default_profile_pic_url: str = "", default_first_name: str = "", default_last_name: str = "", raise_not_found: bool = False) -> KeycloakUser:
     """Fetch a user by ID from Keycloak safely. No HTTPException is raised.
 
     Args:
         user_id (str): The ID of the user to fetch.
         default_username (str, optional): The default username to return if the user is not found. Defaults to "".
         default_profile_pic_url (str, optional): The default profile picture URL to return if the user is not found. Defaults to "".
+        raise_not_found (bool, optional): Raise KeycloakUserNotFoundException for unknown users instead of returning the defaults.
+
+    Inside a request with a latency budget (see `app.core.budget`), the lookup is skipped once
+    the budget is spent, and the request stops waiting for it when the budget runs out mid-call
+    (the call itself completes in the background); the request is then marked as partially
+    enriched.
 
     Returns:
-        KeycloakUser: A KeycloakUser object or a user with default values if not found.
+        KeycloakUser: A KeycloakUser object, the last cached profile if Keycloak is unavailable
+        or the budget is spent, or a user with default values if not found.
     """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    budget = get_request_budget()
     try:
-        return await get_user_by_id(user_id)
+        if budget is None:
+            return await _fetch_user_by_id(user_id)
+        remaining = budget.remaining()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        return await asyncio.wait_for(asyncio.shield(_background_user_fetch(user_id)), remaining)
+    except asyncio.TimeoutError:
+        if budget is None:
+            raise
+        budget.skip()
+        stale = _user_cache.get_stale(user_id)
+        ENRICHMENT_SKIPPED.labels("cache" if stale is not None else "default").inc()
+        if stale is not None:
+            return stale
+    except KeycloakUnavailableException as e:
+        stale = _user_cache.get_stale(user_id)
+        if stale is not None:
+            return stale
+        if _breaker.state == "closed":  # While open, failures are expected; the breaker logs the transition
+            print(f"\nError fetching user {user_id} from keycloak:\n{e}\n")
+    except KeycloakUserNotFoundException:
+        if raise_not_found:
+            raise
+        print(f"\nError fetching user {user_id} from keycloak:\n{KeycloakUserNotFoundException(user_id)}\n")
     except HTTPException as e:
         print(f"\nError fetching user {user_id} from keycloak:\n{e}\n")
-        # Provide in the exact format as the Keycloak response
-        return KeycloakUser(**{
-            "username": default_username,
-            "attributes": {
-                "profilePicUrl": [default_profile_pic_url]
-            },
-            "firstName": default_first_name,
-            "lastName": default_last_name
-        })
+    # Provide in the exact format as the Keycloak response
+    return KeycloakUser(**{
+        "username": default_username,
+        "attributes": {
+            "profilePicUrl": [default_profile_pic_url]
+        },
+        "firstName": default_first_name,
+        "lastName": default_last_name
+    })
 
 async def check_keycloak_health() -> Dict:
     """
@@ -103,7 +302,7 @@ async def check_keycloak_health() -> Dict:
     
     try:
         start_time = time.time()
-        token = await get_keycloak_token()
+        token = await get_keycloak_token(use_cache=False)
         response_time = round((time.time() - start_time) * 1000, 2)  # Convert to milliseconds
         
         if token:
@@ -111,7 +310,8 @@ async def check_keycloak_health() -> Dict:
                 "status": "healthy",
                 "response_time_ms": response_time,
                 "authenticated": True,
-                "service": "keycloak"
+                "service": "keycloak",
+                "circuit_breaker": get_circuit_breaker_state()
             }
         else:
             return {
@@ -119,7 +319,8 @@ async def check_keycloak_health() -> Dict:
                 "response_time_ms": response_time,
                 "authenticated": False,
                 "service": "keycloak",
-                "error": "Failed to obtain token"
+                "error": "Failed to obtain token",
+                "circuit_breaker": get_circuit_breaker_state()
             }
     except Exception as e:
         return {
@@ -127,7 +328,8 @@ async def check_keycloak_health() -> Dict:
             "response_time_ms": None,
             "authenticated": False,
             "service": "keycloak",
-            "error": str(e)
+            "error": str(e),
+            "circuit_breaker": get_circuit_breaker_state()
         }
 
 if __name__ == "__main__":
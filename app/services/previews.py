@@ -0,0 +1,55 @@
+"""
+Backfill job for the stored `content_preview` of blog posts.
+
+`create_blog` and `update_blog` store a preview next to `content`, so the list views can
+leave `content` out of their queries. Posts written before that (or every post, after
+CONTENT_PREVIEW_LENGTH changes) need the preview computed once. Until a post has one, the
+list views load its content separately, so running this job is safe at any time.
+
+Run it once after deploying, and with --rebuild after changing the preview length:
+    python -m app.services.previews [--rebuild]
+"""
+
+from pymongo import UpdateOne
+from app.db.database import collection_blog, connect_to_mongo, close_mongo_connection
+from app.services.blog import build_content_preview
+
+BATCH_SIZE = 500
+
+
+async def backfill_content_previews(rebuild: bool = False) -> int:
+    """
+    Store `content_preview` on posts that have none (or on every post when `rebuild` is set).
+
+    Each update is conditional on the content it was computed from, so a post edited
+    concurrently keeps the preview written by `update_blog`.
+
+    Returns:
+        int: Number of posts updated
+    """
+    query = {} if rebuild else {"content_preview": None}
+    updated = 0
+    updates = []
+    async for doc in collection_blog.find(query, {"content": 1, "content_preview": 1}):
+        preview = build_content_preview(doc["content"])
+        if preview != doc.get("content_preview"):
+            updates.append(UpdateOne({"_id": doc["_id"], "content": doc["content"]}, {"$set": {"content_preview": preview}}))
+        if len(updates) >= BATCH_SIZE:
+            updated += (await collection_blog.bulk_write(updates, ordered=False)).modified_count
+            updates = []
+    if updates:
+        updated += (await collection_blog.bulk_write(updates, ordered=False)).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    async def main():
+        connect_to_mongo()
+        try:
+            print(f"Updated content_preview on {await backfill_content_previews(rebuild='--rebuild' in sys.argv[1:])} posts")
+        finally:
+            close_mongo_connection()
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Profile report storage.
+
+Reports produced by the profiling middleware are kept in a bounded on-disk ring buffer
+(`PROFILING_DIR`, at most `PROFILING_MAX_REPORTS` files); writing a new report removes
+the oldest ones. The debug endpoints list and download them.
+"""
+
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+# Report formats and the file extension they are stored with
+REPORT_EXTENSIONS = {"html": "html", "speedscope": "speedscope.json", "text": "txt"}
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9]+-[A-Z]+-[a-z0-9_-]*-[0-9a-f]{8}\.[a-z.]+$")
+
+
+def new_profile_id(method: str, path: str) -> str:
+    """Build a sortable, filesystem-safe file name for a new report."""
+    slug = re.sub(r"[^a-z0-9]+", "_", path.lower()).strip("_")[:60]
+    extension = REPORT_EXTENSIONS.get(settings.PROFILING_FORMAT, "html")
+    return f"{int(time.time() * 1000)}-{method.upper()}-{slug}-{uuid.uuid4().hex[:8]}.{extension}"
+
+
+def _report_files() -> List[str]:
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    return sorted(name for name in os.listdir(settings.PROFILING_DIR) if _PROFILE_ID_PATTERN.match(name))
+
+
+def save_profile_report(profile_id: str, report: str) -> None:
+    """Write a report and evict the oldest ones beyond `PROFILING_MAX_REPORTS`. Blocking; run off the event loop."""
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILING_DIR, profile_id), "w", encoding="utf-8") as report_file:
+        report_file.write(report)
+
+    files = _report_files()
+    for name in files[:max(len(files) - settings.PROFILING_MAX_REPORTS, 0)]:
+        try:
+            os.remove(os.path.join(settings.PROFILING_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profile_reports() -> List[Dict[str, Any]]:
+    """Stored reports, newest first."""
+    reports = []
+    for name in reversed(_report_files()):
+        file_path = os.path.join(settings.PROFILING_DIR, name)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        reports.append({
+            "profile_id": name,
+            "created_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+            "size_bytes": stat.st_size,
+        })
+    return reports
+
+
+def get_profile_report_path(profile_id: str) -> Optional[str]:
+    """Path of a stored report, or None if the id is malformed or the report was evicted."""
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    file_path = os.path.join(settings.PROFILING_DIR, profile_id)
+    return file_path if os.path.isfile(file_path) else None
@@ -0,0 +1,116 @@
+"""
+Readiness state for the orchestrator probes.
+
+`/live` only proves the event loop is answering. `/ready` reads the state kept here, so a
+probe never touches MongoDB or Keycloak itself:
+
+- starting: the lifespan (including the warm-up) has not finished yet
+- ready: started, not draining, and the last background MongoDB ping succeeded recently
+- draining: shutdown has begun (SIGTERM received or lifespan shutting down)
+
+A background task pings MongoDB every READINESS_CHECK_INTERVAL_SECONDS. Keycloak is not
+part of readiness: requests degrade to default profiles without it, and taking every worker
+out of rotation during a Keycloak outage would turn a degraded service into a down one.
+"""
+
+import asyncio
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.db.database import database
+
+
+class ReadinessChecker:
+    def __init__(self):
+        self.phase = "starting"
+        self.last_check: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.phase != "ready" or not self.last_check.get("ok"):
+            return False
+        # A stuck checker must not keep reporting an old success
+        max_age = 3 * settings.READINESS_CHECK_INTERVAL_SECONDS + settings.READINESS_CHECK_TIMEOUT_SECONDS
+        return time.monotonic() - self.last_check["checked_at"] <= max_age
+
+    async def check(self) -> Dict[str, Any]:
+        """Ping MongoDB once and record the outcome."""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(database.command("ping"), timeout=settings.READINESS_CHECK_TIMEOUT_SECONDS)
+            result = {"ok": True, "error": None}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result["checked_at"] = time.monotonic()
+        self.last_check = result
+        return result
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.READINESS_CHECK_INTERVAL_SECONDS)
+            await self.check()
+
+    async def start(self) -> None:
+        """Run a first check, mark the worker started and keep checking in the background."""
+        await self.check()
+        self.phase = "ready"
+        self._task = asyncio.create_task(self._run())
+        self._install_drain_handler()
+
+    async def stop(self) -> None:
+        self.begin_drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def begin_drain(self) -> None:
+        self.phase = "draining"
+
+    def _install_drain_handler(self) -> None:
+        """
+        On SIGTERM, report draining for READINESS_DRAIN_SECONDS while still serving, then hand
+        the signal to the server's own handler (which stops accepting and shuts down).
+        """
+        if settings.READINESS_DRAIN_SECONDS <= 0 or threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        server_handler = signal.getsignal(signal.SIGTERM)
+        if not callable(server_handler):
+            return
+
+        def handle_sigterm(signum, frame):
+            if self.phase == "draining":
+                return
+            self.begin_drain()
+            loop.call_soon_threadsafe(loop.call_later, settings.READINESS_DRAIN_SECONDS, server_handler, signum, None)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def snapshot(self) -> Dict[str, Any]:
+        mongo = None
+        if self.last_check:
+            mongo = {
+                "ok": self.last_check["ok"],
+                "latency_ms": self.last_check["latency_ms"],
+                "age_seconds": round(time.monotonic() - self.last_check["checked_at"], 2),
+                "error": self.last_check["error"],
+            }
+        if self.ready:
+            status = "ready"
+        elif self.phase == "ready":
+            status = "unready"  # Started, but the last MongoDB ping failed or is too old
+        else:
+            status = self.phase
+        return {"status": status, "checks": {"mongodb": mongo}}
+
+
+readiness = ReadinessChecker()
@@ -14,7 +14,7 @@ from datetime import datetime
 from typing import Dict, Any
 from fastapi import Request
 from app.schemas.blog import HealthCheckResponse, KeycloakHealth, DatabaseHealth
-from app.services.keycloak import check_keycloak_health
+from app.services.keycloak import check_keycloak_health, get_circuit_breaker_state
 from app.services.blog import check_database_health
 
 
@@ -44,7 +44,8 @@ async def get_comprehensive_health_check() -> Dict[str, Any]:
             response_time_ms=None,
             service="keycloak", 
             authenticated=False,
-            error=str(e)
+            error=str(e),
+            circuit_breaker=get_circuit_breaker_state()
         )
     
     try:
@@ -213,6 +214,31 @@ async def get_system_info() -> Dict[str, Any]:
     }
 
 
+async def get_mongo_command_stats() -> Dict[str, Any]:
+    """
+    Get aggregated MongoDB command statistics recorded by the command listener.
+    
+    Returns:
+        Dictionary containing per-collection, per-command counts, failures,
+        slow-command counts and latency (total/avg/max in milliseconds),
+        plus connection pool checkout counts and wait times
+    """
+    from app.core.config import settings
+    from app.db.database import command_stats, pool_stats
+    
+    return {
+        "message": "MongoDB command statistics",
+        "timestamp": datetime.utcnow().isoformat(),
+        "slow_query_threshold_ms": settings.MONGO_SLOW_QUERY_MS,
+        "collections": command_stats.snapshot(),
+        "connection_pool": {
+            "max_pool_size": settings.MONGODB_MAX_POOL_SIZE,
+            "min_pool_size": settings.MONGODB_MIN_POOL_SIZE,
+            **pool_stats.snapshot(),
+        },
+    }
+
+
 def is_debug_endpoint_enabled() -> bool:
     """
     Check if debug endpoints should be enabled based on environment.
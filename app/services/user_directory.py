@@ -0,0 +1,320 @@
+"""
+Local mirror of the Keycloak user directory in the User collection.
+
+Blogs, comments and replies carry a snapshot of their author's profile, stored at write
+time, so reads need no profile lookup at all:
+
+    "author": {"username": ..., "firstName": ..., "lastName": ..., "profilePicUrl": ...,
+               "version": "<hash of those fields>"}
+
+The snapshots are kept current from the mirror, one compact document per user:
+
+    {"_id": "<keycloak user id>", "username": ..., "firstName": ..., "lastName": ...,
+     "profilePicUrl": ..., "synced_at": ...}
+
+Documents without a snapshot (written before snapshots existed, or while Keycloak was
+unreachable) are enriched from the mirror, with one `$in` query per response.
+
+When a sync pass writes a changed profile, `refresh_author_snapshots()` rewrites that user's
+snapshots in bulk (one `UpdateMany` per user and collection, matching only snapshots of
+another version), which also fills in missing ones. To (re)write every snapshot, e.g. once
+after upgrading:
+    python -m app.services.user_directory --snapshots
+
+Keycloak is only used to fill the mirror:
+
+- `sync_user_directory()` pages through the admin users API (USER_DIRECTORY_PAGE_SIZE users
+  per call) and writes only the profiles that changed. Keycloak has no "modified since"
+  filter, so every pass reads all pages. Users that were not seen during a pass are checked
+  one by one, and blanked (served like an unknown user) once Keycloak confirms they are gone.
+  Run this module as a scheduled job (e.g. hourly):
+      python -m app.services.user_directory
+  With USER_DIRECTORY_SYNC_SECONDS above 0, every worker also runs a pass at start-up and then
+  at that interval; only use that with a single worker, as workers do not coordinate.
+- Authors missing from the mirror (e.g. signed up since the last pass) are looked up in
+  Keycloak on first use (with the usual cache, budget and breaker fallbacks) and stored,
+  and their snapshots are refreshed in the background.
+
+Profile changes made in Keycloak therefore show up after the next pass.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.core.config import settings
+from app.core.exceptions import KeycloakUserNotFoundException
+from app.core.response_cache import invalidate_public_responses
+from app.core.tasks import task_queue
+from app.db.database import collection_blog, collection_discussion, collection_user, collection_user_public
+from app.schemas.blog import KeycloakUser
+from app.services.keycloak import _fetch_user_by_id, get_user_by_id_safely, get_users_page
+
+PROFILE_FIELDS = ("username", "firstName", "lastName", "profilePicUrl")
+PROFILE_PROJECTION = dict.fromkeys(PROFILE_FIELDS, 1)
+SNAPSHOT_COLLECTIONS = (collection_blog, collection_discussion)
+BATCH_SIZE = 500
+
+# Snapshot refreshes for users read through on a request (see app.core.tasks)
+_snapshot_refreshes = task_queue("author_snapshots")
+
+# Served for content without an author and for users deleted from Keycloak
+UNKNOWN_USER = KeycloakUser(username="", firstName="", lastName="")
+
+
+def profile_document(user: KeycloakUser) -> Dict[str, str]:
+    return {field: getattr(user, field) for field in PROFILE_FIELDS}
+
+
+def profile_from_document(doc: Dict) -> KeycloakUser:
+    return KeycloakUser(**{field: doc.get(field) or "" for field in PROFILE_FIELDS})
+
+
+def profile_version(user: KeycloakUser) -> str:
+    return hashlib.blake2b("\x1f".join(profile_document(user).values()).encode(), digest_size=8).hexdigest()
+
+
+def _snapshot(user: KeycloakUser) -> Dict[str, str]:
+    return {**profile_document(user), "version": profile_version(user)}
+
+
+def author_snapshot(user: KeycloakUser) -> Optional[Dict[str, str]]:
+    """Author snapshot to store with a new document; None for the placeholder of an unknown or unreachable user."""
+    return _snapshot(user) if user.username else None
+
+
+async def _store_profile(user_id: str, user: KeycloakUser) -> None:
+    try:
+        await collection_user.update_one(
+            {"_id": user_id},
+            {"$set": {**profile_document(user), "synced_at": datetime.utcnow()}, "$unset": {"deleted": ""}},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"\nError storing the profile of user {user_id}:\n{e}\n")
+
+
+async def _mark_deleted(user_id: str, synced_at: datetime) -> None:
+    """Store a blank profile for a user Keycloak does not know, so reads stop looking them up."""
+    await collection_user.update_one(
+        {"_id": user_id},
+        {"$set": {**profile_document(UNKNOWN_USER), "deleted": True, "synced_at": synced_at}},
+        upsert=True,
+    )
+
+
+async def _read_through(user_id: str) -> KeycloakUser:
+    try:
+        user = await get_user_by_id_safely(user_id, raise_not_found=True)
+    except KeycloakUserNotFoundException:
+        try:
+            await _mark_deleted(user_id, datetime.utcnow())
+        except PyMongoError as e:
+            print(f"\nError storing the profile of user {user_id}:\n{e}\n")
+        return UNKNOWN_USER
+    if user.username:  # Not the placeholder returned while Keycloak is unavailable
+        await _store_profile(user_id, user)
+        try:
+            # Their older documents were written without a (current) snapshot
+            await _snapshot_refreshes.submit(refresh_author_snapshots, {user_id: user})
+        except PyMongoError as e:
+            print(f"\nError refreshing the author snapshots of user {user_id}:\n{e}\n")
+    return user
+
+
+async def get_user_profiles(user_ids: Iterable[Optional[str]]) -> Dict[Optional[str], KeycloakUser]:
+    """
+    Author profiles by user ID, with one query to the mirror.
+
+    Users not mirrored yet are read through from Keycloak; those it does not know are stored
+    blank, like users deleted from it. Every requested ID is in the result;
+    empty IDs map to `UNKNOWN_USER`.
+    """
+    user_ids = set(user_ids)
+    profiles: Dict[Optional[str], KeycloakUser] = {user_id: UNKNOWN_USER for user_id in user_ids if not user_id}
+    wanted = [user_id for user_id in user_ids if user_id]
+    if wanted:
+        try:
+            async for doc in collection_user_public.find({"_id": {"$in": wanted}}, PROFILE_PROJECTION):
+                profiles[doc["_id"]] = profile_from_document(doc)
+        except PyMongoError as e:
+            print(f"\nError reading user profiles, falling back to keycloak:\n{e}\n")
+    missing = [user_id for user_id in wanted if user_id not in profiles]
+    if missing:
+        profiles.update(zip(missing, await asyncio.gather(*(_read_through(user_id) for user_id in missing))))
+    return profiles
+
+
+async def get_user_profile(user_id: Optional[str]) -> KeycloakUser:
+    return (await get_user_profiles([user_id]))[user_id]
+
+
+def snapshot_profile(doc: Dict) -> Optional[KeycloakUser]:
+    """The author profile stored on a blog, comment or reply, if it has one."""
+    snapshot = doc.get("author")
+    return profile_from_document(snapshot) if snapshot else None
+
+
+async def get_author_profile(doc: Dict) -> KeycloakUser:
+    """Author profile of a blog, comment or reply: its snapshot, else the mirror."""
+    profile = snapshot_profile(doc)
+    return profile if profile is not None else await get_user_profile(doc.get("user_id"))
+
+
+async def author_profiles(docs: List[Dict]) -> List[KeycloakUser]:
+    """Author profiles of `docs`, in order: their snapshots, and one mirror query for the documents without one."""
+    profiles = [snapshot_profile(doc) for doc in docs]
+    missing = await get_user_profiles(doc.get("user_id") for doc, profile in zip(docs, profiles) if profile is None)
+    return [profile if profile is not None else missing[doc.get("user_id")] for doc, profile in zip(docs, profiles)]
+
+
+async def refresh_author_snapshots(profiles: Dict[str, KeycloakUser]) -> int:
+    """
+    Rewrite the author snapshots of the given users wherever their version differs (or is missing).
+
+    Returns:
+        int: Number of blogs, comments and replies updated
+    """
+    if not profiles:
+        return 0
+    updates = [
+        UpdateMany({"user_id": user_id, "author.version": {"$ne": snapshot["version"]}}, {"$set": {"author": snapshot}})
+        for user_id, snapshot in ((user_id, _snapshot(user)) for user_id, user in profiles.items())
+    ]
+    updated = 0
+    for collection in SNAPSHOT_COLLECTIONS:
+        updated += (await collection.bulk_write(updates, ordered=False)).modified_count
+    if updated:
+        invalidate_public_responses("blogs", "comments")
+    return updated
+
+
+async def backfill_author_snapshots() -> int:
+    """Refresh the snapshots of every mirrored user; returns the number of documents updated."""
+    updated = 0
+    batch: Dict[str, KeycloakUser] = {}
+    async for doc in collection_user.find({}, PROFILE_PROJECTION):
+        batch[doc["_id"]] = profile_from_document(doc)
+        if len(batch) >= BATCH_SIZE:
+            updated += await refresh_author_snapshots(batch)
+            batch = {}
+    return updated + await refresh_author_snapshots(batch)
+
+
+async def _sync_page(users: List[Dict], synced_at: datetime) -> Dict[str, KeycloakUser]:
+    """Upsert the changed profiles of one page and mark the whole page as seen; returns the changed profiles."""
+    users_by_id = {user["id"]: KeycloakUser(**{"firstName": "", "lastName": "", **user}) for user in users}
+    profiles = {user_id: profile_document(user) for user_id, user in users_by_id.items()}
+    stored = {doc["_id"]: doc async for doc in collection_user.find({"_id": {"$in": list(profiles)}}, {**PROFILE_PROJECTION, "deleted": 1})}
+    updates, unchanged = [], []
+    for user_id, profile in profiles.items():
+        doc = stored.get(user_id)
+        if doc is None or doc.get("deleted") or any(doc.get(field) != value for field, value in profile.items()):
+            updates.append(UpdateOne({"_id": user_id}, {"$set": {**profile, "synced_at": synced_at}, "$unset": {"deleted": ""}}, upsert=True))
+        else:
+            unchanged.append(user_id)
+    if updates:
+        await collection_user.bulk_write(updates, ordered=False)
+    if unchanged:
+        await collection_user.update_many({"_id": {"$in": unchanged}}, {"$set": {"synced_at": synced_at}})
+    return {user_id: user for user_id, user in users_by_id.items() if user_id not in unchanged}
+
+
+async def _remove_unseen(synced_at: datetime) -> Dict[str, KeycloakUser]:
+    """
+    Blank the profiles not seen by the pass that started at `synced_at` once Keycloak confirms the user is gone.
+
+    Returns:
+        dict: The stored profile of every unseen user, blank for the removed ones
+    """
+    checked = {}
+    unseen = [doc["_id"] async for doc in collection_user.find({"synced_at": {"$lt": synced_at}, "deleted": {"$ne": True}}, {"_id": 1})]
+    for user_id in unseen:
+        try:
+            # Offsets shift when users are added or deleted during a pass, so a missed user may still exist.
+            # Ask Keycloak itself: a cached profile would outlive the user.
+            checked[user_id] = await _fetch_user_by_id(user_id)
+            await _store_profile(user_id, checked[user_id])
+        except KeycloakUserNotFoundException:
+            await _mark_deleted(user_id, synced_at)
+            checked[user_id] = UNKNOWN_USER
+    return checked
+
+
+async def sync_user_directory() -> Dict[str, int]:
+    """
+    Bring the mirror up to date with Keycloak.
+
+    Returns:
+        dict: Users seen, profiles written, users removed and author snapshots rewritten
+    """
+    synced_at = datetime.utcnow()
+    report = {"seen": 0, "updated": 0, "removed": 0, "snapshots": 0}
+    page_size = settings.USER_DIRECTORY_PAGE_SIZE
+    while True:
+        users = await get_users_page(report["seen"], page_size)
+        if users:
+            changed = await _sync_page(users, synced_at)
+            report["updated"] += len(changed)
+            report["snapshots"] += await refresh_author_snapshots(changed)
+            report["seen"] += len(users)
+        if len(users) < page_size:
+            break
+    if report["seen"]:  # An empty listing is more likely a misconfigured realm than a deleted directory
+        checked = await _remove_unseen(synced_at)
+        report["removed"] = sum(1 for user in checked.values() if user is UNKNOWN_USER)
+        report["snapshots"] += await refresh_author_snapshots(checked)
+    return report
+
+
+class UserDirectorySync:
+    def __init__(self):
+        self.last_sync: Dict = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                report = await sync_user_directory()
+                self.last_sync = {**report, "finished_at": datetime.utcnow()}
+            except (HTTPException, PyMongoError) as e:
+                print(f"\nError syncing the user directory from keycloak:\n{e}\n")
+            await asyncio.sleep(settings.USER_DIRECTORY_SYNC_SECONDS)
+
+    async def start(self) -> None:
+        if settings.USER_DIRECTORY_SYNC_SECONDS > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+user_directory_sync = UserDirectorySync()
+
+
+if __name__ == "__main__":
+    import sys
+    from app.db.database import connect_to_mongo, close_mongo_connection
+    from app.services.keycloak import close_http_client
+
+    async def main():
+        connect_to_mongo()
+        try:
+            print(f"User directory synced: {await sync_user_directory()}")
+            if "--snapshots" in sys.argv[1:]:
+                print(f"Rewrote {await backfill_author_snapshots()} author snapshots")
+        finally:
+            await close_http_client()
+            close_mongo_connection()
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Approximate unique-viewer counts per blog (see `app.core.hyperloglog` for the error bound).
+
+Blog detail reads add the viewer (`X-User-ID`, or a hashed client fingerprint for anonymous
+readers) to an in-memory sketch of that blog. No I/O happens on the request path. Every
+UNIQUE_VIEWERS_FLUSH_SECONDS, or once UNIQUE_VIEWERS_MAX_PENDING blogs have pending
+sketches, each pending sketch is merged into the blog's stored sketch in the
+BlogViewerSketches collection. The merge is an optimistic read-merge-write on a `version`
+field. The resulting estimate is then stored as `unique_viewers` on the blog with `$max`,
+so it never goes backwards when workers flush out of order.
+
+Responses therefore show the count as of the last flush of any worker. Pending sketches of
+a worker that crashes are lost; a clean shutdown flushes them.
+"""
+
+from typing import Dict
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.core.config import settings
+from app.core.hyperloglog import HyperLogLog
+from app.core.periodic import PeriodicFlusher
+from app.db.database import collection_blog_counters, collection_blog_viewers
+
+MAX_MERGE_ATTEMPTS = 5
+
+
+class UniqueViewerTracker(PeriodicFlusher):
+    def __init__(self):
+        super().__init__()
+        self._pending: Dict[str, HyperLogLog] = {}
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return settings.UNIQUE_VIEWERS_FLUSH_SECONDS
+
+    def add(self, blog_id: str, viewer_id: str) -> None:
+        sketch = self._pending.get(blog_id)
+        if sketch is None:
+            sketch = self._pending[blog_id] = HyperLogLog(settings.UNIQUE_VIEWERS_PRECISION)
+            if len(self._pending) >= settings.UNIQUE_VIEWERS_MAX_PENDING:
+                self.request_flush()
+        sketch.add(viewer_id)
+
+    async def _merge(self, blog_id: str, sketch: HyperLogLog) -> int:
+        """Merge `sketch` into the stored sketch of the blog; returns the merged estimate."""
+        for _ in range(MAX_MERGE_ATTEMPTS):
+            doc = await collection_blog_viewers.find_one({"_id": blog_id})
+            if doc is None:
+                try:
+                    await collection_blog_viewers.insert_one({"_id": blog_id, "registers": sketch.to_bytes(), "version": 1})
+                    return sketch.count()
+                except DuplicateKeyError:
+                    continue  # Another worker stored the first sketch meanwhile
+            merged = HyperLogLog.from_bytes(doc["registers"])
+            merged.merge(sketch)
+            result = await collection_blog_viewers.update_one(
+                {"_id": blog_id, "version": doc["version"]},
+                {"$set": {"registers": merged.to_bytes()}, "$inc": {"version": 1}},
+            )
+            if result.matched_count:
+                return merged.count()
+        raise RuntimeError(f"Could not merge the unique-viewer sketch of blog {blog_id} after {MAX_MERGE_ATTEMPTS} attempts")
+
+    async def flush(self) -> int:
+        """
+        Persist every pending sketch.
+
+        Returns:
+            int: Number of blogs whose sketch was persisted
+        """
+        pending, self._pending = self._pending, {}
+        flushed = 0
+        for blog_id, sketch in pending.items():
+            try:
+                estimate = await self._merge(blog_id, sketch)
+                await collection_blog_counters.update_one({"_id": blog_id}, {"$max": {"unique_viewers": estimate}})
+                flushed += 1
+            except (PyMongoError, RuntimeError) as e:
+                print(f"\nError persisting unique viewers of blog {blog_id}:\n{e}\n")
+                # Merging is idempotent, so keep the sketch for the next flush
+                self._pending.setdefault(blog_id, HyperLogLog(sketch.precision)).merge(sketch)
+        return flushed
+
+    async def forget(self, blog_id: str) -> None:
+        """Drop the sketch of a deleted blog."""
+        self._pending.pop(blog_id, None)
+        await collection_blog_viewers.delete_one({"_id": blog_id})
+
+
+unique_viewers = UniqueViewerTracker()
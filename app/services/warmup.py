@@ -0,0 +1,62 @@
+"""
+Worker start-up warm-up.
+
+Run from the application lifespan before the worker accepts requests, so the first
+requests do not pay for opening the MongoDB pool, building indexes, fetching the Keycloak
+service token or mirroring the profiles of the most visible authors (see
+`app.services.user_directory`).
+
+Every step is best-effort: a failure is logged and the worker still starts, it just serves
+its first requests cold.
+"""
+
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+from app.db.database import collection_blog, database
+from app.db.indexes import ensure_indexes
+from app.services.keycloak import get_keycloak_token
+from app.services.user_directory import get_user_profiles
+
+
+async def recent_author_ids(limit: int) -> List[str]:
+    """Distinct authors of the `limit` most recent blogs, most recent first."""
+    cursor = collection_blog.find({}, {"user_id": 1}).sort("postedAt", -1).limit(limit)
+    author_ids = []
+    async for blog in cursor:
+        user_id = blog.get("user_id")
+        if user_id and user_id not in author_ids:
+            author_ids.append(user_id)
+    return author_ids
+
+
+async def warm_up() -> Dict:
+    """
+    Prepare this worker for traffic.
+
+    Returns:
+        dict: Duration in milliseconds of each step, and the step errors if any
+    """
+    report = {"steps_ms": {}, "errors": {}}
+
+    async def step(name, action):
+        start = time.perf_counter()
+        try:
+            result = await action()
+        except Exception as e:
+            print(f"\nError during warm-up step {name}:\n{e}\n")
+            report["errors"][name] = str(e)
+            result = None
+        report["steps_ms"][name] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    # Server selection and the first pooled connection happen on the first command
+    await step("mongo_ping", lambda: database.command("ping"))
+    await step("ensure_indexes", ensure_indexes)
+    await step("keycloak_token", get_keycloak_token)
+    if settings.WARMUP_RECENT_AUTHORS > 0:
+        author_ids = await step("recent_authors", lambda: recent_author_ids(settings.WARMUP_RECENT_AUTHORS)) or []
+        profiles = await step("preload_users", lambda: get_user_profiles(author_ids)) or {}
+        report["preloaded_users"] = sum(1 for profile in profiles.values() if profile.username)
+    return report
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the blog service. See the "Benchmarks" section of the README.
+"""
@@ -0,0 +1,134 @@
+"""
+Cold-start benchmark: first-request latency of a fresh worker with and without the start-up warm-up.
+
+Each trial starts a new Python process that imports the app, seeds the in-memory Motor
+stand-in, runs the application lifespan (startup) and then sends one request per scenario,
+twice. Keycloak is the mock transport with `--keycloak-latency-ms`.
+`cold` runs with WARMUP_ENABLED=false and `warm` with the warm-up. The report holds the
+median over `--trials` runs as JSON:
+
+- startup_ms: lifespan startup time. The worker accepts no requests until it finishes.
+- first_request_ms / second_request_ms: latency of the first request per scenario, and of
+  the same request sent again.
+
+Usage:
+    python -m benchmarks.coldstart --trials 5 --keycloak-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.environment import all_user_ids, configure_environment, install_database, install_keycloak, seed
+
+MODES = ("cold", "warm")
+SCENARIO_ORDER = ("list", "detail", "comments")
+
+
+async def run_child(args) -> Dict:
+    import httpx
+
+    start = time.perf_counter()
+    from app.core.config import settings
+    from app.main import app
+    import_ms = (time.perf_counter() - start) * 1000
+
+    from benchmarks.inmemory_mongo import InMemoryClient
+    from benchmarks.load import SCENARIOS
+    from benchmarks.mock_keycloak import MockKeycloak
+
+    install_database(InMemoryClient(latency_ms=args.mongo_latency_ms))
+    data = await seed(blogs=args.blogs)
+    install_keycloak(MockKeycloak(all_user_ids(data), latency_ms=args.keycloak_latency_ms))
+
+    prefix = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+    rng = random.Random(args.seed)
+    # The second pass repeats the same requests, so it shows the per-worker caches at work
+    requests = {name: SCENARIOS[name](data, rng) for name in SCENARIO_ORDER}
+    first, second = {}, {}
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup_ms = (time.perf_counter() - start) * 1000
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+            for results in (first, second):
+                for name, (method, path, kwargs) in requests.items():
+                    start = time.perf_counter()
+                    response = await client.request(method, prefix + path, **kwargs)
+                    results[name] = round((time.perf_counter() - start) * 1000, 3)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} returned {response.status_code}")
+    return {
+        "import_ms": round(import_ms, 3),
+        "startup_ms": round(startup_ms, 3),
+        "first_request_ms": first,
+        "second_request_ms": second,
+    }
+
+
+def run_trial(mode: str, args) -> Dict:
+    env = dict(os.environ, WARMUP_ENABLED="false" if mode == "cold" else "true")
+    command = [
+        sys.executable, "-m", "benchmarks.coldstart", "--child",
+        "--blogs", str(args.blogs),
+        "--mongo-latency-ms", str(args.mongo_latency_ms),
+        "--keycloak-latency-ms", str(args.keycloak_latency_ms),
+        "--seed", str(args.seed),
+    ]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    # The app prints its own start-up lines; the report is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _median(trials: List[Dict], key: str):
+    if isinstance(trials[0][key], dict):
+        return {name: round(statistics.median(trial[key][name] for trial in trials), 3) for name in trials[0][key]}
+    return round(statistics.median(trial[key] for trial in trials), 3)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=5, help="Fresh processes per mode; medians are reported")
+    parser.add_argument("--blogs", type=int, default=50)
+    parser.add_argument("--mongo-latency-ms", type=float, default=0.5, help="Per-operation latency of the in-memory stand-in")
+    parser.add_argument("--keycloak-latency-ms", type=float, default=20.0, help="Per-request latency of the mock Keycloak")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for the request targets")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        configure_environment(None)
+        print(json.dumps(asyncio.run(run_child(args))))
+        return
+
+    report = {
+        "benchmark": "coldstart",
+        "config": {
+            "trials": args.trials,
+            "blogs": args.blogs,
+            "mongo_latency_ms": args.mongo_latency_ms,
+            "keycloak_latency_ms": args.keycloak_latency_ms,
+        },
+        "modes": {},
+    }
+    for mode in MODES:
+        trials = [run_trial(mode, args) for _ in range(args.trials)]
+        report["modes"][mode] = {key: _median(trials, key) for key in trials[0]}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Shared set-up for the benchmarks: wires the application to a MongoDB (local mongod or the
+in-memory stand-in) and to the mock Keycloak, and seeds a reproducible data set.
+
+The app reads its settings at import time, so `configure_environment` must run before
+anything under `app` is imported.
+"""
+
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+DEFAULT_DB_NAME = "blog_benchmark"
+
+
+def configure_environment(mongo_url: Optional[str], db_name: str = DEFAULT_DB_NAME) -> None:
+    """Set the environment variables read by `app.core.config` (call before importing `app`)."""
+    os.environ["BLOG_MONGODB_DB_NAME"] = db_name
+    if mongo_url:
+        os.environ["BLOG_MONGODB_URL"] = mongo_url
+    os.environ.setdefault("ENVIRONMENT", "test")
+
+
+def install_database(client) -> None:
+    """Point the application at `client` (e.g. an `InMemoryClient`) instead of a real mongod."""
+    from app.db.database import close_mongo_connection, connect_to_mongo
+    close_mongo_connection()
+    connect_to_mongo(client)
+
+
+def install_keycloak(mock_keycloak) -> None:
+    from app.services.keycloak import set_http_transport
+    set_http_transport(mock_keycloak.transport())
+
+
+@dataclass
+class SeedData:
+    blog_ids: List[str] = field(default_factory=list)
+    blogs_with_comments: List[str] = field(default_factory=list)
+    author_ids: List[str] = field(default_factory=list)
+    reader_ids: List[str] = field(default_factory=list)
+
+
+async def seed(
+    blogs: int = 200,
+    authors: int = 40,
+    readers: int = 500,
+    comments_per_blog: int = 8,
+    replies_per_comment: int = 3,
+    reply_depth: int = 2,
+    content_length: int = 4000,
+    rng_seed: int = 42,
+) -> SeedData:
+    """Insert a reproducible data set through the application's own schemas and collections."""
+    from app.db import database as database_module
+    from app.schemas.blog import BlogPost, Comment, Reply
+    from app.services.blog import build_content_preview
+
+    rng = random.Random(rng_seed)
+    data = SeedData(
+        author_ids=[f"author{i}" for i in range(authors)],
+        reader_ids=[f"reader{i}" for i in range(readers)],
+    )
+    tags_pool = ["ml", "nlp", "vision", "rl", "math", "stats", "python", "systems"]
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+    base_time = datetime.utcnow() - timedelta(days=blogs)
+
+    blog_docs, discussion_docs = [], []
+    for i in range(blogs):
+        content = " ".join(rng.choice(words) for _ in range(content_length // 6))[:content_length]
+        blog = BlogPost(
+            comment_constraint=True,
+            tags=rng.sample(tags_pool, 2),
+            title=f"Benchmark post {i}",
+            content=content,
+            content_preview=build_content_preview(content),
+            user_id=rng.choice(data.author_ids),
+            number_of_views=rng.randint(0, 5000),
+            likes_count=0,
+            postedAt=base_time + timedelta(days=i),
+        )
+        blog_doc = blog.dict(by_alias=True)
+        data.blog_ids.append(blog_doc["_id"])
+        n_comments = comments_per_blog if i % 2 == 0 else 0
+        if n_comments:
+            data.blogs_with_comments.append(blog_doc["_id"])
+        blog_doc["comments_count"] = n_comments
+        blog_docs.append(blog_doc)
+
+        for _ in range(n_comments):
+            comment_doc = Comment(blogPost_id=blog_doc["_id"], text=" ".join(rng.choices(words, k=20)), user_id=rng.choice(data.reader_ids)).dict(by_alias=True)
+            comment_doc["replies_count"] = replies_per_comment
+            discussion_docs.append(comment_doc)
+            parents = [comment_doc]
+            for depth in range(reply_depth):
+                next_parents = []
+                for parent in parents:
+                    for _ in range(replies_per_comment if depth == 0 else 1):
+                        reply_doc = Reply(
+                            parentContent_id=parent["_id"],
+                            blogPost_id=blog_doc["_id"],
+                            path=parent["path"] + parent["_id"] + "/",
+                            text=" ".join(rng.choices(words, k=12)),
+                            user_id=rng.choice(data.reader_ids),
+                        ).dict(by_alias=True)
+                        reply_doc["replies_count"] = 1 if depth + 1 < reply_depth else 0
+                        discussion_docs.append(reply_doc)
+                        next_parents.append(reply_doc)
+                parents = next_parents
+
+    for collection, docs in ((database_module.collection_blog, blog_docs), (database_module.collection_discussion, discussion_docs)):
+        if docs:
+            await collection.insert_many(docs)
+    return data
+
+
+async def drop_database(db_name: str = DEFAULT_DB_NAME) -> None:
+    """Drop the benchmark database on a real mongod (no-op for the in-memory stand-in)."""
+    from app.db.database import get_client
+    drop = getattr(get_client(), "drop_database", None)
+    if drop is not None:
+        await drop(db_name)
+
+
+def all_user_ids(data: SeedData) -> List[str]:
+    return data.author_ids + data.reader_ids
+
+
+def summarize_latencies(latencies_seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds (nearest-rank percentiles)."""
+    if not latencies_seconds:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(latencies_seconds)
+
+    def percentile(p: float) -> float:
+        index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+        return ordered[index] * 1000
+
+    return {
+        "p50": round(percentile(50), 3),
+        "p95": round(percentile(95), 3),
+        "p99": round(percentile(99), 3),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
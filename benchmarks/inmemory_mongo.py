@@ -0,0 +1,514 @@
+"""
+In-memory stand-in for the subset of the Motor API used by the blog service.
+
+Good enough to drive the service end-to-end in benchmarks without a mongod: documents
+are deep-copied on the way in and out like a real driver would, and every operation can
+be given an artificial round-trip latency so that call counts show up in the numbers.
+It is not a general MongoDB emulator.
+"""
+
+import asyncio
+import copy
+import re
+from typing import Any, Dict, List, Optional
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_count: int = 0):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_count = upserted_count
+        self.acknowledged = True
+
+
+# ============================================================================
+# Query matching, projection and update evaluation
+# ============================================================================
+
+_MISSING = object()
+
+
+def _get_path(doc: Dict, path: str):
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(doc: Dict, path: str, value) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc: Dict, path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part, {})
+    doc.pop(parts[-1], None)
+
+
+def _compare(value, operand, op: str) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return {"$gt": value > operand, "$gte": value >= operand, "$lt": value < operand, "$lte": value <= operand}[op]
+    except TypeError:
+        return False
+
+
+def _equals(value, expected) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def _match_condition(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$in":
+                if not any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$nin":
+                if any(_equals(value, item) for item in operand):
+                    return False
+            elif op == "$ne":
+                if _equals(value, operand):
+                    return False
+            elif op == "$eq":
+                if not _equals(value, operand):
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not _compare(value, operand, op):
+                    return False
+            elif op == "$regex":
+                if not isinstance(value, str) or not re.search(operand, value):
+                    return False
+            else:
+                raise NotImplementedError(f"Query operator {op} is not supported by the in-memory store")
+        return True
+    return _equals(value, condition)
+
+
+def matches(doc: Dict, query: Optional[Dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif not _match_condition(_get_path(doc, key), condition):
+            return False
+    return True
+
+
+def project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and all(value for value in fields.values()):
+        result = {key: copy.deepcopy(doc[key]) for key in fields if key in doc}
+        if include_id and "_id" in doc:
+            result = {"_id": doc["_id"], **result}
+        return result
+    result = {key: copy.deepcopy(value) for key, value in doc.items() if key not in fields}
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+def evaluate(expression, doc: Dict):
+    """Evaluate the aggregation expressions used in pipeline-style updates."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [evaluate(item, doc) for item in expression]
+    if isinstance(expression, dict) and len(expression) == 1:
+        op, args = next(iter(expression.items()))
+        if op.startswith("$"):
+            values = evaluate(args, doc) if isinstance(args, list) else [evaluate(args, doc)]
+            if op == "$add":
+                return sum(values)
+            if op == "$subtract":
+                return values[0] - values[1]
+            if op == "$max":
+                return max(values)
+            if op == "$min":
+                return min(values)
+            if op == "$ifNull":
+                return next((value for value in values if value is not None), None)
+            if op == "$literal":
+                return args
+            raise NotImplementedError(f"Expression operator {op} is not supported by the in-memory store")
+    if isinstance(expression, dict):
+        return {key: evaluate(value, doc) for key, value in expression.items()}
+    return expression
+
+
+def apply_update(doc: Dict, update, is_insert: bool = False) -> None:
+    if isinstance(update, list):
+        for stage in update:
+            for op, spec in stage.items():
+                if op in ("$set", "$addFields"):
+                    for path, expression in spec.items():
+                        _set_path(doc, path, evaluate(expression, doc))
+                elif op == "$unset":
+                    for path in ([spec] if isinstance(spec, str) else spec):
+                        _unset_path(doc, path)
+                else:
+                    raise NotImplementedError(f"Pipeline stage {op} is not supported by the in-memory store")
+        return
+
+    for op, spec in update.items():
+        for path, value in spec.items():
+            current = _get_path(doc, path)
+            if op == "$set":
+                _set_path(doc, path, copy.deepcopy(value))
+            elif op == "$setOnInsert":
+                if is_insert:
+                    _set_path(doc, path, copy.deepcopy(value))
+            elif op == "$inc":
+                _set_path(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$max":
+                if current is _MISSING or value > current:
+                    _set_path(doc, path, value)
+            elif op == "$min":
+                if current is _MISSING or value < current:
+                    _set_path(doc, path, value)
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$push":
+                _set_path(doc, path, ([] if current is _MISSING else current) + [copy.deepcopy(value)])
+            elif op == "$addToSet":
+                existing = [] if current is _MISSING else current
+                if value not in existing:
+                    _set_path(doc, path, existing + [copy.deepcopy(value)])
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the in-memory store")
+
+
+# ============================================================================
+# Motor-like collection, cursor, database and client
+# ============================================================================
+
+class InMemoryCursor:
+    def __init__(self, collection: "InMemoryCollection", query: Optional[Dict], projection: Optional[Dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[Dict]] = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "InMemoryCursor":
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def skip(self, count: int) -> "InMemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    async def _load(self) -> List[Dict]:
+        if self._results is None:
+            await self._collection._round_trip()
+            docs = [doc for doc in self._collection._candidates(self._query) if matches(doc, self._query)]
+            for key, direction in reversed(self._sort):
+                docs.sort(key=lambda doc: (_get_path(doc, key) is _MISSING, _get_path(doc, key)), reverse=direction < 0)
+            docs = docs[self._skip:]
+            if self._limit:
+                docs = docs[:self._limit]
+            self._results = [project(doc, self._projection) for doc in docs]
+        return self._results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self._load():
+            yield doc
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        docs = await self._load()
+        return docs[:length] if length else list(docs)
+
+
+class InMemoryCollection:
+    def __init__(self, database: "InMemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._docs: Dict[Any, Dict] = {}
+
+    async def _round_trip(self) -> None:
+        self.database.client.operation_count += 1
+        if self.database.client.latency_seconds:
+            await asyncio.sleep(self.database.client.latency_seconds)
+        else:
+            await asyncio.sleep(0)
+
+    def _candidates(self, query: Optional[Dict]) -> List[Dict]:
+        """Documents that may match `query`: looked up by `_id` (like the server's _id index) when the query pins it."""
+        id_condition = (query or {}).get("_id", _MISSING)
+        if id_condition is _MISSING or (isinstance(id_condition, dict) and set(id_condition) != {"$in"}):
+            return list(self._docs.values())
+        ids = id_condition["$in"] if isinstance(id_condition, dict) else [id_condition]
+        return [self._docs[doc_id] for doc_id in dict.fromkeys(ids) if doc_id in self._docs]
+
+    def with_options(self, **kwargs) -> "InMemoryCollection":
+        return self
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, **kwargs):
+        await self._round_trip()
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, **kwargs) -> InMemoryCursor:
+        return InMemoryCursor(self, query, projection)
+
+    async def insert_one(self, document: Dict, **kwargs) -> InsertOneResult:
+        await self._round_trip()
+        doc = copy.deepcopy(document)
+        if doc["_id"] in self._docs:
+            raise ValueError(f"Duplicate key {doc['_id']} in {self.name}")
+        self._docs[doc["_id"]] = doc
+        return InsertOneResult(doc["_id"])
+
+    async def insert_many(self, documents: List[Dict], **kwargs) -> None:
+        await self._round_trip()
+        for document in documents:
+            doc = copy.deepcopy(document)
+            self._docs[doc["_id"]] = doc
+
+    def _upsert_document(self, query: Dict, update) -> Dict:
+        doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        apply_update(doc, update, is_insert=True)
+        if "_id" not in doc:
+            raise NotImplementedError("Upserts without an _id in the filter are not supported by the in-memory store")
+        self._docs[doc["_id"]] = doc
+        return doc
+
+    async def update_one(self, query: Dict, update, upsert: bool = False, **kwargs) -> UpdateResult:
+        await self._round_trip()
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                apply_update(doc, update)
+                return UpdateResult(1, int(before != doc))
+        if upsert:
+            doc = self._upsert_document(query, update)
+            return UpdateResult(0, 0, doc["_id"])
+        return UpdateResult(0, 0)
+
+    async def update_many(self, query: Dict, update, **kwargs) -> UpdateResult:
+        await self._round_trip()
+        matched = modified = 0
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                apply_update(doc, update)
+                matched += 1
+                modified += int(before != doc)
+        return UpdateResult(matched, modified)
+
+    async def find_one_and_update(self, query: Dict, update, projection: Optional[Dict] = None, return_document: bool = False, upsert: bool = False, **kwargs):
+        await self._round_trip()
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                before = project(doc, projection)
+                apply_update(doc, update)
+                return project(doc, projection) if return_document else before
+        if upsert:
+            doc = self._upsert_document(query, update)
+            return project(doc, projection) if return_document else None
+        return None
+
+    async def find_one_and_delete(self, query: Dict, projection: Optional[Dict] = None, **kwargs):
+        await self._round_trip()
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                del self._docs[doc["_id"]]
+                return project(doc, projection)
+        return None
+
+    async def delete_one(self, query: Dict, **kwargs) -> DeleteResult:
+        await self._round_trip()
+        for key, doc in list(self._docs.items()):
+            if matches(doc, query):
+                del self._docs[key]
+                return DeleteResult(1)
+        return DeleteResult(0)
+
+    async def delete_many(self, query: Dict, **kwargs) -> DeleteResult:
+        await self._round_trip()
+        keys = [key for key, doc in self._docs.items() if matches(doc, query)]
+        for key in keys:
+            del self._docs[key]
+        return DeleteResult(len(keys))
+
+    async def count_documents(self, query: Dict, **kwargs) -> int:
+        await self._round_trip()
+        return sum(1 for doc in self._docs.values() if matches(doc, query))
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        await self._round_trip()
+        return len(self._docs)
+
+    async def bulk_write(self, requests: List, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        await self._round_trip()
+        matched = modified = upserted = 0
+        for request in requests:
+            spec = request._doc if hasattr(request, "_doc") else request
+            query = getattr(request, "_filter", None)
+            upsert = bool(getattr(request, "_upsert", False))
+            many = type(request).__name__ == "UpdateMany"
+            request_matched = 0
+            for doc in self._candidates(query):
+                if matches(doc, query):
+                    before = copy.deepcopy(doc)
+                    apply_update(doc, spec)
+                    request_matched += 1
+                    modified += int(before != doc)
+                    if not many:
+                        break
+            matched += request_matched
+            if not request_matched:
+                if upsert:
+                    self._upsert_document(query, spec)
+                    upserted += 1
+        return BulkWriteResult(matched, modified, upserted)
+
+    def aggregate(self, pipeline: List[Dict], **kwargs) -> "InMemoryAggregateCursor":
+        return InMemoryAggregateCursor(self, pipeline)
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return "_".join(f"{key}_{direction}" for key, direction in (keys if isinstance(keys, list) else [(keys, 1)]))
+
+    async def create_indexes(self, indexes, **kwargs) -> List[str]:
+        return [getattr(index, "document", {}).get("name", "") for index in indexes]
+
+
+class InMemoryAggregateCursor:
+    """Supports the `$match`/`$group` (with `$sum`) pipelines used by maintenance jobs."""
+
+    def __init__(self, collection: InMemoryCollection, pipeline: List[Dict]):
+        self._collection = collection
+        self._pipeline = pipeline
+
+    async def _run(self) -> List[Dict]:
+        await self._collection._round_trip()
+        docs = [copy.deepcopy(doc) for doc in self._collection._docs.values()]
+        for stage in self._pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif op == "$group":
+                groups: Dict[Any, Dict] = {}
+                for doc in docs:
+                    key = evaluate(spec["_id"], doc)
+                    group = groups.setdefault(key, {"_id": key})
+                    for field, accumulator in spec.items():
+                        if field == "_id":
+                            continue
+                        (acc_op, acc_arg), = accumulator.items()
+                        if acc_op != "$sum":
+                            raise NotImplementedError(f"Accumulator {acc_op} is not supported by the in-memory store")
+                        group[field] = group.get(field, 0) + evaluate(acc_arg, doc)
+                docs = list(groups.values())
+            elif op == "$project":
+                docs = [project(doc, spec) for doc in docs]
+            elif op == "$limit":
+                docs = docs[:spec]
+            else:
+                raise NotImplementedError(f"Aggregation stage {op} is not supported by the in-memory store")
+        return docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in await self._run():
+            yield doc
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        docs = await self._run()
+        return docs[:length] if length else docs
+
+
+class InMemoryDatabase:
+    def __init__(self, client: "InMemoryClient", name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self, name)
+        return self._collections[name]
+
+    def get_collection(self, name: str, **kwargs) -> InMemoryCollection:
+        return self[name]
+
+    async def command(self, command, *args, **kwargs) -> Dict:
+        await asyncio.sleep(self.client.latency_seconds)
+        return {"ok": 1.0}
+
+
+class InMemoryClient:
+    """
+    Args:
+        latency_ms: Artificial round-trip latency added to every operation.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_seconds = latency_ms / 1000
+        self.operation_count = 0
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(self, name)
+        return self._databases[name]
+
+    def get_database(self, name: str, **kwargs) -> InMemoryDatabase:
+        return self[name]
+
+    def close(self) -> None:
+        pass
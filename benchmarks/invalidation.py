@@ -0,0 +1,96 @@
+"""
+Change-stream invalidation benchmark: how long a write made outside this worker takes to
+drop the affected public response cache entry.
+
+Needs a MongoDB replica set (a single-node one is enough, see the README). The benchmark
+seeds a small data set, starts the change stream watcher, and then `--writes` times caches a
+comment tree for a random blog, inserts a comment into that blog directly through the
+collection (bypassing the service's own invalidation, as a write from another node would)
+and waits until the entry is gone. The report holds the propagation lag percentiles and
+the number of writes that were not seen within `--timeout-ms`.
+
+Usage:
+    python -m benchmarks.invalidation --mongo-url "mongodb://localhost:27017/?replicaSet=rs0"
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict
+
+from benchmarks.environment import DEFAULT_DB_NAME, configure_environment, drop_database, seed, summarize_latencies
+
+
+async def run(args) -> Dict:
+    from app.core.config import settings
+    from app.core.response_cache import CachedResponse, public_responses
+    from app.db.database import close_mongo_connection, collection_discussion, connect_to_mongo
+    from app.schemas.blog import Comment
+    from app.services.invalidation import cache_invalidator
+
+    connect_to_mongo()
+    try:
+        data = await seed(blogs=args.blogs)
+        await cache_invalidator.start()
+        deadline = time.monotonic() + args.timeout_ms / 1000
+        while cache_invalidator.state != "watching" and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        if cache_invalidator.state != "watching":
+            raise SystemExit(f"Change stream watcher did not start (state: {cache_invalidator.state}, error: {cache_invalidator.last_error})")
+
+        rng = random.Random(args.seed)
+        prefix = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+        lags, missed = [], 0
+        for _ in range(args.writes):
+            blog_id = rng.choice(data.blog_ids)
+            key = (f"{prefix}/public/blog/{blog_id}/comments", b"")
+            public_responses.set(key, CachedResponse(200, [], b"[]", ("comments", f"blog:{blog_id}")), public_responses.generation)
+
+            start = time.perf_counter()
+            comment = Comment(blogPost_id=blog_id, text="invalidation benchmark", user_id=rng.choice(data.reader_ids))
+            await collection_discussion.insert_one(comment.dict(by_alias=True))
+            while public_responses.get(key) is not None and (time.perf_counter() - start) * 1000 < args.timeout_ms:
+                await asyncio.sleep(0.001)
+            if public_responses.get(key) is None:
+                lags.append(time.perf_counter() - start)
+            else:
+                missed += 1
+                public_responses.clear()
+    finally:
+        await cache_invalidator.stop()
+        await drop_database(args.mongo_db)
+        close_mongo_connection()
+
+    return {
+        "benchmark": "invalidation",
+        "config": {"blogs": args.blogs, "writes": args.writes, "timeout_ms": args.timeout_ms},
+        "lag_ms": summarize_latencies(lags),
+        "missed": missed,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", required=True, help="Replica set connection string")
+    parser.add_argument("--mongo-db", default=DEFAULT_DB_NAME, help="Scratch database, dropped afterwards")
+    parser.add_argument("--blogs", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--timeout-ms", type=float, default=5000, help="Count a write as missed after this long")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    configure_environment(args.mongo_url, args.mongo_db)
+    output = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+End-to-end async load benchmark.
+
+Runs the FastAPI app in-process through `httpx.ASGITransport`, against a local mongod
+(`--mongo-url`) or the in-memory Motor stand-in, with Keycloak replaced by an
+`httpx.MockTransport` of configurable latency. Weighted scenarios (blog list, blog detail,
+comment tree, like/unlike) are replayed at each concurrency level and p50/p95/p99 latency
+and requests per second are reported as JSON.
+
+Usage:
+    python -m benchmarks.load --concurrency 1,10,50 --requests 1000 --output bench.json
+    python -m benchmarks.load --mongo-url mongodb://localhost:27017 --keycloak-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.environment import (
+    DEFAULT_DB_NAME, SeedData, all_user_ids, configure_environment, drop_database,
+    install_database, install_keycloak, seed, summarize_latencies,
+)
+
+DEFAULT_MIX = "list=3,detail=4,comments=2,like=1"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Known: {', '.join(SCENARIOS)}")
+    return weights
+
+
+# Each scenario builds (method, path, kwargs) for one request
+def _list(data: SeedData, rng: random.Random) -> Tuple[str, str, Dict]:
+    return "GET", "/public/blogs", {}
+
+
+def _detail(data: SeedData, rng: random.Random) -> Tuple[str, str, Dict]:
+    return "GET", f"/public/blog/{rng.choice(data.blog_ids)}", {}
+
+
+def _comments(data: SeedData, rng: random.Random) -> Tuple[str, str, Dict]:
+    return "GET", f"/public/blog/{rng.choice(data.blogs_with_comments)}/comments", {}
+
+
+def _like(data: SeedData, rng: random.Random) -> Tuple[str, str, Dict]:
+    return "POST", f"/blog/{rng.choice(data.blog_ids)}/like", {
+        "json": {"like_value": rng.randint(0, 1)},
+        "headers": {"X-User-ID": rng.choice(data.reader_ids)},
+    }
+
+
+SCENARIOS = {"list": _list, "detail": _detail, "comments": _comments, "like": _like}
+
+
+async def run_level(client, data: SeedData, prefix: str, weights: Dict[str, float], concurrency: int, total_requests: int, rng_seed: int) -> Dict:
+    rng = random.Random(rng_seed)
+    names = list(weights)
+    plan = rng.choices(names, weights=[weights[name] for name in names], k=total_requests)
+    requests = [(name, *SCENARIOS[name](data, rng)) for name in plan]
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(requests):
+            name, method, path, kwargs = requests[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.request(method, prefix + path, **kwargs)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "duration_s": round(duration, 3),
+        "requests_per_second": round(total_requests / duration, 2) if duration else 0.0,
+        "errors": sum(errors.values()),
+        "latency_ms": summarize_latencies(all_latencies),
+        "scenarios": {
+            name: {
+                "requests": len(values),
+                "errors": errors[name],
+                "latency_ms": summarize_latencies(values),
+            }
+            for name, values in sorted(latencies.items())
+        },
+    }
+
+
+async def run(args) -> Dict:
+    import httpx
+    from benchmarks.mock_keycloak import MockKeycloak
+
+    from app.core.config import settings
+    from app.db.database import close_mongo_connection, connect_to_mongo
+    from app.main import app
+
+    if args.mongo_url:
+        connect_to_mongo()
+    else:
+        from benchmarks.inmemory_mongo import InMemoryClient
+        install_database(InMemoryClient(latency_ms=args.mongo_latency_ms))
+
+    weights = parse_mix(args.mix)
+    prefix = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+    levels = []
+    data = await seed(blogs=args.blogs, comments_per_blog=args.comments_per_blog, replies_per_comment=args.replies_per_comment, reply_depth=args.reply_depth)
+    keycloak = MockKeycloak(all_user_ids(data), latency_ms=args.keycloak_latency_ms)
+    install_keycloak(keycloak)
+    try:
+        # ASGITransport does not send lifespan events, so run the app's lifespan (and warm-up) explicitly
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                # Warm-up pass so imports and first-call set-up do not skew the first level
+                await run_level(client, data, prefix, weights, 1, min(args.warmup, args.requests), args.seed)
+                for concurrency in args.concurrency:
+                    levels.append(await run_level(client, data, prefix, weights, concurrency, args.requests, args.seed + concurrency))
+            if args.mongo_url:
+                await drop_database(args.mongo_db)
+    finally:
+        if args.mongo_url:
+            close_mongo_connection()
+
+    return {
+        "benchmark": "load",
+        "config": {
+            "mongo": args.mongo_url or "in-memory",
+            "mongo_latency_ms": None if args.mongo_url else args.mongo_latency_ms,
+            "keycloak_latency_ms": args.keycloak_latency_ms,
+            "blogs": args.blogs,
+            "comments_per_blog": args.comments_per_blog,
+            "replies_per_comment": args.replies_per_comment,
+            "reply_depth": args.reply_depth,
+            "mix": weights,
+        },
+        "keycloak_requests": keycloak.request_count,
+        "levels": levels,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")], default=[1, 10, 50], help="Comma-separated concurrency levels (default: 1,10,50)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=50, help="Warm-up requests before the first level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--mongo-url", default=None, help="Local mongod URL; omit to use the in-memory stand-in")
+    parser.add_argument("--mongo-db", default=DEFAULT_DB_NAME, help="Database to seed (dropped afterwards on a real mongod)")
+    parser.add_argument("--mongo-latency-ms", type=float, default=0.5, help="Per-operation latency of the in-memory stand-in")
+    parser.add_argument("--keycloak-latency-ms", type=float, default=5.0, help="Per-request latency of the mock Keycloak")
+    parser.add_argument("--blogs", type=int, default=200)
+    parser.add_argument("--comments-per-blog", type=int, default=8)
+    parser.add_argument("--replies-per-comment", type=int, default=3)
+    parser.add_argument("--reply-depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for the request plan")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    configure_environment(args.mongo_url, args.mongo_db)
+    # Keep the app's own prints (start-up, errors) out of the JSON report on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
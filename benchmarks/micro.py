@@ -0,0 +1,218 @@
+"""
+Micro-benchmark regression gate for per-document hot-path helpers.
+
+Times the helpers that run once per document on every list/detail/comment request and
+compares them with the stored baseline (`benchmarks/micro_baseline.json`). Exits with
+status 1 when any benchmark is slower than the baseline by more than `--threshold` percent.
+
+Each result is stored both in nanoseconds per call and relative to a fixed pure-Python
+calibration loop measured in the same run. The gate compares the relative numbers, so a
+baseline recorded on one machine stays usable on a faster or slower one.
+
+Usage:
+    python -m benchmarks.micro                      # compare with the baseline
+    python -m benchmarks.micro --threshold 15       # stricter gate
+    python -m benchmarks.micro --update-baseline    # record a new baseline after an intended change
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from benchmarks.environment import configure_environment, install_database
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "micro_baseline.json")
+DEFAULT_THRESHOLD_PERCENT = 25.0
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory. The factory does the set-up and returns the callable to time."""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def _keycloak_payload(user_id: str) -> Dict:
+    from benchmarks.mock_keycloak import make_user
+    return make_user(user_id)
+
+
+def _blog_document(content_length: int = 4000) -> Dict:
+    from app.schemas.blog import BlogPost
+    blog = BlogPost(
+        comment_constraint=True,
+        tags=["ml", "python"],
+        title="Micro-benchmark post",
+        content=("lorem ipsum dolor sit amet " * (content_length // 27 + 1))[:content_length],
+        user_id="author0",
+        number_of_views=1234,
+        likes_count=56,
+        postedAt=datetime(2025, 1, 1) + timedelta(hours=3),
+    )
+    return blog.model_dump(by_alias=True)
+
+
+def calibration_loop() -> Callable[[], int]:
+    """Fixed pure-Python workload used to normalise results across machines."""
+    def run():
+        total = 0
+        mapping = {}
+        for i in range(200):
+            mapping[str(i)] = i
+            total += mapping[str(i)] * 2
+        return total
+    return run
+
+
+@benchmark("convert_mongo_doc_to_dict")
+def bench_convert_mongo_doc_to_dict():
+    from app.services.blog import convert_mongo_doc_to_dict
+    doc = _blog_document()
+    return lambda: convert_mongo_doc_to_dict(doc)
+
+
+@benchmark("to_all_blogs_blog_post")
+def bench_to_all_blogs_blog_post():
+    # AllBlogsBlogPost construction, once per blog in get_all_blogs (list queries project out `content`)
+    from app.schemas.blog import KeycloakUser
+    from app.services.blog import LIST_PROJECTION, build_content_preview, to_all_blogs_blog_post
+    doc = _blog_document()
+    doc["content_preview"] = build_content_preview(doc["content"])
+    for field in LIST_PROJECTION:
+        del doc[field]
+    user = KeycloakUser(**_keycloak_payload("author0"))
+    return lambda: to_all_blogs_blog_post(doc, user)
+
+
+@benchmark("keycloak_user_validation")
+def bench_keycloak_user_validation():
+    # KeycloakUser's before-validator lifts profilePicUrl out of the attributes
+    from app.schemas.blog import KeycloakUser
+    payload = _keycloak_payload("author0")
+    return lambda: KeycloakUser(**payload)
+
+
+@benchmark("fetch_replies_tree")
+def bench_fetch_replies_tree():
+    # Tree assembly for one comment with 3 replies, each with a 2-level chain (9 replies),
+    # with Mongo in memory (no latency) and author lookups stubbed out
+    import app.services.blog as blog_service
+    from app.schemas.blog import Comment, KeycloakUser, Reply
+    from benchmarks.inmemory_mongo import InMemoryClient
+
+    install_database(InMemoryClient(latency_ms=0))
+    user = KeycloakUser(**_keycloak_payload("reader0"))
+
+    async def lookup_users(user_ids):
+        return {user_id: user for user_id in user_ids}
+
+    loop = asyncio.new_event_loop()
+    root_id = "comment-root"
+    docs = [Comment.model_validate({"_id": root_id, "blogPost_id": "blog-root", "text": "comment", "user_id": "reader0"}).model_dump(by_alias=True)]
+    for i in range(3):
+        parent = docs[0]
+        for depth in range(3):
+            child = Reply(parentContent_id=parent["_id"], blogPost_id="blog-root", path=parent["path"] + parent["_id"] + "/", text=f"reply {i}.{depth}", user_id="reader0").model_dump(by_alias=True)
+            docs.append(child)
+            parent = child
+    loop.run_until_complete(blog_service.collection_discussion.insert_many(docs))
+
+    def run():
+        original = blog_service.get_user_profiles
+        blog_service.get_user_profiles = lookup_users
+        try:
+            return loop.run_until_complete(blog_service.fetch_replies(root_id))
+        finally:
+            blog_service.get_user_profiles = original
+
+    nodes = list(blog_service._discussion_nodes(run()))
+    assert len(nodes) == len(docs) - 1, f"fetch_replies returned {len(nodes)} of {len(docs) - 1} replies"
+    return run
+
+
+def _calls_per_sample(timer: timeit.Timer, target_seconds: float = 0.02) -> int:
+    number = 1
+    while timer.timeit(number) < target_seconds:
+        number *= 2
+    return number
+
+
+def measure(run: Callable[[], object], calibration: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Best-of-`repeat` time per call in nanoseconds, for the benchmark and for the calibration
+    loop sampled alternately with it, so that both see the same machine conditions.
+    """
+    timer, calibration_timer = timeit.Timer(run), timeit.Timer(calibration)
+    number, calibration_number = _calls_per_sample(timer), _calls_per_sample(calibration_timer)
+    best = best_calibration = float("inf")
+    for _ in range(repeat):
+        best_calibration = min(best_calibration, calibration_timer.timeit(calibration_number) / calibration_number)
+        best = min(best, timer.timeit(number) / number)
+    return {"ns_per_call": round(best * 1e9, 1), "relative": round(best / best_calibration, 4)}
+
+
+def run_benchmarks(repeat: int) -> Dict:
+    calibration = calibration_loop()
+    results = {name: measure(factory(), calibration, repeat) for name, factory in BENCHMARKS.items()}
+    return {
+        "recorded_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold_percent: float) -> bool:
+    """Print a comparison table and return True when no benchmark regressed beyond the threshold."""
+    ok = True
+    print(f"{'benchmark':<28}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<28}{'-':>12}{result['relative']:>12.3f}{'new':>10}")
+            continue
+        change = (result["relative"] / reference["relative"] - 1) * 100
+        regressed = change > threshold_percent
+        ok = ok and not regressed
+        print(f"{name:<28}{reference['relative']:>12.3f}{result['relative']:>12.3f}{change:>+9.1f}%{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT, help=f"Allowed slowdown in percent (default: {DEFAULT_THRESHOLD_PERCENT})")
+    parser.add_argument("--repeat", type=int, default=25, help="Timing repeats per benchmark; the best one is used")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the current results as the new baseline")
+    args = parser.parse_args(argv)
+
+    configure_environment(None)
+    current = run_benchmarks(args.repeat)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(current, baseline_file, indent=2)
+            baseline_file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        print(json.dumps(current["results"], indent=2))
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if not compare(current, baseline, args.threshold):
+        print(f"\nMicro-benchmark regression above {args.threshold}% detected.")
+        sys.exit(1)
+    print(f"\nNo regression above {args.threshold}%.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Keycloak stand-in built on `httpx.MockTransport`.
+
+Serves the token endpoint and the admin users endpoints used by `app.services.keycloak`,
+with a configurable per-request latency to model a remote identity provider.
+"""
+
+import asyncio
+import json
+import re
+from typing import Dict, List
+
+import httpx
+
+_USER_PATH = re.compile(r"/admin/realms/[^/]+/users/(?P<user_id>[^/]+)$")
+_USERS_PATH = re.compile(r"/admin/realms/[^/]+/users$")
+_TOKEN_PATH = re.compile(r"/realms/[^/]+/protocol/openid-connect/token$")
+
+
+def make_user(user_id: str) -> Dict:
+    """Keycloak admin API representation of a user."""
+    return {
+        "id": user_id,
+        "username": f"user_{user_id}",
+        "firstName": "Bench",
+        "lastName": user_id.capitalize(),
+        "attributes": {"profilePicUrl": [f"https://example.com/avatars/{user_id}.png"]},
+    }
+
+
+class MockKeycloak:
+    """
+    Args:
+        user_ids: Users known to the stand-in; others return 404.
+        latency_ms: Delay added to every request.
+    """
+
+    def __init__(self, user_ids: List[str], latency_ms: float = 0.0):
+        self.users = {user_id: make_user(user_id) for user_id in user_ids}
+        self.latency_seconds = latency_ms / 1000
+        self.request_count = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.request_count += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        path = request.url.path
+        if request.method == "POST" and _TOKEN_PATH.search(path):
+            return httpx.Response(200, json={"access_token": "benchmark-token", "expires_in": 300})
+        if request.method == "GET" and _USERS_PATH.search(path):
+            params = request.url.params
+            users = list(self.users.values())
+            first = int(params.get("first", 0))
+            maximum = int(params.get("max", len(users) or 1))
+            return httpx.Response(200, content=json.dumps(users[first:first + maximum]))
+        match = _USER_PATH.search(path)
+        if request.method == "GET" and match:
+            user = self.users.get(match.group("user_id"))
+            if user is None:
+                return httpx.Response(404, json={"error": "User not found"})
+            return httpx.Response(200, json=user)
+        return httpx.Response(404, json={"error": f"Unhandled {request.method} {path}"})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
@@ -0,0 +1,146 @@
+"""
+Unit tests for the admission control primitives (app.core.admission).
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import admission
+from app.core.admission import ConcurrencyLimiter, TokenBucketLimiter, retry_after_header
+
+
+def test_limiter_admits_up_to_the_limit_then_sheds_beyond_the_queue():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", limit=2, queue_size=1, queue_timeout=1)
+        assert await limiter.acquire()
+        assert await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert (limiter.active, limiter.queued) == (2, 1)
+        assert not await limiter.acquire()  # Queue full
+        limiter.release()
+        assert await queued
+        return limiter.active, limiter.queued
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_release_hands_the_slot_to_waiters_in_fifo_order():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", limit=1, queue_size=3, queue_timeout=1)
+        await limiter.acquire()
+        order = []
+
+        async def waiter(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.ensure_future(waiter(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        for _ in range(3):
+            limiter.release()
+            await asyncio.sleep(0)
+            # A new arrival does not overtake the queue while the slot is being handed over
+            assert limiter.active == 1
+        await asyncio.gather(*waiters)
+        limiter.release()
+        return order, limiter.active
+
+    assert asyncio.run(scenario()) == (["a", "b", "c"], 0)
+
+
+def test_waiter_is_shed_after_the_queue_timeout():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", limit=1, queue_size=1, queue_timeout=0.01)
+        await limiter.acquire()
+        admitted = await limiter.acquire()
+        limiter.release()
+        return admitted, limiter.active, limiter.queued
+
+    assert asyncio.run(scenario()) == (False, 0, 0)
+
+
+def test_slot_handed_over_at_the_timeout_is_not_lost(monkeypatch):
+    async def wait_then_hand_over(futures, timeout):
+        limiter.release()  # The holder releases while the waiter is timing out
+        return set(), set(futures)
+
+    monkeypatch.setattr(admission.asyncio, "wait", wait_then_hand_over)
+    limiter = ConcurrencyLimiter("test", limit=1, queue_size=1, queue_timeout=0.01)
+
+    async def scenario():
+        await limiter.acquire()
+        admitted = await limiter.acquire()
+        limiter.release()
+        return admitted, limiter.active
+
+    assert asyncio.run(scenario()) == (True, 0)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", limit=1, queue_size=1, queue_timeout=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        queued = limiter.queued
+        limiter.release()
+        return queued, limiter.active
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_zero_limit_disables_the_limiter():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", limit=0, queue_size=0, queue_timeout=0)
+        return [await limiter.acquire() for _ in range(5)]
+
+    assert asyncio.run(scenario()) == [True] * 5
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_allows_the_burst_then_refills(clock):
+    bucket = TokenBucketLimiter(rate=2, burst=3)
+    assert [bucket.take("alice") for _ in range(3)] == [None] * 3
+    assert bucket.take("alice") == pytest.approx(0.5)
+    assert bucket.take("bob") is None
+    clock.now += 0.5
+    assert bucket.take("alice") is None
+    clock.now += 60
+    assert [bucket.take("alice") for _ in range(4)][-1] == pytest.approx(0.5)  # Refill is capped at the burst
+
+
+def test_token_bucket_drops_least_recently_used_keys(clock):
+    bucket = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        bucket.take(key)
+    assert list(bucket._buckets) == ["b", "c"]
+    assert bucket.take("a") is None  # Forgotten, so full again
+
+
+def test_zero_rate_disables_the_bucket(clock):
+    bucket = TokenBucketLimiter(rate=0, burst=0)
+    assert bucket.take("alice") is None
+
+
+@pytest.mark.parametrize("seconds, header", [(0.0, "1"), (0.2, "1"), (1.0, "1"), (1.01, "2"), (7.5, "8")])
+def test_retry_after_header(seconds, header):
+    assert retry_after_header(seconds) == header
@@ -0,0 +1,123 @@
+"""
+Unit tests for the benchmark harness (benchmarks/): latency summaries, the in-memory MongoDB
+stand-in that the benchmarks and several unit tests run against, the seed data and the mock
+Keycloak.
+"""
+
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+from pymongo import UpdateOne
+
+from app.db.database import close_mongo_connection, collection_blog, collection_discussion
+from benchmarks.environment import install_database, seed, summarize_latencies
+from benchmarks.inmemory_mongo import InMemoryClient, apply_update, matches
+from benchmarks.mock_keycloak import MockKeycloak
+
+
+def test_summarize_latencies_uses_nearest_rank_percentiles():
+    summary = summarize_latencies([i / 1000 for i in range(100, 0, -1)])
+    assert summary == {"p50": 50.0, "p95": 95.0, "p99": 99.0, "mean": 50.5, "max": 100.0}
+    assert summarize_latencies([0.002])["p99"] == 2.0
+    assert summarize_latencies([]) == {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+
+
+DOC = {"_id": "b1", "title": "Hello", "tags": ["ml", "nlp"], "views": 10, "author": {"id": "u1"}}
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ({"_id": "b1"}, True),
+        ({"tags": "ml"}, True),
+        ({"tags": {"$in": ["rl", "nlp"]}}, True),
+        ({"tags": {"$nin": ["ml"]}}, False),
+        ({"views": {"$gte": 10, "$lt": 11}}, True),
+        ({"views": {"$gt": 10}}, False),
+        ({"author.id": "u1"}, True),
+        ({"missing": None}, True),
+        ({"missing": {"$exists": True}}, False),
+        ({"title": {"$regex": "^He"}}, True),
+        ({"$or": [{"views": 0}, {"title": "Hello"}]}, True),
+        ({"$and": [{"views": 10}, {"title": "Other"}]}, False),
+    ],
+)
+def test_matches(query, expected):
+    assert matches(DOC, query) is expected
+
+
+def test_unsupported_operators_fail_loudly():
+    with pytest.raises(NotImplementedError):
+        matches(DOC, {"views": {"$mod": [2, 0]}})
+
+
+def test_apply_update():
+    doc = {"_id": "b1", "views": 1}
+    apply_update(doc, {"$inc": {"views": 2, "hours.09.views": 1}, "$set": {"title": "New"}, "$setOnInsert": {"created": True}})
+    apply_update(doc, {"$addToSet": {"tags": "ml"}})
+    apply_update(doc, {"$addToSet": {"tags": "ml"}})
+    apply_update(doc, [{"$set": {"views": {"$max": [0, {"$subtract": ["$views", 5]}]}}}])
+    assert doc == {"_id": "b1", "views": 0, "hours": {"09": {"views": 1}}, "title": "New", "tags": ["ml"]}
+
+
+@pytest.fixture
+def database():
+    client = InMemoryClient()
+    install_database(client)
+    yield client
+    close_mongo_connection()
+
+
+def test_collection_operations(database):
+    async def scenario():
+        await collection_blog.insert_many([{"_id": f"b{i}", "views": i, "tags": ["ml"] if i % 2 else []} for i in range(6)])
+        page = [doc["_id"] async for doc in collection_blog.find({"tags": "ml"}, {"_id": 1}).sort("views", -1).skip(1).limit(1)]
+        upserted = await collection_blog.find_one_and_update({"_id": "b9"}, {"$inc": {"views": 1}}, upsert=True, return_document=True)
+        await collection_blog.bulk_write([UpdateOne({"_id": "b0"}, {"$set": {"views": 100}}), UpdateOne({"_id": "b10"}, {"$set": {"views": 1}}, upsert=True)])
+        grouped = await collection_blog.aggregate([{"$match": {"views": {"$lt": 100}}}, {"$group": {"_id": None, "total": {"$sum": "$views"}}}]).to_list(None)
+        deleted = await collection_blog.find_one_and_delete({"_id": "b1"}, {"views": 1})
+        return page, upserted, grouped, deleted, await collection_blog.count_documents({})
+
+    page, upserted, grouped, deleted, count = asyncio.run(scenario())
+    assert page == ["b3"]
+    assert upserted == {"_id": "b9", "views": 1}
+    assert grouped == [{"_id": None, "total": 1 + 2 + 3 + 4 + 5 + 1 + 1}]
+    assert deleted == {"_id": "b1", "views": 1}
+    assert count == 7
+    assert database.operation_count == 7
+
+
+def test_seed_counters_match_the_discussions(database):
+    async def scenario():
+        data = await seed(blogs=6, authors=2, readers=5, comments_per_blog=3, replies_per_comment=2, reply_depth=2)
+        blogs = [doc async for doc in collection_blog.find({})]
+        discussions = [doc async for doc in collection_discussion.find({})]
+        return data, blogs, discussions
+
+    data, blogs, discussions = asyncio.run(scenario())
+    assert len(data.blog_ids) == 6 and len(data.blogs_with_comments) == 3
+    comments = Counter(doc["blogPost_id"] for doc in discussions if doc["path"] == "")
+    replies = Counter(doc["parentContent_id"] for doc in discussions if doc["path"])
+    assert {blog["_id"]: blog["comments_count"] for blog in blogs} == {blog_id: comments.get(blog_id, 0) for blog_id in data.blog_ids}
+    assert all(doc["replies_count"] == replies.get(doc["_id"], 0) for doc in discussions)
+
+
+def test_mock_keycloak():
+    keycloak = MockKeycloak(["alice"])
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=keycloak.transport(), base_url="http://keycloak") as client:
+            token = await client.post("/realms/blog/protocol/openid-connect/token")
+            user = await client.get("/admin/realms/blog/users/alice")
+            missing = await client.get("/admin/realms/blog/users/bob")
+            users = await client.get("/admin/realms/blog/users", params={"first": 0, "max": 10})
+            return token, user, missing, users
+
+    token, user, missing, users = asyncio.run(scenario())
+    assert token.json()["access_token"]
+    assert user.json()["username"] == "user_alice"
+    assert missing.status_code == 404
+    assert [entry["id"] for entry in users.json()] == ["alice"]
+    assert keycloak.request_count == 4
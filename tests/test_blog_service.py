@@ -0,0 +1,162 @@
+"""
+Unit tests for the owner-only write paths of the blog service (app.services.blog): editing a
+blog, editing a comment or reply and deleting one with its replies, against the in-memory
+MongoDB stand-in.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import BlogNotFoundException, BlogOwnershipException, CommentOrReplyNotFoundException, PermissionDeniedException, ReplyOwnershipException
+from app.db.database import close_mongo_connection, collection_blog, collection_discussion, collection_user
+from app.schemas.blog import BlogPostCreate, BlogPostUpdate, CommentCreate, ReplyCreate
+from app.services import blog as blog_service
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+async def _seed():
+    """A blog by `owner` with a comment, a reply by `other` and a nested reply; returns their ids."""
+    await collection_user.insert_many([
+        {"_id": user_id, "username": user_id, "firstName": "", "lastName": "", "profilePicUrl": ""} for user_id in ("owner", "other")
+    ])
+    blog = await blog_service.create_blog(BlogPostCreate(comment_constraint=False, tags=["ml"], title="Title", content="Content"), "owner")
+    comment = await blog_service.write_comment(CommentCreate(blogPost_id=blog.blogPost_id, text="Comment"), "owner")
+    reply = await blog_service.reply_comment(ReplyCreate(parentContent_id=comment.comment_id, text="Reply"), "other")
+    nested = await blog_service.reply_comment(ReplyCreate(parentContent_id=reply.reply_id, text="Nested"), "owner")
+    other = await blog_service.write_comment(CommentCreate(blogPost_id=blog.blogPost_id, text="Other comment"), "other")
+    return blog.blogPost_id, comment.comment_id, reply.reply_id, nested.reply_id, other.comment_id
+
+
+def _run(scenario):
+    """Seed, then run `scenario(ids)`; returns what it returned and both collections afterwards."""
+    async def run():
+        ids = await _seed()
+        result = await scenario(*ids)
+        blogs = {doc["_id"]: doc async for doc in collection_blog.find({})}
+        discussions = {doc["_id"]: doc async for doc in collection_discussion.find({})}
+        return result, blogs, discussions
+    return asyncio.run(run())
+
+
+UPDATE = BlogPostUpdate(comment_constraint=True, tags=["nlp"], title="New title", content="New content")
+
+
+def test_owner_updates_their_blog(database):
+    async def scenario(blog_id, *_):
+        return await blog_service.update_blog(blog_id, UPDATE, "owner")
+
+    updated, blogs, _ = _run(scenario)
+    assert (updated.title, updated.user_username) == ("New title", "owner")
+    (blog,) = blogs.values()
+    assert (blog["title"], blog["content"], blog["content_preview"], blog["tags"]) == ("New title", "New content", "New content", ["nlp"])
+
+
+@pytest.mark.parametrize(
+    "user_id, blog_id, error",
+    [
+        ("other", None, BlogOwnershipException),
+        ("owner", "missing", BlogNotFoundException),
+    ],
+)
+def test_blog_updates_by_others_or_of_missing_blogs_fail(database, user_id, blog_id, error):
+    async def scenario(seeded_blog_id, *_):
+        with pytest.raises(error) as raised:
+            await blog_service.update_blog(blog_id or seeded_blog_id, UPDATE, user_id)
+        return raised.value.status_code
+
+    status_code, blogs, _ = _run(scenario)
+    assert status_code == (403 if error is BlogOwnershipException else 404)
+    assert [blog["title"] for blog in blogs.values()] == ["Title"]
+
+
+def test_owner_edits_their_comment_or_reply(database):
+    async def scenario(blog_id, comment_id, reply_id, *_):
+        return await blog_service.update_Comment_Reply(comment_id, "Edited", "owner"), await blog_service.update_Comment_Reply(reply_id, "Edited reply", "other")
+
+    (comment, reply), _, discussions = _run(scenario)
+    assert (type(comment).__name__, comment.text) == ("CommentBase", "Edited")
+    assert (type(reply).__name__, reply.text) == ("ReplyBase", "Edited reply")
+    assert discussions[comment.comment_id]["text"] == "Edited"
+
+
+@pytest.mark.parametrize(
+    "target, error, status_code",
+    [
+        ("reply", ReplyOwnershipException, 403),  # The reply is by "other"
+        ("missing", CommentOrReplyNotFoundException, 404),
+    ],
+)
+def test_edits_by_others_or_of_missing_content_fail(database, target, error, status_code):
+    async def scenario(blog_id, comment_id, reply_id, *_):
+        with pytest.raises(error) as raised:
+            await blog_service.update_Comment_Reply(reply_id if target == "reply" else "missing", "Edited", "owner")
+        return raised.value.status_code
+
+    raised_status, _, discussions = _run(scenario)
+    assert raised_status == status_code
+    assert "Edited" not in {doc["text"] for doc in discussions.values()}
+
+
+@pytest.fixture
+def cascade_deletes(monkeypatch):
+    """Records the tasks submitted to the cascade delete queue (and runs them)."""
+    submitted = []
+
+    async def submit(fn, *args):
+        submitted.append((fn, args))
+        await fn(*args)
+        return False
+
+    monkeypatch.setattr(blog_service._cascade_deletes, "submit", submit)
+    return submitted
+
+
+def test_deleting_a_comment_queues_its_replies_and_decrements_the_blog_counter(database, cascade_deletes):
+    async def scenario(blog_id, comment_id, *_):
+        return await blog_service.delete_comment_reply(comment_id, "owner")
+
+    _, blogs, discussions = _run(scenario)
+    ((fn, (deleted,)),) = cascade_deletes
+    assert fn is blog_service._delete_subtree and deleted["path"] == ""
+    assert [doc["text"] for doc in discussions.values()] == ["Other comment"]
+    assert [blog["comments_count"] for blog in blogs.values()] == [1]
+
+
+def test_deleting_a_reply_removes_its_subtree_and_decrements_the_parent_counter(database, cascade_deletes):
+    async def scenario(blog_id, comment_id, reply_id, *_):
+        return await blog_service.delete_comment_reply(reply_id, "other")
+
+    _, blogs, discussions = _run(scenario)
+    assert [fn for fn, _ in cascade_deletes] == [blog_service._delete_subtree]
+    assert sorted(doc["text"] for doc in discussions.values()) == ["Comment", "Other comment"]
+    comment = next(doc for doc in discussions.values() if doc["text"] == "Comment")
+    assert comment["replies_count"] == 0
+    assert [blog["comments_count"] for blog in blogs.values()] == [2]
+
+
+@pytest.mark.parametrize(
+    "target, error, status_code",
+    [
+        ("nested", PermissionDeniedException, 403),  # The nested reply is by "owner"
+        ("missing", CommentOrReplyNotFoundException, 404),
+    ],
+)
+def test_deletes_by_others_or_of_missing_content_fail(database, cascade_deletes, target, error, status_code):
+    async def scenario(blog_id, comment_id, reply_id, nested_id, other_id):
+        with pytest.raises(error) as raised:
+            await blog_service.delete_comment_reply(nested_id if target == "nested" else "missing", "other")
+        return raised.value.status_code
+
+    raised_status, _, discussions = _run(scenario)
+    assert raised_status == status_code
+    assert len(discussions) == 4
+    assert cascade_deletes == []
@@ -0,0 +1,132 @@
+"""
+Unit tests for the per-request latency budget (app.core.budget), budgeted author enrichment
+(app.services.keycloak) and the latency budget middleware, against the mock Keycloak.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.budget import RequestBudget, get_request_budget, start_request_budget, stop_request_budget
+from app.core.config import settings
+from app.core.response_cache import PublicResponseCache
+from app.middleware import response_cache as response_cache_middleware
+from app.middleware.latency_budget import LatencyBudgetMiddleware
+from app.middleware.response_cache import PublicResponseCacheMiddleware
+from app.services import keycloak
+from benchmarks.mock_keycloak import MockKeycloak
+
+
+def test_budget_tracks_its_deadline_and_skips():
+    budget = RequestBudget(60)
+    assert 59 < budget.remaining() <= 60 and not budget.exhausted()
+    assert not budget.partial
+    budget.skip()
+    assert budget.partial and budget.skipped == 1
+    assert RequestBudget(0).exhausted()
+
+
+def test_budget_is_scoped_to_the_request():
+    assert get_request_budget() is None
+    budget, token = start_request_budget(1)
+    try:
+        assert get_request_budget() is budget
+    finally:
+        stop_request_budget(token)
+    assert get_request_budget() is None
+
+
+@pytest.fixture
+def slow_keycloak(monkeypatch):
+    """Keycloak answering in 60ms, with a breaker that counts calls from 40ms as slow."""
+    monkeypatch.setattr(settings, "KEYCLOAK_BREAKER_SLOW_CALL_MS", 40)
+    monkeypatch.setattr(settings, "KEYCLOAK_BREAKER_WINDOW", 5)
+    monkeypatch.setattr(settings, "KEYCLOAK_BREAKER_MIN_CALLS", 5)
+    mock = MockKeycloak([f"user{i}" for i in range(10)], latency_ms=60)
+    keycloak.set_http_transport(mock.transport())
+    yield mock
+    keycloak.set_http_transport(None)
+
+
+async def _budgeted_lookup(user_id, budget_seconds):
+    budget, token = start_request_budget(budget_seconds)
+    try:
+        user = await keycloak.get_user_by_id_safely(user_id)
+        return user, budget.skipped
+    finally:
+        stop_request_budget(token)
+
+
+def test_lookup_past_the_budget_returns_a_placeholder_and_caches_the_late_profile(slow_keycloak):
+    async def scenario():
+        placeholder = await _budgeted_lookup("user1", 0.01)
+        await asyncio.sleep(0.2)  # The call completes in the background
+        cached = await _budgeted_lookup("user1", 0.01)
+        return placeholder, cached
+
+    (placeholder, skipped), (cached, cached_skipped) = asyncio.run(scenario())
+    assert (placeholder.username, skipped) == ("", 1)
+    assert (cached.username, cached_skipped) == ("user_user1", 0)
+
+
+def test_concurrent_lookups_of_one_user_share_the_call(slow_keycloak):
+    async def scenario():
+        await keycloak.get_keycloak_token()
+        requests = slow_keycloak.request_count
+        await asyncio.gather(*(_budgeted_lookup("user2", 0.01) for _ in range(5)))
+        await asyncio.sleep(0.2)
+        return slow_keycloak.request_count - requests
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_repeated_budget_timeouts_open_the_breaker(slow_keycloak):
+    async def scenario():
+        for i in range(5):
+            await _budgeted_lookup(f"user{i}", 0.01)
+        await asyncio.sleep(0.3)
+        return keycloak.get_circuit_breaker_state()
+
+    state = asyncio.run(scenario())
+    assert state["state"] == "open"
+
+
+def _enriching_app(user_ids):
+    async def app(scope, receive, send):
+        users = await asyncio.gather(*(keycloak.get_user_by_id_safely(user_id) for user_id in user_ids))
+        body = ",".join(user.username for user in users).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def _get(app, path="/public/blogs"):
+    scope = {"type": "http", "method": "GET", "path": f"{settings.API_V1_STR}{settings.SERVICE_STR}{path}", "query_string": b"", "headers": []}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, None, send))
+    return dict(messages[0]["headers"]), messages[1]["body"]
+
+
+def test_partial_responses_are_flagged_and_not_cached(slow_keycloak, monkeypatch):
+    monkeypatch.setattr(response_cache_middleware, "public_responses", PublicResponseCache(maxsize=10, ttl_seconds=60))
+    app = LatencyBudgetMiddleware(PublicResponseCacheMiddleware(_enriching_app(["user3", "user4"]), compression=False), budget_ms=10)
+    headers, body = _get(app)
+    assert headers[b"x-enrichment"] == b"partial; skipped=2"
+    assert body == b","
+    headers, _ = _get(app)
+    assert b"x-cache" not in headers  # Served by the application again, not from the cache
+
+
+def test_complete_responses_are_not_flagged(monkeypatch):
+    mock = MockKeycloak(["user5"])
+    keycloak.set_http_transport(mock.transport())
+    try:
+        headers, body = _get(LatencyBudgetMiddleware(_enriching_app(["user5"]), budget_ms=1000), "/other")
+    finally:
+        keycloak.set_http_transport(None)
+    assert b"x-enrichment" not in headers
+    assert body == b"user_user5"
@@ -0,0 +1,77 @@
+"""
+Unit tests for the in-process TTL cache (app.core.cache).
+"""
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_get_returns_default_for_missing_keys(clock):
+    cache = TTLCache("test_missing", maxsize=2, ttl_seconds=10)
+    assert cache.get("a") is None
+    assert cache.get("a", "fallback") == "fallback"
+
+
+def test_entries_expire_but_stay_available_as_stale(clock):
+    cache = TTLCache("test_expiry", maxsize=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=30)
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == 1
+    assert cache.get("b") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache("test_lru", maxsize=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get_stale("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_zero_maxsize_disables_the_cache(clock):
+    cache = TTLCache("test_disabled", maxsize=0, ttl_seconds=10)
+    cache.set("a", 1)
+    assert len(cache) == 0
+
+
+def test_delete_matching(clock):
+    cache = TTLCache("test_delete_matching", maxsize=10, ttl_seconds=10)
+    for key in range(5):
+        cache.set(key, {"user": "alice" if key % 2 else "bob"})
+    assert cache.delete_matching(lambda value: value["user"] == "alice") == 2
+    assert sorted(cache._entries) == [0, 2, 4]
+    cache.delete(0)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_hits_and_misses_are_counted(clock):
+    cache = TTLCache("test_stats", maxsize=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    clock.now += 10
+    cache.get("a")
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
@@ -0,0 +1,119 @@
+"""
+Unit tests for the circuit breaker (app.core.circuit_breaker).
+"""
+
+import pytest
+
+from app.core import circuit_breaker as circuit_breaker_module
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker_module.time, "monotonic", clock)
+    return clock
+
+
+def _breaker(**kwargs):
+    options = {"window_size": 4, "min_calls": 4, "open_seconds": 10, "slow_call_seconds": 1.0}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def _fail(breaker):
+    with pytest.raises(RuntimeError):
+        with breaker.call():
+            raise RuntimeError("down")
+
+
+def test_stays_closed_until_min_calls(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker)
+    assert breaker.state == OPEN
+
+
+def test_failure_rate_below_threshold_stays_closed(clock):
+    breaker = _breaker(failure_rate_threshold=0.75)
+    _fail(breaker)
+    _fail(breaker)
+    for _ in range(2):
+        with breaker.call():
+            pass
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["failure_rate"] == 0.5
+
+
+def test_slow_calls_and_flagged_outcomes_count(clock):
+    breaker = _breaker(failure_rate_threshold=1.0)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(False, 1.5)
+    for _ in range(2):
+        with breaker.call() as outcome:
+            outcome["failed"] = True
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_rejects_then_probes(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        _fail(breaker)
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.allow()
+    assert error.value.retry_in_seconds == 10
+    assert breaker.rejected_calls == 1
+
+    clock.now += 10
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # Only one probe at a time
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
+
+
+def test_failed_probe_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        _fail(breaker)
+    clock.now += 10
+    _fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_cancelled_probe_releases_its_slot(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        _fail(breaker)
+    clock.now += 10
+    with pytest.raises(KeyboardInterrupt):
+        with breaker.call():
+            raise KeyboardInterrupt
+    assert breaker.state == HALF_OPEN
+    breaker.allow()
+
+
+def test_late_outcome_while_open_is_ignored(clock):
+    breaker = _breaker()
+    breaker.allow()  # Started before the breaker opened
+    for _ in range(4):
+        _fail(breaker)
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["calls_in_window"] == 0
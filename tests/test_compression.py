@@ -0,0 +1,61 @@
+"""
+Unit tests for content-coding negotiation and the compression helpers (app.core.compression).
+"""
+
+import gzip
+
+import pytest
+
+from app.core.compression import StreamCompressor, brotli, compress, is_compressible, negotiate_encoding, parse_accept_encoding
+
+requires_brotli = pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, BR;q=0.5, , identity;q=0, deflate;q=abc") == {"gzip": 1.0, "br": 0.5, "identity": 0.0, "deflate": 0.0}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        pytest.param("gzip, deflate, br", "br", marks=requires_brotli),  # Brotli preferred at equal quality
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        pytest.param("*", "br", marks=requires_brotli),
+        ("*;q=0.5, br;q=0", "gzip"),
+        ("deflate", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.parametrize("content_type, expected", [("application/json", True), ("text/html; charset=utf-8", True), ("image/png", False)])
+def test_is_compressible(content_type, expected):
+    assert is_compressible(content_type) is expected
+
+
+def test_gzip_round_trips():
+    body = b'{"title": "Hello"}' * 200
+    assert gzip.decompress(compress(body, "gzip")) == body
+    assert compress(body, "gzip") == compress(body, "gzip")  # No timestamp in the gzip header
+    with pytest.raises(ValueError):
+        compress(body, "deflate")
+
+
+@requires_brotli
+def test_brotli_round_trips():
+    body = b'{"title": "Hello"}' * 200
+    assert brotli.decompress(compress(body, "br")) == body
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("br", marks=requires_brotli)])
+def test_stream_compressor(encoding):
+    chunks = [b'{"id": %d}' % i * 50 for i in range(10)]
+    compressor = StreamCompressor(encoding)
+    compressed = b"".join(compressor.compress(chunk) for chunk in chunks) + compressor.finish()
+    decompress = brotli.decompress if encoding == "br" else gzip.decompress
+    assert decompress(compressed) == b"".join(chunks)
@@ -0,0 +1,102 @@
+"""
+Unit tests for the denormalised counters: the pipeline update behind `adjust_counter` and the
+like toggle (app.services.blog), and the reconcile job (app.services.counters), against the
+in-memory MongoDB stand-in.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.exceptions import BlogNotFoundException, InvalidLikeValueException
+from app.db.database import close_mongo_connection, collection_blog, collection_discussion, collection_like
+from app.services import blog as blog_service
+from app.services.blog import adjust_counter, check_user_like_status, like_or_unlike
+from app.services.counters import reconcile_counters
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+
+
+@pytest.fixture
+def database(monkeypatch):
+    install_database(InMemoryClient())
+    monkeypatch.setattr(blog_service.engagement, "record", lambda *args, **kwargs: None)
+    yield
+    close_mongo_connection()
+
+
+def test_adjust_counter_never_drops_below_zero(database):
+    async def scenario():
+        await collection_blog.insert_many([{"_id": "b1", "comments_count": 1}, {"_id": "legacy"}])
+        await adjust_counter(collection_blog, "b1", "comments_count", -1)
+        await adjust_counter(collection_blog, "b1", "comments_count", -1)
+        await adjust_counter(collection_blog, "legacy", "comments_count", -1)  # Written before the counter existed
+        await adjust_counter(collection_blog, "legacy", "comments_count", 2)
+        return {doc["_id"]: doc["comments_count"] async for doc in collection_blog.find({})}
+
+    assert asyncio.run(scenario()) == {"b1": 0, "legacy": 2}
+
+
+def test_like_toggle_is_idempotent(database):
+    async def scenario():
+        await collection_blog.insert_one({"_id": "b1"})
+        results = [
+            await like_or_unlike("b1", "u1", 1),
+            await like_or_unlike("b1", "u1", 1),
+            await like_or_unlike("b1", "u2", 1),
+        ]
+        liked = await check_user_like_status("b1", "u1")
+        results += [
+            await like_or_unlike("b1", "u1", 0),
+            await like_or_unlike("b1", "u1", 0),
+        ]
+        return results, liked, await check_user_like_status("b1", "u1"), await collection_like.count_documents({})
+
+    results, liked, unliked, likes = asyncio.run(scenario())
+    assert [result["message"] for result in results] == [
+        "Blog liked successfully", "Blog already liked", "Blog liked successfully", "Blog unliked successfully", "Blog not liked yet",
+    ]
+    assert (liked["is_liked"], liked["likes_count"]) == (True, 2)
+    assert (unliked["is_liked"], unliked["likes_count"], unliked["like_id"]) == (False, 1, None)
+    assert likes == 1
+
+
+def test_unlike_never_drops_the_likes_count_below_zero(database):
+    async def scenario():
+        await collection_blog.insert_one({"_id": "b1", "likes_count": 0})  # Drifted: a like without its count
+        await collection_like.insert_one({"_id": "l1", "blog_id": "b1", "user_id": "u1"})
+        await like_or_unlike("b1", "u1", 0)
+        return (await collection_blog.find_one({"_id": "b1"}))["likes_count"]
+
+    assert asyncio.run(scenario()) == 0
+
+
+@pytest.mark.parametrize("blog_id, like_value, error", [("missing", 1, BlogNotFoundException), ("b1", 2, InvalidLikeValueException)])
+def test_invalid_likes_are_rejected(database, blog_id, like_value, error):
+    async def scenario():
+        await collection_blog.insert_one({"_id": "b1"})
+        with pytest.raises(error):
+            await like_or_unlike(blog_id, "u1", like_value)
+        return await collection_like.count_documents({})
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_reconcile_fixes_drifted_counters(database):
+    async def scenario():
+        await collection_blog.insert_many([{"_id": "b1", "comments_count": 5}, {"_id": "b2", "comments_count": 0}, {"_id": "b3"}])
+        await collection_discussion.insert_many([
+            {"_id": "c1", "kind": "comment", "blogPost_id": "b1", "replies_count": 0},
+            {"_id": "r1", "kind": "reply", "blogPost_id": "b1", "parentContent_id": "c1", "replies_count": 0},
+            {"_id": "c2", "kind": "comment", "blogPost_id": "b3"},
+        ])
+        report = await reconcile_counters()
+        blogs = {doc["_id"]: doc.get("comments_count") async for doc in collection_blog.find({})}
+        replies = {doc["_id"]: doc.get("replies_count") async for doc in collection_discussion.find({})}
+        return report, blogs, replies, await reconcile_counters()
+
+    report, blogs, replies, second = asyncio.run(scenario())
+    assert report == {"blogs": 2, "discussions": 2}
+    assert blogs == {"b1": 1, "b2": 0, "b3": 1}
+    assert replies == {"c1": 1, "r1": 0, "c2": 0}
+    assert second == {"blogs": 0, "discussions": 0}
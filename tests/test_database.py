@@ -0,0 +1,44 @@
+"""
+Unit tests for the public read preference settings (app.db.database).
+"""
+
+import pytest
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+from app.core.config import settings
+from app.db.database import public_read_preference
+
+
+@pytest.fixture
+def read_settings(monkeypatch):
+    def configure(mode, max_staleness=None):
+        monkeypatch.setattr(settings, "MONGODB_PUBLIC_READ_PREFERENCE", mode)
+        monkeypatch.setattr(settings, "MONGODB_PUBLIC_MAX_STALENESS_SECONDS", max_staleness)
+    return configure
+
+
+def test_modes_are_case_insensitive(read_settings):
+    read_settings("primary")
+    assert public_read_preference() == Primary()
+    read_settings("secondaryPreferred")
+    assert public_read_preference() == SecondaryPreferred()
+
+
+def test_max_staleness_is_passed_on(read_settings):
+    read_settings("secondaryPreferred", 120)
+    assert public_read_preference().max_staleness == 120
+
+
+@pytest.mark.parametrize(
+    "mode, max_staleness",
+    [
+        ("tertiary", None),
+        ("primary", 120),
+        ("secondary", 89),
+        ("nearest", 0),
+    ],
+)
+def test_invalid_settings_are_rejected(read_settings, mode, max_staleness):
+    read_settings(mode, max_staleness)
+    with pytest.raises(ValueError):
+        public_read_preference()
@@ -0,0 +1,153 @@
+"""
+Unit tests for the materialised-path discussions: tree assembly and subtree queries
+(app.services.blog) and the migration from the legacy collections (app.services.discussions),
+against the in-memory MongoDB stand-in.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.database import close_mongo_connection, collection_comment, collection_discussion, collection_reply
+from app.services.blog import _build_tree, _child_path, _delete_subtree, _load_reply_tree, _subtree_query
+from app.services.discussions import catch_up_discussions, migrate_discussions
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient, matches
+
+START = datetime(2026, 3, 1, 9, 0)
+
+
+def _comment(id, minute, blog_id="blog1"):
+    return {"_id": id, "kind": "comment", "blogPost_id": blog_id, "path": "", "user_id": "u1", "text": id, "commentedAt": START + timedelta(minutes=minute)}
+
+
+def _reply(id, parent, minute):
+    return {
+        "_id": id, "kind": "reply", "blogPost_id": parent["blogPost_id"], "path": _child_path(parent), "parentContent_id": parent["_id"],
+        "user_id": "u1", "text": id, "repliedAt": START + timedelta(minutes=minute),
+    }
+
+
+def _discussion():
+    c1, c2 = _comment("c1", 0), _comment("c2", 1)
+    r1 = _reply("r1", c1, 2)
+    r2 = _reply("r2", c1, 3)
+    r11 = _reply("r11", r1, 4)
+    r21 = _reply("r21", c2, 5)
+    return [c1, c2, r1, r2, r11, r21]
+
+
+def _shape(nodes):
+    return [(getattr(node, "comment_id", None) or node.reply_id, _shape(node.replies)) for node in nodes]
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+def test_build_tree_nests_replies_in_written_order():
+    assert _shape(_build_tree(list(reversed(_discussion())), "")) == [
+        ("c1", [("r1", [("r11", [])]), ("r2", [])]),
+        ("c2", [("r21", [])]),
+    ]
+
+
+def test_build_tree_of_a_subtree():
+    c1, _, r1, r2, r11, _ = _discussion()
+    assert _shape(_build_tree([r11, r2, r1], _child_path(c1))) == [("r1", [("r11", [])]), ("r2", [])]
+
+
+def test_build_tree_drops_orphaned_replies():
+    c1, c2, r1, r2, r11, r21 = _discussion()
+    # r1 was deleted but its cascade was interrupted: r11 and its own reply are left behind
+    r111 = _reply("r111", r11, 6)
+    assert _shape(_build_tree([c1, c2, r2, r11, r111, r21], "")) == [("c1", [("r2", [])]), ("c2", [("r21", [])])]
+
+
+def test_subtree_query_matches_descendants_only():
+    c1, c2, r1, r2, r11, r21 = _discussion()
+    c10 = _comment("c10", 6)
+    r101 = _reply("r101", c10, 7)
+    other_blog = {**r11, "blogPost_id": "blog2"}
+    docs = [c1, c2, r1, r2, r11, r21, c10, r101, other_blog]
+    assert [doc["_id"] for doc in docs if matches(doc, _subtree_query(c1))] == ["r1", "r2", "r11"]
+    assert [doc["_id"] for doc in docs if matches(doc, _subtree_query(r1))] == ["r11"]
+
+
+@pytest.mark.parametrize("id, lookalike", [("a.b", "axb"), ("c+1", "cc1"), ("(x)", "x"), ("[y]", "y"), ("z*", "zzz"), ("q?", "q"), ("^$|", "")])
+def test_subtree_query_escapes_regex_metacharacters(id, lookalike):
+    parent, other = _comment(id, 0), _comment(lookalike, 0)
+    child, other_child = _reply("child", parent, 1), _reply("other", other, 1)
+    assert matches(child, _subtree_query(parent))
+    assert not matches(other_child, _subtree_query(parent))
+
+
+def test_delete_subtree_and_load_reply_tree(database):
+    async def scenario():
+        docs = _discussion()
+        for doc in docs:
+            await collection_discussion.insert_one(doc)
+        r1 = docs[2]
+        loaded = _shape(await _load_reply_tree("c1"))
+        missing = await _load_reply_tree("missing")
+        await _delete_subtree(r1)
+        remaining = sorted([doc["_id"] async for doc in collection_discussion.find({})])
+        return loaded, missing, remaining
+
+    loaded, missing, remaining = asyncio.run(scenario())
+    assert loaded == [("r1", [("r11", [])]), ("r2", [])]
+    assert missing == []
+    assert remaining == ["c1", "c2", "r1", "r2", "r21"]
+
+
+def _legacy(doc):
+    return {key: value for key, value in doc.items() if key not in ("kind", "path")}
+
+
+def test_migration_copies_paths_and_removes_stale_copies(database):
+    async def scenario():
+        c1, c2, r1, r2, r11, r21 = _discussion()
+        for doc in (c1, c2):
+            await collection_comment.insert_one(_legacy(doc))
+        for doc in (r1, r2, r11, r21, _reply("orphan", _comment("gone", 0), 6)):
+            await collection_reply.insert_one(_legacy(doc))
+        first = await migrate_discussions(START)
+        await collection_comment.delete_one({"_id": "c2"})
+        await collection_reply.delete_one({"_id": "r21"})
+        second = await migrate_discussions(START + timedelta(hours=1))
+        stored = {doc["_id"]: (doc["kind"], doc["blogPost_id"], doc["path"]) async for doc in collection_discussion.find({})}
+        return first, second, stored
+
+    first, second, stored = asyncio.run(scenario())
+    assert first == {"comments": 2, "replies": 4, "removed": 0}
+    assert second == {"comments": 1, "replies": 3, "removed": 2}
+    assert stored == {
+        "c1": ("comment", "blog1", ""),
+        "r1": ("reply", "blog1", "c1/"),
+        "r2": ("reply", "blog1", "c1/"),
+        "r11": ("reply", "blog1", "c1/r1/"),
+    }
+
+
+def test_catch_up_inserts_new_chains_without_overwriting(database):
+    async def scenario():
+        c1, c2, r1, r2, r11, r21 = _discussion()
+        await collection_discussion.insert_one({**c1, "text": "edited through the new version"})
+        for doc in (c1, c2):
+            await collection_comment.insert_one(_legacy(doc))
+        # r1 and its reply r11 were both written during the rollout
+        for doc in (r11, r1, _reply("orphan", _comment("gone", 0), 6)):
+            await collection_reply.insert_one(_legacy(doc))
+        report = await catch_up_discussions(START, START + timedelta(hours=1))
+        stored = {doc["_id"]: doc async for doc in collection_discussion.find({})}
+        return report, stored
+
+    report, stored = asyncio.run(scenario())
+    assert report == {"comments": 2, "replies": 2, "skipped": 1}
+    assert stored["c1"]["text"] == "edited through the new version"
+    assert (stored["r11"]["path"], stored["r11"]["blogPost_id"]) == ("c1/r1/", "blog1")
+    assert "orphan" not in stored
@@ -0,0 +1,199 @@
+"""
+Unit tests for the engagement buckets (app.services.engagement) and the periodic flusher they
+build on (app.core.periodic), against the in-memory MongoDB stand-in.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import settings
+from app.core.exceptions import BlogNotFoundException, InvalidStatsRangeException
+from app.core.periodic import PeriodicFlusher
+from app.db.database import close_mongo_connection, collection_blog, collection_blog_stats, collection_user
+from app.schemas.blog import CommentCreate, ReplyCreate
+from app.services import blog as blog_service
+from app.services import engagement as engagement_module
+from app.services.engagement import EngagementRecorder, bucket_id, get_blog_stats
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+
+MORNING = datetime(2026, 3, 1, 9, 10)
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+def test_flush_writes_one_increment_per_blog_and_hour(database):
+    async def scenario():
+        recorder = EngagementRecorder()
+        recorder.record("blog1", "views", at=MORNING)
+        recorder.record("blog1", "views", 2, at=MORNING.replace(minute=50))
+        recorder.record("blog1", "likes", at=MORNING.replace(hour=10))
+        recorder.record("blog2", "comments", at=MORNING)
+        written = await recorder.flush()
+        recorder.record("blog1", "views", at=MORNING)
+        await recorder.flush()
+        return written, await collection_blog_stats.find_one({"_id": bucket_id("blog1", MORNING)})
+
+    written, bucket = asyncio.run(scenario())
+    assert written == 3
+    assert (bucket["blog_id"], bucket["day"]) == ("blog1", datetime(2026, 3, 1))
+    assert (bucket["views"], bucket["likes"]) == (4, 1)
+    assert bucket["hours"] == {"09": {"views": 4}, "10": {"likes": 1}}
+
+
+def test_comments_and_replies_at_any_depth_are_counted(database, monkeypatch):
+    recorder = EngagementRecorder()
+    monkeypatch.setattr(blog_service, "engagement", recorder)
+
+    async def scenario():
+        await collection_blog.insert_one({"_id": "blog1", "comments_count": 0})
+        await collection_user.insert_one({"_id": "u1", "username": "alice", "firstName": "A", "lastName": "L", "profilePicUrl": ""})
+        comment = await blog_service.write_comment(CommentCreate(blogPost_id="blog1", text="First"), "u1")
+        reply = await blog_service.reply_comment(ReplyCreate(parentContent_id=comment.comment_id, text="Reply"), "u1")
+        await blog_service.reply_comment(ReplyCreate(parentContent_id=reply.reply_id, text="Nested"), "u1")
+
+    asyncio.run(scenario())
+    assert [(blog_id, dict(counts)) for (blog_id, _), counts in recorder._pending.items()] == [("blog1", {"comments": 3})]
+
+
+class _FailingCollection:
+    def __init__(self, error):
+        self.error = error
+
+    async def bulk_write(self, updates, ordered):
+        raise self.error
+
+
+def test_failed_flush_keeps_the_counts(database, monkeypatch):
+    async def scenario():
+        recorder = EngagementRecorder()
+        recorder.record("blog1", "views", at=MORNING)
+        with monkeypatch.context() as patch:
+            patch.setattr(engagement_module, "collection_blog_stats", _FailingCollection(PyMongoError("primary stepped down")))
+            assert await recorder.flush() == 0
+        recorder.record("blog1", "views", at=MORNING)
+        assert await recorder.flush() == 1
+        return await collection_blog_stats.find_one({"_id": bucket_id("blog1", MORNING)})
+
+    assert asyncio.run(scenario())["views"] == 2
+
+
+def test_only_the_failed_upserts_are_kept(monkeypatch):
+    # Concurrent first upserts of the same bucket: the first write fails with a duplicate key
+    error = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+    monkeypatch.setattr(engagement_module, "collection_blog_stats", _FailingCollection(error))
+    recorder = EngagementRecorder()
+    recorder.record("blog1", "views", at=MORNING)
+    recorder.record("blog2", "views", at=MORNING)
+    assert asyncio.run(recorder.flush()) == 1
+    assert dict(recorder._pending) == {("blog1", MORNING.replace(minute=0)): {"views": 1}}
+
+
+def test_full_buffer_requests_an_early_flush(monkeypatch):
+    monkeypatch.setattr(settings, "ENGAGEMENT_STATS_MAX_PENDING", 3)
+    recorder = EngagementRecorder()
+    requested = []
+    monkeypatch.setattr(recorder, "request_flush", lambda: requested.append(len(recorder._pending)))
+    for hour in range(4):
+        recorder.record("blog1", "views", at=MORNING.replace(hour=hour))
+    recorder.record("blog1", "views", at=MORNING.replace(hour=0))  # Existing bucket
+    assert requested == [2, 3]
+
+
+def test_forget_drops_buffered_and_stored_buckets(database):
+    async def scenario():
+        recorder = EngagementRecorder()
+        recorder.record("blog1", "views", at=MORNING)
+        await recorder.flush()
+        recorder.record("blog1", "likes", at=MORNING)
+        recorder.record("blog2", "likes", at=MORNING)
+        await recorder.forget("blog1")
+        return list(recorder._pending), await collection_blog_stats.count_documents({})
+
+    assert asyncio.run(scenario()) == ([("blog2", MORNING.replace(minute=0))], 0)
+
+
+def test_stats_are_zero_filled(database):
+    async def scenario():
+        await collection_blog.insert_one({"_id": "blog1"})
+        recorder = EngagementRecorder()
+        recorder.record("blog1", "views", 3, at=MORNING)
+        recorder.record("blog1", "likes", at=MORNING.replace(day=2, hour=23))
+        await recorder.flush()
+        hourly = await get_blog_stats("blog1", MORNING.replace(hour=8), MORNING.replace(hour=10, minute=59), "hour")
+        daily = await get_blog_stats("blog1", datetime(2026, 2, 28), datetime(2026, 3, 3), "day")
+        return hourly, daily
+
+    hourly, daily = asyncio.run(scenario())
+    assert [(point.start.hour, point.views) for point in hourly.series] == [(8, 0), (9, 3), (10, 0)]
+    assert [(point.start.day, point.views, point.likes) for point in daily.series] == [(28, 0, 0), (1, 3, 0), (2, 0, 1), (3, 0, 0)]
+    assert (daily.totals.views, daily.totals.likes) == (3, 1)
+
+
+def test_invalid_stats_requests_are_rejected(database):
+    with pytest.raises(InvalidStatsRangeException):
+        asyncio.run(get_blog_stats("blog1", MORNING, MORNING.replace(hour=8), "hour"))
+    with pytest.raises(InvalidStatsRangeException):
+        asyncio.run(get_blog_stats("blog1", datetime(2020, 1, 1), datetime(2026, 1, 1), "day"))
+    with pytest.raises(BlogNotFoundException):
+        asyncio.run(get_blog_stats("missing", None, None, "day"))
+
+
+class _Buffer(PeriodicFlusher):
+    """Counts flushes; the first `failures` ones raise."""
+
+    def __init__(self, interval, failures=0):
+        super().__init__()
+        self.interval = interval
+        self.failures = failures
+        self.flushes = 0
+
+    @property
+    def flush_interval_seconds(self) -> float:
+        return self.interval
+
+    async def flush(self) -> int:
+        self.flushes += 1
+        if self.flushes <= self.failures:
+            raise RuntimeError("flush failed")
+        return 0
+
+
+def test_periodic_flusher_is_abstract():
+    with pytest.raises(TypeError):
+        PeriodicFlusher()
+
+
+def test_failing_flushes_do_not_stop_the_loop():
+    async def scenario():
+        buffer = _Buffer(0.001, failures=2)
+        await buffer.start()
+        await asyncio.sleep(0.05)
+        running = not buffer._task.done()
+        await buffer.stop()
+        return running, buffer.flushes
+
+    running, flushes = asyncio.run(scenario())
+    assert running and flushes > 3
+
+
+def test_request_flush_and_stop_flush_immediately():
+    async def scenario():
+        buffer = _Buffer(60)
+        await buffer.start()
+        buffer.request_flush()
+        await asyncio.sleep(0.01)
+        requested = buffer.flushes
+        await buffer.stop()
+        await buffer.stop()  # Only flushes the leftovers again
+        return requested, buffer.flushes
+
+    assert asyncio.run(scenario()) == (1, 4)
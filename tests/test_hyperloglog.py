@@ -0,0 +1,76 @@
+"""
+Unit tests for the HyperLogLog sketch (app.core.hyperloglog).
+"""
+
+import pytest
+
+from app.core.hyperloglog import HyperLogLog
+
+
+def _sketch(values, precision=12):
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_empty_sketch_counts_zero():
+    assert HyperLogLog().count() == 0
+
+
+def test_small_counts_are_close_to_exact():
+    for n in (1, 10, 100):
+        assert _sketch(f"user-{i}" for i in range(n)).count() == n
+    assert abs(_sketch(f"user-{i}" for i in range(1000)).count() - 1000) <= 30
+
+
+@pytest.mark.parametrize("precision, n", [(12, 20000), (12, 100000), (10, 50000)])
+def test_error_matches_the_standard_error(precision, n):
+    standard_error = 1.04 / (1 << precision) ** 0.5
+    errors = [(_sketch((f"{run}-user-{i}" for i in range(n)), precision).count() - n) / n for run in range(8)]
+    assert (sum(error * error for error in errors) / len(errors)) ** 0.5 < 1.5 * standard_error
+    assert max(abs(error) for error in errors) < 4 * standard_error
+
+
+def test_duplicates_do_not_grow_the_estimate():
+    sketch = _sketch(f"user-{i}" for i in range(500))
+    before = sketch.count()
+    assert not any([sketch.add(f"user-{i}") for i in range(500)])
+    assert sketch.count() == before
+
+
+def test_merge_estimates_the_union():
+    first = _sketch(f"user-{i}" for i in range(0, 6000))
+    second = _sketch(f"user-{i}" for i in range(4000, 10000))
+    first.merge(second)
+    assert first.registers == _sketch(f"user-{i}" for i in range(10000)).registers
+    assert abs(first.count() - 10000) / 10000 < 0.05
+
+
+def test_merge_is_idempotent_and_commutative():
+    first, second = _sketch(f"a-{i}" for i in range(3000)), _sketch(f"b-{i}" for i in range(3000))
+    merged = HyperLogLog.from_bytes(first.to_bytes())
+    merged.merge(second)
+    again = HyperLogLog.from_bytes(merged.to_bytes())
+    again.merge(second)
+    reverse = HyperLogLog.from_bytes(second.to_bytes())
+    reverse.merge(first)
+    assert merged.registers == again.registers == reverse.registers
+
+
+def test_serialisation_round_trips():
+    sketch = _sketch((f"user-{i}" for i in range(1000)), precision=8)
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert len(sketch.to_bytes()) == 256
+    assert (restored.precision, restored.count()) == (8, sketch.count())
+
+
+def test_invalid_sketches_are_rejected():
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+    with pytest.raises(ValueError):
+        HyperLogLog(17)
+    with pytest.raises(ValueError):
+        HyperLogLog(12, bytes(100))
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(10))
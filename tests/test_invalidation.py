@@ -0,0 +1,169 @@
+"""
+Unit tests for change-stream cache invalidation (app.services.invalidation), on synthetic events.
+"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, PublicResponseCache
+from app.services import invalidation
+from app.services.invalidation import ChangeStreamInvalidator, invalidation_tags
+
+
+def _event(collection, operation, document_id="doc1", full_document=None, updated_fields=None, removed_fields=()):
+    change = {"ns": {"db": "blog", "coll": collection}, "operationType": operation, "documentKey": {"_id": document_id}}
+    if full_document is not None:
+        change["fullDocument"] = full_document
+    if operation == "update":
+        change["updateDescription"] = {"updatedFields": updated_fields or {}, "removedFields": list(removed_fields)}
+    return change
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PublicResponseCache(maxsize=100, ttl_seconds=60)
+    monkeypatch.setattr(invalidation, "public_responses", cache)
+    monkeypatch.setattr(invalidation, "invalidate_public_responses", cache.invalidate)
+    for key, tags in {
+        "list": ("blogs",),
+        "blog1": ("blog:blog1",),
+        "blog1_comments": ("comments", "blog:blog1"),
+        "blog2_comments": ("comments", "blog:blog2"),
+    }.items():
+        cache.set((key, b""), CachedResponse(200, [], b"[]", tags), cache.generation)
+    return cache
+
+
+def _cached(cache):
+    return {key for key in ("list", "blog1", "blog1_comments", "blog2_comments") if cache.get((key, b"")) is not None}
+
+
+def test_blog_update_invalidates_lists_and_that_blog(cache):
+    ChangeStreamInvalidator().apply(_event("Blogs", "update", "blog1", updated_fields={"title": "New"}))
+    assert _cached(cache) == {"blog2_comments"}
+
+
+@pytest.mark.parametrize("fields", [{"number_of_views": 10}, {"unique_viewers": 3}, {"number_of_views": 11, "unique_viewers": 4}])
+def test_view_counter_updates_are_ignored(cache, fields):
+    ChangeStreamInvalidator().apply(_event("Blogs", "update", "blog1", updated_fields=fields))
+    assert _cached(cache) == {"list", "blog1", "blog1_comments", "blog2_comments"}
+
+
+def test_counter_update_with_removed_fields_is_not_ignored():
+    assert invalidation_tags(_event("Blogs", "update", "blog1", updated_fields={"number_of_views": 1}, removed_fields=["post_image"])) == ("blogs", "blog:blog1")
+
+
+def test_discussion_insert_invalidates_only_its_blog(cache):
+    ChangeStreamInvalidator().apply(_event("Discussions", "insert", full_document={"blogPost_id": "blog2"}))
+    assert _cached(cache) == {"list", "blog1", "blog1_comments"}
+
+
+def test_discussion_edit_and_delete_invalidate_only_their_blog(cache):
+    edit = _event("Discussions", "update", updated_fields={"text": "edited"})
+    edit["fullDocumentBeforeChange"] = {"blogPost_id": "blog2"}
+    ChangeStreamInvalidator().apply(edit)
+    assert _cached(cache) == {"list", "blog1", "blog1_comments"}
+    delete = _event("Discussions", "delete")
+    delete["fullDocumentBeforeChange"] = {"blogPost_id": "blog1"}
+    assert invalidation_tags(delete) == ("blog:blog1",)
+
+
+def test_discussion_changes_without_a_pre_image_invalidate_all_comment_trees(cache):
+    ChangeStreamInvalidator().apply(_event("Discussions", "update", updated_fields={"text": "edited"}))
+    assert _cached(cache) == {"list", "blog1"}
+    assert invalidation_tags(_event("Discussions", "delete")) == ("comments",)
+
+
+def test_reply_counter_updates_are_ignored():
+    assert invalidation_tags(_event("Discussions", "update", updated_fields={"replies_count": 2})) == ()
+
+
+def test_likes_invalidate_lists():
+    assert invalidation_tags(_event("Likes", "insert", full_document={"blog_id": "blog1"})) == ("blogs",)
+    assert invalidation_tags(_event("Likes", "delete")) == ("blogs",)
+
+
+def test_pipeline_filters_the_ignored_updates_on_the_server():
+    (match,) = [stage["$match"]["$nor"] for stage in invalidation.PIPELINE if "$nor" in stage.get("$match", {})]
+    filtered = {condition["ns.coll"]: set(condition["$expr"]["$setIsSubset"][1]) for condition in match}
+    assert filtered == {"Blogs": invalidation.VIEW_COUNTER_FIELDS, "Discussions": invalidation.REPLY_COUNTER_FIELDS}
+
+
+class _Stream:
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def try_next(self):
+        if not self.changes:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets", code=invalidation.CHANGE_STREAMS_UNSUPPORTED)
+        change = self.changes.pop(0)
+        self.resume_token = {"_data": change["documentKey"]["_id"]}
+        return change
+
+
+class _Database:
+    """Replica set stand-in serving one change stream; optionally without collMod privileges."""
+
+    def __init__(self, changes, collmod_error=None):
+        self.changes = changes
+        self.collmod_error = collmod_error
+        self.commands = []
+        self.watch_options = None
+
+    async def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+        if self.collmod_error is not None:
+            raise self.collmod_error
+        return {"ok": 1.0}
+
+    def watch(self, pipeline, **kwargs):
+        self.watch_options = kwargs
+        return _Stream(self.changes)
+
+
+def _watch(monkeypatch, database):
+    monkeypatch.setattr(invalidation, "database", database)
+    invalidator = ChangeStreamInvalidator()
+
+    async def scenario():
+        await invalidator.start()
+        await invalidator._task
+
+    asyncio.run(scenario())
+    return invalidator
+
+
+def test_watcher_enables_and_requests_discussion_pre_images(cache, monkeypatch):
+    delete = _event("Discussions", "delete", "comment1")
+    delete["fullDocumentBeforeChange"] = {"blogPost_id": "blog1"}
+    database = _Database([delete])
+    invalidator = _watch(monkeypatch, database)
+    assert database.commands == [(("collMod", "Discussions"), {"changeStreamPreAndPostImages": {"enabled": True}})]
+    assert database.watch_options == {"resume_after": None, "full_document_before_change": "whenAvailable"}
+    assert _cached(cache) == {"list", "blog2_comments"}
+    assert invalidator.state == "unavailable"  # The stand-in ends the stream like a standalone mongod
+
+
+def test_watcher_runs_without_pre_images_when_they_cannot_be_enabled(cache, monkeypatch):
+    database = _Database([_event("Discussions", "delete", "comment1")], collmod_error=OperationFailure("not authorized", code=13))
+    _watch(monkeypatch, database)
+    assert database.watch_options["full_document_before_change"] == "whenAvailable"
+    assert _cached(cache) == {"list", "blog1"}
+
+
+def test_pre_images_can_be_disabled(cache, monkeypatch):
+    monkeypatch.setattr(settings, "CHANGE_STREAM_PRE_IMAGES", False)
+    database = _Database([])
+    _watch(monkeypatch, database)
+    assert database.commands == []
+    assert database.watch_options == {"resume_after": None}
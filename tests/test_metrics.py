@@ -0,0 +1,105 @@
+"""
+Unit tests for the request metrics middleware (app.middleware.metrics) and the MongoDB
+command listeners behind the Prometheus metrics (app.db.monitoring).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.db.monitoring import CommandMetricsListener, command_collection
+from app.middleware.metrics import MetricsMiddleware, route_template
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _request(app, path="/api/v1/blogs/public/blogs"):
+    scope = {"type": "http", "method": "GET", "path": path}
+
+    async def send(message):
+        pass
+
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+
+
+def _app(status, route_path=None, error=None):
+    async def app(scope, receive, send):
+        if route_path is not None:
+            scope["route"] = SimpleNamespace(path=route_path)  # Set by the router
+        if error is not None:
+            raise error
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+def test_route_template():
+    assert route_template({"route": SimpleNamespace(path="/public/blog/{blog_id}")}) == "/public/blog/{blog_id}"
+    assert route_template({}) == "unmatched"
+
+
+def test_responses_are_labelled_with_the_route_template():
+    labels = {"method": "GET", "route": "/test/blog/{blog_id}"}
+    before = _sample("blog_http_responses_total", status="200", **labels)
+    observed = _sample("blog_http_request_duration_seconds_count", **labels)
+    _request(_app(200, "/test/blog/{blog_id}"), "/test/blog/b1")
+    _request(_app(200, "/test/blog/{blog_id}"), "/test/blog/b2")
+    assert _sample("blog_http_responses_total", status="200", **labels) == before + 2
+    assert _sample("blog_http_request_duration_seconds_count", **labels) == observed + 2
+    assert _sample("blog_http_requests_in_flight", method="GET") == 0
+
+
+def test_unmatched_paths_share_one_label():
+    before = _sample("blog_http_responses_total", method="GET", route="unmatched", status="404")
+    for path in ("/nope/1", "/nope/2", "/nope/3"):
+        _request(_app(404), path)
+    assert _sample("blog_http_responses_total", method="GET", route="unmatched", status="404") == before + 3
+
+
+def test_unhandled_errors_count_as_500():
+    labels = {"method": "GET", "route": "/test/failing", "status": "500"}
+    before = _sample("blog_http_responses_total", **labels)
+    with pytest.raises(RuntimeError):
+        _request(_app(200, "/test/failing", error=RuntimeError("boom")))
+    assert _sample("blog_http_responses_total", **labels) == before + 1
+
+
+@pytest.mark.parametrize(
+    "command_name, command, expected",
+    [
+        ("find", {"find": "Blogs", "filter": {}}, "Blogs"),
+        ("getMore", {"getMore": 123, "collection": "Blogs"}, "Blogs"),
+        ("aggregate", {"aggregate": 1, "pipeline": []}, ""),  # Database-level aggregate
+        ("ping", {"ping": 1}, ""),
+    ],
+)
+def test_command_collection(command_name, command, expected):
+    assert command_collection(command_name, command) == expected
+
+
+def _event(request_id, command_name="find", command=None, duration_micros=2500):
+    return SimpleNamespace(connection_id=("localhost", 27017), request_id=request_id, command_name=command_name, command=command, duration_micros=duration_micros)
+
+
+def test_command_metrics_listener_pairs_events():
+    listener = CommandMetricsListener()
+    labels = {"command": "find", "collection": "TestBlogs"}
+    before = _sample("blog_mongo_command_duration_seconds_count", **labels)
+    failures = _sample("blog_mongo_command_failures_total", **labels)
+    listener.started(_event(1, command={"find": "TestBlogs"}))
+    listener.started(_event(2, command={"find": "TestBlogs"}))
+    listener.succeeded(_event(1))
+    listener.failed(_event(2))
+    assert _sample("blog_mongo_command_duration_seconds_count", **labels) == before + 2
+    assert _sample("blog_mongo_command_failures_total", **labels) == failures + 1
+    assert listener._in_flight == {}
+
+
+def test_command_metrics_listener_tolerates_unseen_starts():
+    before = _sample("blog_mongo_command_duration_seconds_count", command="find", collection="")
+    CommandMetricsListener().succeeded(_event(99))
+    assert _sample("blog_mongo_command_duration_seconds_count", command="find", collection="") == before + 1
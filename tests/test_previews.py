@@ -0,0 +1,99 @@
+"""
+Unit tests for the stored content previews: `build_content_preview` and the list views' fallback
+for posts without one (app.services.blog), and the backfill job (app.services.previews), against
+the in-memory MongoDB stand-in.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.db.database import close_mongo_connection, collection_blog
+from app.services import blog as blog_service
+from app.services import previews as previews_module
+from app.services.blog import CONTENT_PREVIEW_LENGTH, build_content_preview, get_all_blogs
+from app.services.previews import backfill_content_previews
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+
+LONG = "x" * (CONTENT_PREVIEW_LENGTH + 1)
+AUTHOR = {"username": "alice", "firstName": "A", "lastName": "L", "profilePicUrl": "", "version": "v1"}
+
+
+def test_previews_truncate_long_content_only():
+    exact = "y" * CONTENT_PREVIEW_LENGTH
+    assert build_content_preview(exact) == exact
+    assert build_content_preview(LONG) == "x" * CONTENT_PREVIEW_LENGTH + "..."
+    assert build_content_preview("") == ""
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+def _blog(blog_id, content, **fields):
+    return {
+        "_id": blog_id, "comment_constraint": False, "tags": [], "number_of_views": 0, "title": blog_id,
+        "content": content, "postedAt": datetime(2026, 3, 1), "user_id": "u1", "author": AUTHOR, **fields,
+    }
+
+
+async def _previews():
+    return {doc["_id"]: doc.get("content_preview") async for doc in collection_blog.find({})}
+
+
+def test_backfill_fills_missing_previews_only(database):
+    async def scenario():
+        await collection_blog.insert_many([
+            _blog("legacy", LONG),
+            _blog("current", "short", content_preview="short"),
+            _blog("stale", "short", content_preview="kept until --rebuild"),
+        ])
+        return await backfill_content_previews(), await _previews()
+
+    updated, previews = asyncio.run(scenario())
+    assert updated == 1
+    assert previews == {"legacy": build_content_preview(LONG), "current": "short", "stale": "kept until --rebuild"}
+
+
+def test_rebuild_recomputes_every_changed_preview(database, monkeypatch):
+    monkeypatch.setattr(blog_service, "CONTENT_PREVIEW_LENGTH", 3)
+
+    async def scenario():
+        await collection_blog.insert_many([_blog("b1", "abcdef", content_preview="abcdef"), _blog("b2", "abc", content_preview="abc")])
+        return await backfill_content_previews(rebuild=True), await _previews()
+
+    assert asyncio.run(scenario()) == (1, {"b1": "abc...", "b2": "abc"})
+
+
+class _EditedDuringBackfill:
+    """The Blogs collection, with a post edited between the backfill's read and its write."""
+
+    def find(self, *args, **kwargs):
+        return collection_blog.find(*args, **kwargs)
+
+    async def bulk_write(self, updates, ordered):
+        await collection_blog.update_one({"_id": "b1"}, {"$set": {"content": "edited", "content_preview": "edited"}})
+        return await collection_blog.bulk_write(updates, ordered=ordered)
+
+
+def test_backfill_does_not_overwrite_a_concurrent_edit(database, monkeypatch):
+    monkeypatch.setattr(previews_module, "collection_blog", _EditedDuringBackfill())
+
+    async def scenario():
+        await collection_blog.insert_many([_blog("b1", LONG), _blog("b2", LONG)])
+        return await backfill_content_previews(), await _previews()
+
+    assert asyncio.run(scenario()) == (1, {"b1": "edited", "b2": build_content_preview(LONG)})
+
+
+def test_list_views_load_the_content_of_posts_without_a_preview(database):
+    async def scenario():
+        await collection_blog.insert_many([_blog("legacy", LONG), _blog("current", "stored content", content_preview="stored")])
+        return {blog.blogPost_id: blog.content_preview for blog in await get_all_blogs()}
+
+    assert asyncio.run(scenario()) == {"legacy": build_content_preview(LONG), "current": "stored"}
@@ -0,0 +1,78 @@
+"""
+Unit tests for the profile report ring buffer (app.services.profiling) and the profiling
+middleware (app.middleware.profiling).
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.middleware import profiling as profiling_middleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.profiling import get_profile_report_path, list_profile_reports, new_profile_id, save_profile_report
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(settings, "PROFILING_MAX_REPORTS", 3)
+    return tmp_path / "profiles"
+
+
+def test_profile_ids_are_safe_file_names():
+    profile_id = new_profile_id("get", "/api/v1/blogs/public/blog/../../etc/passwd")
+    assert "/" not in profile_id and ".." not in profile_id
+    assert profile_id.split("-")[1] == "GET"
+    assert profile_id.endswith(".html")
+
+
+def test_ring_buffer_keeps_the_newest_reports(profile_dir):
+    ids = [f"{1000 + i}-GET-public_blogs-0000000{i}.html" for i in range(5)]
+    for profile_id in ids:
+        save_profile_report(profile_id, "<html></html>")
+    (profile_dir / "notes.txt").write_text("not a report")
+    assert [report["profile_id"] for report in list_profile_reports()] == ids[:1:-1]
+    assert sorted(os.listdir(profile_dir)) == sorted(ids[2:] + ["notes.txt"])
+
+
+def test_report_lookup_rejects_unknown_and_malformed_ids(profile_dir):
+    profile_id = "1000-GET-public_blogs-00000000.html"
+    save_profile_report(profile_id, "<html></html>")
+    assert get_profile_report_path(profile_id) == str(profile_dir / profile_id)
+    assert get_profile_report_path("1001-GET-public_blogs-00000000.html") is None
+    assert get_profile_report_path("../../etc/passwd") is None
+
+
+def test_missing_directory_lists_nothing(profile_dir):
+    assert list_profile_reports() == []
+
+
+def _request(headers):
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/blogs/public/blogs", "headers": headers}
+    messages = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(ProfilingMiddleware(app)(scope, None, send))
+    return dict(messages[0]["headers"])
+
+
+@pytest.mark.skipif(profiling_middleware.Profiler is None, reason="pyinstrument is not installed")
+def test_requests_with_the_header_are_profiled(profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_FORMAT", "text")
+    headers = _request([(settings.PROFILING_HEADER.lower().encode(), b"1")])
+    profile_id = headers[b"x-profile-id"].decode()
+    assert profile_id.endswith(".txt")
+    assert get_profile_report_path(profile_id) is not None
+
+
+def test_other_requests_are_passed_through(profile_dir):
+    assert b"x-profile-id" not in _request([])
+    assert list_profile_reports() == []
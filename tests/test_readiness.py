@@ -0,0 +1,199 @@
+"""
+Unit tests for the readiness state behind /ready (app.services.readiness), including the
+SIGTERM drain, and for the start-up warm-up (app.services.warmup), against the in-memory
+MongoDB stand-in and the mock Keycloak.
+"""
+
+import asyncio
+import signal
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import blogs as blog_endpoints
+from app.core.config import settings
+from app.db.database import close_mongo_connection, collection_blog, collection_user
+from app.services import keycloak
+from app.services import readiness as readiness_module
+from app.services import warmup as warmup_module
+from app.services.readiness import ReadinessChecker
+from app.services.warmup import recent_author_ids, warm_up
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+from benchmarks.mock_keycloak import MockKeycloak
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(readiness_module.time, "monotonic", clock)
+    return clock
+
+
+class _FailingDatabase:
+    async def command(self, name):
+        raise ConnectionError("No replica set members found")
+
+
+def test_readiness_follows_the_worker_lifecycle(database, clock, monkeypatch):
+    checker = ReadinessChecker()
+
+    async def scenario():
+        phases = [checker.snapshot()["status"]]
+        await checker.start()
+        phases.append(checker.snapshot()["status"])
+        with monkeypatch.context() as patch:
+            patch.setattr(readiness_module, "database", _FailingDatabase())
+            await checker.check()
+            phases.append(checker.snapshot()["status"])
+        await checker.check()
+        phases.append(checker.snapshot()["status"])
+        clock.now += 3 * settings.READINESS_CHECK_INTERVAL_SECONDS + settings.READINESS_CHECK_TIMEOUT_SECONDS + 1
+        phases.append(checker.snapshot()["status"])  # The background checker is stuck
+        await checker.stop()
+        phases.append(checker.snapshot()["status"])
+        return phases
+
+    assert asyncio.run(scenario()) == ["starting", "ready", "unready", "ready", "unready", "draining"]
+    assert checker.last_check["error"] is None
+
+
+def test_failed_checks_report_the_error(database, clock, monkeypatch):
+    monkeypatch.setattr(readiness_module, "database", _FailingDatabase())
+    checker = ReadinessChecker()
+    asyncio.run(checker.check())
+    assert checker.snapshot()["checks"]["mongodb"]["error"] == "No replica set members found"
+    assert not checker.ready
+
+
+def _probe(checker, monkeypatch):
+    monkeypatch.setattr(blog_endpoints, "readiness", checker)
+    app = FastAPI()
+    app.include_router(blog_endpoints.router)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/ready")
+
+    response = asyncio.run(scenario())
+    return response.status_code, response.json()["status"]
+
+
+def test_ready_probe_returns_503_until_started_and_while_draining(database, monkeypatch):
+    checker = ReadinessChecker()
+    assert _probe(checker, monkeypatch) == (503, "starting")  # Lifespan (warm-up) still running
+    asyncio.run(checker.check())
+    checker.phase = "ready"
+    assert _probe(checker, monkeypatch) == (200, "ready")
+    checker.begin_drain()
+    assert _probe(checker, monkeypatch) == (503, "draining")
+
+
+@pytest.fixture
+def server_sigterm_handler():
+    """Stands in for the server's SIGTERM handler; restores the real one afterwards."""
+    received = []
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+    yield received
+    signal.signal(signal.SIGTERM, original)
+
+
+def test_sigterm_drains_before_handing_over_to_the_server(database, server_sigterm_handler, monkeypatch):
+    monkeypatch.setattr(settings, "READINESS_DRAIN_SECONDS", 0.05)
+    checker = ReadinessChecker()
+
+    async def scenario():
+        await checker.start()
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)  # Repeated signals are not forwarded twice
+        await asyncio.sleep(0)
+        draining = (checker.snapshot()["status"], list(server_sigterm_handler))
+        await asyncio.sleep(0.1)
+        await checker.stop()
+        return draining
+
+    draining = asyncio.run(scenario())
+    assert draining == ("draining", [])  # Still serving, but out of rotation
+    assert server_sigterm_handler == [signal.SIGTERM]
+
+
+def test_no_drain_handler_when_draining_is_disabled(database, server_sigterm_handler, monkeypatch):
+    monkeypatch.setattr(settings, "READINESS_DRAIN_SECONDS", 0)
+    handler = signal.getsignal(signal.SIGTERM)
+
+    async def scenario():
+        checker = ReadinessChecker()
+        await checker.start()
+        await checker.stop()
+
+    asyncio.run(scenario())
+    assert signal.getsignal(signal.SIGTERM) is handler
+
+
+@pytest.fixture
+def directory():
+    mock = MockKeycloak(["alice", "bob", "carol"])
+    keycloak.set_http_transport(mock.transport())
+    yield mock
+    keycloak.set_http_transport(None)
+
+
+async def _seed_blogs():
+    start = datetime(2026, 3, 1)
+    authors = ["carol", "alice", "bob", "alice", None]  # Oldest first
+    await collection_blog.insert_many([
+        {"_id": f"b{i}", "user_id": author, "postedAt": start + timedelta(days=i)} for i, author in enumerate(authors)
+    ])
+
+
+def test_recent_author_ids_are_distinct_and_most_recent_first(database):
+    async def scenario():
+        await _seed_blogs()
+        return await recent_author_ids(5), await recent_author_ids(2)
+
+    assert asyncio.run(scenario()) == (["alice", "bob", "carol"], ["alice"])
+
+
+def test_warm_up_runs_every_step_and_preloads_recent_authors(database, directory, monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_RECENT_AUTHORS", 3)
+
+    async def scenario():
+        await _seed_blogs()
+        report = await warm_up()
+        return report, sorted([doc["_id"] async for doc in collection_user.find({})])
+
+    report, mirrored = asyncio.run(scenario())
+    assert list(report["steps_ms"]) == ["mongo_ping", "ensure_indexes", "keycloak_token", "recent_authors", "preload_users"]
+    assert report["errors"] == {}
+    assert report["preloaded_users"] == 2
+    assert mirrored == ["alice", "bob"]
+
+
+def test_failed_warm_up_steps_are_reported_and_skipped(database, directory, monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_RECENT_AUTHORS", 0)
+
+    async def ensure_indexes():
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(warmup_module, "ensure_indexes", ensure_indexes)
+    report = asyncio.run(warm_up())
+    assert list(report["steps_ms"]) == ["mongo_ping", "ensure_indexes", "keycloak_token"]
+    assert report["errors"] == {"ensure_indexes": "index build failed"}
+    assert "preloaded_users" not in report
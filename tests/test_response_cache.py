@@ -0,0 +1,138 @@
+"""
+Unit tests for the public response cache (app.core.response_cache) and its middleware.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+
+from app.core.budget import start_request_budget, stop_request_budget
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, PublicResponseCache
+from app.middleware import response_cache as middleware_module
+from app.middleware.response_cache import PublicResponseCacheMiddleware, cached_route
+
+PREFIX = f"{settings.API_V1_STR}{settings.SERVICE_STR}"
+BODY = b'{"title": "Hello"}' * 100
+
+
+def test_body_variants_are_compressed_once():
+    response = CachedResponse(200, [(b"content-type", b"application/json"), (b"content-length", b"1800")], BODY, ("blogs",))
+    assert response.headers == [(b"content-type", b"application/json")]
+    assert response.body_for(None) == (BODY, None)
+    body, applied = response.body_for("gzip")
+    assert applied == "gzip" and gzip.decompress(body) == BODY
+    assert response.body_for("gzip")[0] is body
+
+
+def test_small_bodies_are_not_compressed():
+    assert CachedResponse(200, [], b"[]", ()).body_for("gzip") == (b"[]", None)
+
+
+def test_invalidate_drops_entries_by_tag():
+    cache = PublicResponseCache(maxsize=10, ttl_seconds=60)
+    cache.set(("list", b""), CachedResponse(200, [], b"[]", ("blogs",)), cache.generation)
+    cache.set(("comments", b""), CachedResponse(200, [], b"[]", ("comments", "blog:b1")), cache.generation)
+    cache.invalidate("blog:b1", "other")
+    assert cache.get(("list", b"")) is not None
+    assert cache.get(("comments", b"")) is None
+    cache.clear()
+    assert cache.get(("list", b"")) is None
+
+
+def test_response_rendered_across_an_invalidation_is_not_stored():
+    cache = PublicResponseCache(maxsize=10, ttl_seconds=60)
+    generation = cache.generation
+    cache.invalidate("blogs")
+    cache.set(("list", b""), CachedResponse(200, [], b"[]", ("blogs",)), generation)
+    assert cache.get(("list", b"")) is None
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/public/blogs", ("/public/blogs", ("blogs",))),
+        ("/public/blogsByTags", ("/public/blogsByTags", ("blogs",))),
+        ("/public/blog/b1/comments", ("/public/blog/{id}/comments", ("comments", "blog:b1"))),
+        ("/public/blog/b1", None),
+        ("/public/blog/b1/comments/extra", None),
+        ("/blogs", None),
+    ],
+)
+def test_cached_route(path, expected):
+    assert cached_route(path) == expected
+
+
+class _App:
+    """ASGI app answering every request with `status` and `BODY`, counting the calls."""
+
+    def __init__(self, status=200, content_length=True, partial=False):
+        self.status = status
+        self.content_length = content_length
+        self.partial = partial
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        if self.partial:
+            middleware_module.get_request_budget().skip()
+        headers = [(b"content-type", b"application/json")]
+        if self.content_length:
+            headers.append((b"content-length", str(len(BODY)).encode()))
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": BODY})
+
+
+def _get(middleware, path, accept_encoding=b""):
+    scope = {"type": "http", "method": "GET", "path": PREFIX + path, "query_string": b"", "headers": [(b"accept-encoding", accept_encoding)]}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def request():
+        _, token = start_request_budget(5)
+        try:
+            await middleware(scope, None, send)
+        finally:
+            stop_request_budget(token)
+
+    asyncio.run(request())
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PublicResponseCache(maxsize=10, ttl_seconds=60)
+    monkeypatch.setattr(middleware_module, "public_responses", cache)
+    return cache
+
+
+def test_middleware_serves_hits_in_the_negotiated_coding(cache):
+    app = _App()
+    middleware = PublicResponseCacheMiddleware(app)
+    status, headers, body = _get(middleware, "/public/blogs")
+    assert (status, headers[b"x-cache"], body) == (200, b"miss", BODY)
+    status, headers, body = _get(middleware, "/public/blogs", b"gzip")
+    assert (headers[b"x-cache"], headers[b"content-encoding"], headers[b"vary"]) == (b"hit", b"gzip", b"Accept-Encoding")
+    assert int(headers[b"content-length"]) == len(body) and gzip.decompress(body) == BODY
+    assert app.calls == 1
+
+
+@pytest.mark.parametrize("app", [_App(status=404), _App(content_length=False), _App(partial=True)], ids=["error", "streamed", "partial"])
+def test_middleware_passes_uncacheable_responses_through(cache, app):
+    middleware = PublicResponseCacheMiddleware(app)
+    for _ in range(2):
+        status, headers, body = _get(middleware, "/public/blog/b1/comments")
+        assert b"x-cache" not in headers and body == BODY
+    assert app.calls == 2
+
+
+def test_middleware_ignores_uncached_routes(cache):
+    app = _App()
+    middleware = PublicResponseCacheMiddleware(app)
+    _get(middleware, "/public/blog/b1")
+    _get(middleware, "/public/blog/b1")
+    assert app.calls == 2
@@ -0,0 +1,22 @@
+"""
+Unit tests for the production entrypoint's worker count (app.server).
+"""
+
+import pytest
+
+from app import server
+from app.core.config import settings
+
+
+@pytest.mark.parametrize(
+    "server_workers, web_concurrency, expected",
+    [(None, None, 1), (None, "3", 3), (2, "3", 2), (0, None, 6), (None, "0", 6)],
+)
+def test_worker_count(monkeypatch, server_workers, web_concurrency, expected):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", server_workers)
+    if web_concurrency is None:
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    else:
+        monkeypatch.setenv("WEB_CONCURRENCY", web_concurrency)
+    monkeypatch.setattr(server, "available_cpus", lambda: 6)
+    assert server.worker_count() == expected
@@ -0,0 +1,121 @@
+"""
+Unit tests for the per-request timing breakdown (app.core.timing) and the Server-Timing
+middleware (app.middleware.server_timing).
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from app.core.timing import get_request_timings, mark_endpoint_done, record_db_time, start_request_timings, stop_request_timings, track_keycloak
+from app.middleware.server_timing import ServerTimingMiddleware, TimedRoute, access_logger
+
+
+def test_helpers_are_no_ops_outside_a_request():
+    assert get_request_timings() is None
+    record_db_time(0.5)
+    with track_keycloak():
+        pass
+    mark_endpoint_done()
+
+
+def test_timings_accumulate_for_the_current_request():
+    timings, token = start_request_timings()
+    try:
+        record_db_time(0.002)
+        record_db_time(0.003)
+        with pytest.raises(RuntimeError):
+            with track_keycloak():
+                raise RuntimeError("Keycloak down")  # Failed calls are timed too
+        mark_endpoint_done()
+    finally:
+        stop_request_timings(token)
+    assert (timings.db_calls, round(timings.db_seconds, 6), timings.keycloak_calls) == (2, 0.005, 1)
+    assert timings.endpoint_done is not None
+    assert get_request_timings() is None
+
+
+def test_timings_are_per_request():
+    async def request(db_calls):
+        timings, token = start_request_timings()
+        try:
+            for _ in range(db_calls):
+                await asyncio.sleep(0)
+                record_db_time(0.001)
+            return timings.db_calls
+        finally:
+            stop_request_timings(token)
+
+    async def scenario():
+        return await asyncio.gather(request(1), request(3))
+
+    assert asyncio.run(scenario()) == [1, 3]
+
+
+def test_db_time_from_concurrent_executor_threads_is_not_lost():
+    # Motor's executor threads each run with a copy of the request's context
+    timings, token = start_request_timings()
+    try:
+        def record(calls):
+            for _ in range(calls):
+                record_db_time(0.001)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(contextvars.copy_context().run, record, 5000) for _ in range(8)]:
+                future.result()
+    finally:
+        stop_request_timings(token)
+    assert timings.db_calls == 40000
+    assert round(timings.db_seconds, 6) == 40.0
+
+
+@pytest.fixture
+def access_log():
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(json.loads(record.getMessage()))
+    access_logger.addHandler(handler)
+    yield records
+    access_logger.removeHandler(handler)
+
+
+def _app():
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/blog/{blog_id}")
+    async def blog(blog_id: str):
+        record_db_time(0.004)
+        record_db_time(0.006)
+        with track_keycloak():
+            pass
+        return {"blog_id": blog_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ServerTimingMiddleware)
+    return app
+
+
+def test_server_timing_header_and_access_log(access_log):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_app()), base_url="http://test") as client:
+            return await client.get("/blog/b1")
+
+    response = asyncio.run(scenario())
+    assert response.json() == {"blog_id": "b1"}
+    metrics = dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["server-timing"]))
+    assert set(metrics) == {"db", "keycloak", "serialize", "total"}
+    assert float(metrics["db"]) == 10.0
+    assert float(metrics["total"]) >= float(metrics["serialize"])
+    assert 'desc="MongoDB (2 calls)"' in response.headers["server-timing"]
+
+    (entry,) = access_log
+    assert (entry["route"], entry["status"], entry["db_calls"], entry["keycloak_calls"]) == ("/blog/{blog_id}", 200, 2, 1)
+    assert entry["db_ms"] == 10.0
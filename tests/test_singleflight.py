@@ -0,0 +1,113 @@
+"""
+Unit tests for request coalescing (app.core.singleflight).
+"""
+
+import asyncio
+
+from app.core.budget import get_request_budget, start_request_budget, stop_request_budget
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+
+class _Backend:
+    """Counts calls and blocks them until `release` is set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def fetch(self):
+        self.calls += 1
+        await self.release.wait()
+        return f"result {self.calls}"
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight, backend = SingleFlight("test"), _Backend()
+        callers = [asyncio.ensure_future(flight.do("key", backend.fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight() == 1
+        backend.release.set()
+        results = await asyncio.gather(*callers)
+        assert flight.in_flight() == 0
+        return backend.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result 1"] * 5
+
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    async def scenario():
+        flight, backend = SingleFlight("test"), _Backend()
+        backend.release.set()
+        first = await asyncio.gather(flight.do("a", backend.fetch), flight.do("b", backend.fetch))
+        second = await flight.do("a", backend.fetch)
+        return backend.calls, first, second
+
+    assert asyncio.run(scenario()) == (3, ["result 1", "result 2"], "result 3")
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        return await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True), flight.in_flight()
+
+    results, in_flight = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flight, backend = SingleFlight("test"), _Backend()
+        leader = asyncio.ensure_future(flight.do("key", backend.fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", backend.fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        backend.release.set()
+        return leader.cancelled(), await follower
+
+    assert asyncio.run(scenario()) == (True, "result 1")
+
+
+def test_skipped_enrichment_is_added_to_each_callers_budget():
+    async def caller(flight, fn):
+        budget, token = start_request_budget(5)
+        try:
+            await flight.do("key", fn)
+            return budget.skipped
+        finally:
+            stop_request_budget(token)
+
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def partially_enriched():
+            await asyncio.sleep(0)
+            get_request_budget().skip()
+            return "partial"
+
+        return await asyncio.gather(caller(flight, partially_enriched), caller(flight, partially_enriched))
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+
+def test_disabled_coalescing_calls_every_time(monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_COALESCING_ENABLED", False)
+
+    async def scenario():
+        flight, backend = SingleFlight("test"), _Backend()
+        backend.release.set()
+        await asyncio.gather(*(flight.do("key", backend.fetch) for _ in range(3)))
+        return backend.calls
+
+    assert asyncio.run(scenario()) == 3
@@ -0,0 +1,128 @@
+"""
+Unit tests for the in-process background task queues (app.core.tasks).
+"""
+
+import asyncio
+
+from app.core import tasks
+from app.core.tasks import TaskQueue, task_queue
+
+
+def _queue(capacity=10, concurrency=1, max_retries=2):
+    return TaskQueue("test", capacity=capacity, concurrency=concurrency, max_retries=max_retries, retry_backoff_seconds=0)
+
+
+class _Flaky:
+    """Fails the first `failures` calls."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = 0
+
+    async def __call__(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise RuntimeError("transient")
+
+
+def test_submit_runs_inline_when_not_running():
+    async def scenario():
+        queue, task = _queue(), _Flaky(0)
+        return await queue.submit(task), task.attempts
+
+    assert asyncio.run(scenario()) == (False, 1)
+
+
+def test_failed_tasks_are_retried_up_to_max_retries():
+    async def scenario():
+        queue = _queue(max_retries=2)
+        recovers, keeps_failing = _Flaky(2), _Flaky(10)
+        queue.start()
+        await queue.submit(recovers)
+        await queue.submit(keeps_failing)
+        await queue.drain(timeout=1)
+        return recovers.attempts, keeps_failing.attempts
+
+    assert asyncio.run(scenario()) == (3, 3)
+
+
+def test_zero_max_retries_runs_each_task_once():
+    async def scenario():
+        queue, task = _queue(max_retries=0), _Flaky(1)
+        queue.start()
+        assert await queue.submit(task)
+        await queue.drain(timeout=1)
+        return task.attempts
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_full_queue_runs_the_task_inline():
+    async def scenario():
+        queue = _queue(capacity=1)
+        release = asyncio.Event()
+        ran = []
+
+        async def blocked():
+            await release.wait()
+
+        async def task(name):
+            ran.append(name)
+
+        queue.start()
+        assert await queue.submit(blocked)
+        await asyncio.sleep(0)  # The worker takes it
+        assert await queue.submit(task, "queued")
+        assert not await queue.submit(task, "inline")
+        release.set()
+        await queue.drain(timeout=1)
+        return ran
+
+    assert asyncio.run(scenario()) == ["inline", "queued"]
+
+
+def test_drain_drops_tasks_left_after_the_timeout():
+    async def scenario():
+        queue = _queue()
+        ran = []
+
+        async def slow(name):
+            await asyncio.sleep(10)
+            ran.append(name)
+
+        queue.start()
+        for name in "abc":
+            await queue.submit(slow, name)
+        await asyncio.sleep(0)
+        dropped = await queue.drain(timeout=0.01)
+        return dropped, ran, queue.running, queue.depth
+
+    assert asyncio.run(scenario()) == (2, [], False, 0)
+
+
+def test_drained_queue_can_be_restarted():
+    async def scenario():
+        queue, task = _queue(), _Flaky(0)
+        queue.start()
+        await queue.drain(timeout=1)
+        assert await queue.drain(timeout=1) == 0
+        queue.start()
+        assert await queue.submit(task)
+        await queue.drain(timeout=1)
+        return task.attempts
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_task_queue_is_created_once_per_name(monkeypatch):
+    monkeypatch.setattr(tasks, "_queues", {})
+    queue = task_queue("test_views", max_retries=0)
+    assert task_queue("test_views") is queue
+    assert queue.max_retries == 0
+    assert task_queue("test_deletes").max_retries == tasks.settings.TASK_QUEUE_MAX_RETRIES
+
+
+def test_view_counting_is_not_retried():
+    from app.services.blog import _view_counts
+
+    assert _view_counts.max_retries == 0  # $inc is not idempotent
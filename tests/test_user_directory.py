@@ -0,0 +1,124 @@
+"""
+Unit tests for the Keycloak user directory mirror (app.services.user_directory): the sync pass,
+the read-through of users missing from the mirror and the removal of deleted users, against
+the in-memory MongoDB stand-in and the mock Keycloak.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db.database import close_mongo_connection, collection_blog, collection_user
+from app.services import keycloak
+from app.services.user_directory import UNKNOWN_USER, get_user_profiles, profile_version, sync_user_directory
+from benchmarks.environment import install_database
+from benchmarks.inmemory_mongo import InMemoryClient
+from benchmarks.mock_keycloak import MockKeycloak
+
+
+@pytest.fixture
+def database():
+    install_database(InMemoryClient())
+    yield
+    close_mongo_connection()
+
+
+@pytest.fixture
+def directory(database, monkeypatch):
+    monkeypatch.setattr(settings, "USER_DIRECTORY_PAGE_SIZE", 2)  # Several pages for five users
+    mock = MockKeycloak([f"u{i}" for i in range(5)])
+    keycloak.set_http_transport(mock.transport())
+    yield mock
+    keycloak.set_http_transport(None)
+
+
+async def _mirror():
+    return {doc["_id"]: doc async for doc in collection_user.find({})}
+
+
+def test_sync_mirrors_every_page_and_writes_only_changes(directory):
+    async def scenario():
+        first = await sync_user_directory()
+        directory.users["u3"]["lastName"] = "Renamed"
+        second = await sync_user_directory()
+        return first, second, await _mirror()
+
+    first, second, mirror = asyncio.run(scenario())
+    assert first == {"seen": 5, "updated": 5, "removed": 0, "snapshots": 0}
+    assert second == {"seen": 5, "updated": 1, "removed": 0, "snapshots": 0}
+    assert sorted(mirror) == [f"u{i}" for i in range(5)]
+    assert (mirror["u3"]["username"], mirror["u3"]["lastName"]) == ("user_u3", "Renamed")
+
+
+def test_sync_rewrites_the_changed_authors_snapshots(directory):
+    async def scenario():
+        await sync_user_directory()
+        await collection_blog.insert_one({"_id": "b1", "user_id": "u1", "author": {"username": "old", "version": "stale"}})
+        directory.users["u1"]["firstName"] = "New"
+        report = await sync_user_directory()
+        return report, await collection_blog.find_one({"_id": "b1"})
+
+    report, blog = asyncio.run(scenario())
+    assert report["snapshots"] == 1
+    assert blog["author"]["firstName"] == "New"
+    assert blog["author"]["version"] != "stale"
+
+
+def test_unmirrored_users_are_read_through_and_stored(directory):
+    async def scenario():
+        profiles = await get_user_profiles(["u2", "gone", None])
+        requests = directory.request_count
+        again = await get_user_profiles(["u2", "gone"])
+        return profiles, again, directory.request_count - requests, await _mirror()
+
+    profiles, again, requests, mirror = asyncio.run(scenario())
+    assert profiles["u2"].username == "user_u2"
+    assert profiles["gone"] == UNKNOWN_USER and profiles[None] == UNKNOWN_USER
+    assert again["u2"].username == "user_u2" and again["gone"] == UNKNOWN_USER
+    assert requests == 0  # Served from the mirror
+    assert mirror["gone"]["deleted"] is True
+
+
+def test_users_deleted_from_keycloak_are_blanked_despite_the_profile_cache(directory):
+    async def scenario():
+        await sync_user_directory()
+        await get_user_profiles(["u4"])
+        await keycloak.get_user_by_id("u4")  # Cached profile, still served after the deletion
+        await collection_blog.insert_one({"_id": "b1", "user_id": "u4", "author": {"username": "user_u4", "version": "v"}})
+        del directory.users["u4"]
+        report = await sync_user_directory()
+        return report, await _mirror(), await collection_blog.find_one({"_id": "b1"})
+
+    report, mirror, blog = asyncio.run(scenario())
+    assert report["removed"] == 1
+    assert mirror["u4"]["deleted"] is True and mirror["u4"]["username"] == ""
+    assert blog["author"]["version"] == profile_version(UNKNOWN_USER)
+
+
+def test_users_missed_by_the_listing_are_kept(directory, monkeypatch):
+    async def scenario():
+        await sync_user_directory()
+        listed = keycloak.get_users_page
+
+        async def get_users_page(first, maximum):
+            return [user for user in await listed(first, maximum) if user["id"] != "u0"]
+
+        monkeypatch.setattr("app.services.user_directory.get_users_page", get_users_page)
+        report = await sync_user_directory()
+        return report, await _mirror()
+
+    report, mirror = asyncio.run(scenario())
+    assert report["removed"] == 0
+    assert mirror["u0"]["username"] == "user_u0" and not mirror["u0"].get("deleted")
+
+
+def test_an_empty_listing_removes_nobody(directory):
+    async def scenario():
+        await sync_user_directory()
+        directory.users.clear()
+        return await sync_user_directory(), await _mirror()
+
+    report, mirror = asyncio.run(scenario())
+    assert report == {"seen": 0, "updated": 0, "removed": 0, "snapshots": 0}
+    assert not any(doc.get("deleted") for doc in mirror.values())